@@ -0,0 +1,100 @@
+"""
+Runs the SailRAG app under uvicorn with an event-loop lag probe.
+
+The probe is a task that sleeps `interval_s` in a loop and records how late it
+wakes up: any time the loop spends blocked (sync I/O, CPU-heavy parsing, ...)
+shows up as lag. Samples are served at GET /_loadtest/loop_lag and cleared
+with POST /_loadtest/loop_lag/reset.
+
+    python -m loadtest.app_server --port 18000 [--roles query,ingest]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import uvicorn
+
+from sailrag.app import create_app
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class LoopLagProbe:
+    def __init__(self, interval_s: float = 0.01, max_samples: int = 100_000):
+        self.interval_s = interval_s
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval_s)
+            self.samples.append(max(0.0, time.perf_counter() - t0 - self.interval_s))
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    def summary(self) -> dict:
+        s = sorted(self.samples)
+        return {
+            "samples": len(s),
+            "p50_ms": round(1000 * percentile(s, 50), 2),
+            "p99_ms": round(1000 * percentile(s, 99), 2),
+            "max_ms": round(1000 * (s[-1] if s else 0.0), 2),
+        }
+
+
+def build_app(roles: list[str] | None = None):
+    app = create_app(roles)
+    probe = LoopLagProbe()
+    app_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with app_lifespan(app) as state:
+            probe.start()
+            try:
+                yield state
+            finally:
+                probe.stop()
+
+    app.router.lifespan_context = lifespan
+
+    @app.get("/_loadtest/loop_lag", include_in_schema=False)
+    async def loop_lag():
+        return probe.summary()
+
+    @app.post("/_loadtest/loop_lag/reset", include_in_schema=False)
+    async def loop_lag_reset():
+        probe.samples.clear()
+        return {"ok": True}
+
+    return app
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18000)
+    ap.add_argument("--roles", default=None, help="comma-separated app roles (default: APP_ROLES)")
+    args = ap.parse_args()
+
+    roles = args.roles.split(",") if args.roles else None
+    uvicorn.run(build_app(roles), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
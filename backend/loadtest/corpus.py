@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+_SUBJECTS = [
+    "A power-driven vessel",
+    "A sailing vessel",
+    "A vessel engaged in fishing",
+    "A vessel restricted in her ability to manoeuvre",
+    "The give-way vessel",
+    "The stand-on vessel",
+    "A vessel at anchor",
+    "A vessel not under command",
+]
+_ACTIONS = [
+    "shall keep out of the way of",
+    "shall take early and substantial action to avoid",
+    "shall maintain a proper look-out for",
+    "shall proceed at a safe speed when approaching",
+    "shall sound one prolonged blast when nearing",
+    "shall exhibit a masthead light visible to",
+]
+_OBJECTS = [
+    "vessels crossing from starboard",
+    "a narrow channel or fairway",
+    "a traffic separation scheme",
+    "vessels in restricted visibility",
+    "the leeward boat on the same tack",
+    "a bend where other vessels may be obscured",
+]
+
+QUERIES = [
+    "who gives way when two sailing vessels meet",
+    "lights for a vessel at anchor",
+    "sound signals in restricted visibility",
+    "what is a safe speed",
+    "crossing situation power-driven vessels",
+    "narrow channel rules",
+    "traffic separation scheme crossing",
+    "vessel not under command lights",
+    "how to read a nautical chart",
+    "duties of the stand-on vessel",
+]
+
+
+def sentences(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(_SUBJECTS)} {rng.choice(_ACTIONS)} {rng.choice(_OBJECTS)}." for _ in range(n)]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: Path, pages: list[list[str]]) -> None:
+    """
+    Minimal PDF with a real text layer (Helvetica, one line per entry), no dependencies.
+    """
+    objs: list[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>", b""]
+    kids: list[int] = []
+    font_obj = 3
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for lines in pages:
+        ops = ["BT /F1 10 Tf 14 TL 56 760 Td"]
+        ops += [f"({_escape(ln)}) Tj T*" for ln in lines]
+        ops.append("ET")
+        content = "\n".join(ops).encode("latin-1", errors="replace")
+        objs.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_obj = len(objs)
+        objs.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (content_obj, font_obj)
+        )
+        kids.append(len(objs))
+
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(out))
+
+
+def write_corpus(data_dir: Path, docs: int = 3, pages: int = 8, lines_per_page: int = 40) -> list[str]:
+    """
+    Synthetic rule-book PDFs under data_dir/raw_pdfs; returns paths relative to data_dir.
+    """
+    out = []
+    for d in range(docs):
+        rel = f"raw_pdfs/loadtest-{d}.pdf"
+        body = [
+            [f"Loadtest Manual {d}"] + sentences(lines_per_page, seed=d * 1000 + p) + [f"Page {p + 1}"]
+            for p in range(pages)
+        ]
+        write_text_pdf(data_dir / rel, body)
+        out.append(rel)
+    return out
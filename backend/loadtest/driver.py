@@ -0,0 +1,367 @@
+"""
+Load / soak driver.
+
+Starts the OpenSearch + Ollama fakes and the SailRAG app (each in its own process),
+seeds the index from a synthetic PDF corpus, then runs `--concurrency` closed-loop
+workers picking /search, /answer, /index/ingest requests and /sessions conversations
+by weight for `--duration` seconds. Reports throughput, latency percentiles, shed (503) and error
+counts per scenario, plus event-loop lag of the app and app RSS.
+
+Runs fully offline. With --max-p99-ms / --max-error-rate / --max-loop-lag-ms it exits
+non-zero when a threshold is exceeded, so it can gate CI.
+
+    cd backend && python -m loadtest --duration 30 --concurrency 16 --mix search=8,answer=1,ingest=1
+    python -m loadtest --duration 3600 --report-every 60      # soak
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from loadtest.app_server import LoopLagProbe, percentile
+from loadtest.corpus import QUERIES, write_corpus
+from loadtest.fakes import add_latency_args
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = ("search", "answer", "ingest", "session")
+# A "session" scenario is a conversation: its first turn reports as "session", the rest as "followup"
+REPORTED = ("search", "answer", "ingest", "session", "followup")
+FOLLOWUPS = [
+    "what about at night?",
+    "and in restricted visibility?",
+    "does that change for a small sailing boat?",
+    "which rule covers that?",
+]
+
+
+@dataclass
+class Sample:
+    scenario: str
+    t_end: float
+    latency_s: float
+    status: int  # HTTP status, 0 = transport error
+
+
+@dataclass
+class Run:
+    samples: list[Sample] = field(default_factory=list)
+    started: float = 0.0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r} (expected {SCENARIOS})")
+        mix[name] = float(weight or 1)
+    return {k: v for k, v in mix.items() if v > 0}
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for ln in f:
+                if ln.startswith("VmRSS:"):
+                    return int(ln.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _request(scenario: str, rng: random.Random, docs: list[str], args: argparse.Namespace) -> tuple[str, dict]:
+    if scenario == "search":
+        return "/search", {"query": rng.choice(QUERIES), "k": 8, "no_cache": args.no_cache}
+    if scenario == "answer":
+        return "/answer", {"question": rng.choice(QUERIES), "k": 4, "no_cache": args.no_cache}
+    return "/index/ingest", {"path": rng.choice(docs), "max_pages": args.pages}
+
+
+async def _conversation(client: httpx.AsyncClient, run: Run, rng: random.Random, args: argparse.Namespace) -> None:
+    t0 = time.monotonic()
+    try:
+        r = await client.post("/sessions", json={"k": 4})
+        r.raise_for_status()
+        session_id = r.json()["session_id"]
+    except httpx.HTTPError as e:
+        status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 0
+        run.samples.append(Sample("session", time.monotonic(), time.monotonic() - t0, status))
+        return
+
+    for turn in range(args.session_turns):
+        question = rng.choice(FOLLOWUPS) if turn else rng.choice(QUERIES)
+        t0 = time.monotonic()
+        try:
+            r = await client.post(f"/sessions/{session_id}/answer", json={"question": question})
+            status = r.status_code
+        except httpx.HTTPError:
+            status = 0
+        t1 = time.monotonic()
+        run.samples.append(Sample("followup" if turn else "session", t1, t1 - t0, status))
+        if status != 200:
+            break
+    with contextlib.suppress(httpx.HTTPError):
+        await client.delete(f"/sessions/{session_id}")
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    run: Run,
+    mix: dict[str, float],
+    docs: list[str],
+    deadline: float,
+    seed: int,
+    args: argparse.Namespace,
+) -> None:
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        if scenario == "session":
+            await _conversation(client, run, rng, args)
+            continue
+        path, body = _request(scenario, rng, docs, args)
+        t0 = time.monotonic()
+        try:
+            r = await client.post(path, json=body)
+            status = r.status_code
+        except httpx.HTTPError:
+            status = 0
+        t1 = time.monotonic()
+        run.samples.append(Sample(scenario, t1, t1 - t0, status))
+
+
+def summarize(samples: list[Sample], elapsed_s: float) -> dict[str, dict]:
+    out: dict[str, dict] = {}
+    for name in REPORTED + ("all",):
+        group = [s for s in samples if name in ("all", s.scenario)]
+        if not group:
+            continue
+        ok = sorted(s.latency_s for s in group if 200 <= s.status < 300)
+        shed = sum(1 for s in group if s.status == 503)
+        errors = sum(1 for s in group if not (200 <= s.status < 300) and s.status != 503)
+        out[name] = {
+            "requests": len(group),
+            "ok": len(ok),
+            "shed": shed,
+            "errors": errors,
+            "error_rate": errors / len(group),
+            "rps": len(ok) / elapsed_s if elapsed_s > 0 else 0.0,
+            "p50_ms": 1000 * percentile(ok, 50),
+            "p90_ms": 1000 * percentile(ok, 90),
+            "p99_ms": 1000 * percentile(ok, 99),
+            "max_ms": 1000 * (ok[-1] if ok else 0.0),
+        }
+    return out
+
+
+def _print_table(stats: dict[str, dict]) -> None:
+    print(f"{'scenario':<8} {'req':>7} {'ok':>7} {'shed':>6} {'err':>6} {'rps':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, s in stats.items():
+        print(
+            f"{name:<8} {s['requests']:>7} {s['ok']:>7} {s['shed']:>6} {s['errors']:>6} {s['rps']:>8.1f} "
+            f"{s['p50_ms']:>8.1f} {s['p90_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f}"
+        )
+
+
+async def _wait_ready(client: httpx.AsyncClient, procs: list[subprocess.Popen], timeout_s: float) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        for p in procs:
+            if p.poll() is not None:
+                raise SystemExit(f"process exited early: {' '.join(p.args)}")
+        with contextlib.suppress(httpx.HTTPError):
+            r = await client.get("/healthz")
+            if r.status_code == 200 and r.json().get("status") == "ok":
+                return
+        await asyncio.sleep(0.2)
+    raise SystemExit("app did not become healthy in time")
+
+
+async def _reporter(
+    client: httpx.AsyncClient,
+    run: Run,
+    app_pid: int,
+    every_s: float,
+    stop: asyncio.Event,
+) -> None:
+    last = 0
+    t_last = time.monotonic()
+    while not stop.is_set():
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), timeout=every_s)
+        now = time.monotonic()
+        window = run.samples[last:]
+        last += len(window)
+        stats = summarize(window, now - t_last).get("all")
+        t_last = now
+        lag = {}
+        with contextlib.suppress(httpx.HTTPError):
+            lag = (await client.get("/_loadtest/loop_lag")).json()
+        if stats:
+            print(
+                f"[{now - run.started:7.0f}s] rps={stats['rps']:.1f} p99={stats['p99_ms']:.0f}ms "
+                f"shed={stats['shed']} err={stats['errors']} loop_lag_p99={lag.get('p99_ms', 0)}ms "
+                f"rss={_rss_mb(app_pid):.0f}MB",
+                flush=True,
+            )
+
+
+async def run_load(args: argparse.Namespace, app_url: str, app_pid: int, docs: list[str], procs: list) -> dict:
+    mix = _parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency + 4, max_keepalive_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.request_timeout_s, limits=limits) as client:
+        await _wait_ready(client, procs, args.startup_timeout_s)
+
+        # Seed the index so retrieval has something to return
+        for rel in docs:
+            r = await client.post("/index/ingest", json={"path": rel, "max_pages": args.pages})
+            r.raise_for_status()
+
+        await client.post("/_loadtest/loop_lag/reset")
+        driver_lag = LoopLagProbe()
+        driver_lag.start()
+
+        run = Run(started=time.monotonic())
+        deadline = run.started + args.duration
+        stop = asyncio.Event()
+        reporter = None
+        if args.report_every > 0:
+            reporter = asyncio.create_task(_reporter(client, run, app_pid, args.report_every, stop))
+
+        await asyncio.gather(
+            *(_worker(client, run, mix, docs, deadline, args.seed + i, args) for i in range(args.concurrency))
+        )
+        elapsed = time.monotonic() - run.started
+        stop.set()
+        if reporter:
+            await reporter
+        driver_lag.stop()
+
+        app_lag = (await client.get("/_loadtest/loop_lag")).json()
+
+    return {
+        "duration_s": elapsed,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "scenarios": summarize(run.samples, elapsed),
+        "app_loop_lag": app_lag,
+        "driver_loop_lag": driver_lag.summary(),
+        "app_rss_mb": round(_rss_mb(app_pid), 1),
+    }
+
+
+def check_gates(result: dict, args: argparse.Namespace) -> list[str]:
+    failures = []
+    for name, s in result["scenarios"].items():
+        if args.max_p99_ms is not None and s["p99_ms"] > args.max_p99_ms:
+            failures.append(f"{name}: p99 {s['p99_ms']:.0f}ms > {args.max_p99_ms:.0f}ms")
+        if args.max_error_rate is not None and s["error_rate"] > args.max_error_rate:
+            failures.append(f"{name}: error rate {s['error_rate']:.3f} > {args.max_error_rate}")
+    lag = result["app_loop_lag"].get("p99_ms", 0.0)
+    if args.max_loop_lag_ms is not None and lag > args.max_loop_lag_ms:
+        failures.append(f"app loop lag p99 {lag}ms > {args.max_loop_lag_ms}ms")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m loadtest")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--mix", default="search=8,answer=1,ingest=1")
+    ap.add_argument("--docs", type=int, default=3, help="synthetic PDFs in the corpus")
+    ap.add_argument("--pages", type=int, default=8, help="pages per synthetic PDF")
+    ap.add_argument("--no-cache", action="store_true", help="bypass the retrieval cache")
+    ap.add_argument("--roles", default="query,ingest")
+    ap.add_argument("--ollama-replicas", type=int, default=1, help="fake Ollama instances behind the pools")
+    ap.add_argument("--session-turns", type=int, default=4, help="turns per conversation (session scenario)")
+    ap.add_argument("--report-every", type=float, default=0.0, help="interim report interval (soak), 0 = off")
+    ap.add_argument("--request-timeout-s", type=float, default=120.0)
+    ap.add_argument("--startup-timeout-s", type=float, default=30.0)
+    ap.add_argument("--json", type=Path, default=None, help="write the result as JSON")
+    ap.add_argument("--max-p99-ms", type=float, default=None)
+    ap.add_argument("--max-error-rate", type=float, default=None)
+    ap.add_argument("--max-loop-lag-ms", type=float, default=None)
+    add_latency_args(ap)
+    args = ap.parse_args(argv)
+
+    os_port, app_port = _free_port(), _free_port()
+    ollama_ports = [_free_port() for _ in range(args.ollama_replicas)]
+    ollama_urls = [f"http://127.0.0.1:{p}" for p in ollama_ports]
+    fake_args = [
+        f"--search-latency={args.search_latency}",
+        f"--bulk-latency={args.bulk_latency}",
+        f"--cold-knn-latency={args.cold_knn_latency}",
+        f"--embed-latency={args.embed_latency}",
+        f"--first-token-latency={args.first_token_latency}",
+        f"--token-latency={args.token_latency}",
+        f"--prompt-token-latency={args.prompt_token_latency}",
+        f"--tokens={args.tokens}",
+        f"--llm-parallel={args.llm_parallel}",
+        f"--seed={args.seed}",
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="sailrag-loadtest-") as tmp:
+        docs = write_corpus(Path(tmp), docs=args.docs, pages=args.pages)
+        env = {
+            **os.environ,
+            "OPENSEARCH_URL": f"http://127.0.0.1:{os_port}",
+            "OLLAMA_URL": ollama_urls[0],
+            "OLLAMA_EMBED_URLS": ",".join(ollama_urls),
+            "OLLAMA_LLM_URLS": ",".join(ollama_urls),
+            "OPENSEARCH_INDEX": "loadtest-chunks",
+            "DATA_DIR": tmp,
+            "OLLAMA_NUM_PARALLEL": str(args.llm_parallel),
+        }
+        fakes = subprocess.Popen(
+            [sys.executable, "-m", "loadtest.fakes", f"--opensearch-port={os_port}", "--ollama-port=" + ",".join(map(str, ollama_ports)), *fake_args],
+            cwd=BACKEND_DIR,
+        )
+        app = subprocess.Popen(
+            [sys.executable, "-m", "loadtest.app_server", f"--port={app_port}", f"--roles={args.roles}"],
+            cwd=tmp,  # no .env from the working tree
+            env={**env, "PYTHONPATH": os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))},
+        )
+        try:
+            result = asyncio.run(run_load(args, f"http://127.0.0.1:{app_port}", app.pid, docs, [fakes, app]))
+        finally:
+            for p in (app, fakes):
+                p.terminate()
+            for p in (app, fakes):
+                with contextlib.suppress(subprocess.TimeoutExpired):
+                    p.wait(timeout=10)
+
+    print(f"\n{args.concurrency} workers, {result['duration_s']:.1f}s, mix {result['mix']}")
+    _print_table(result["scenarios"])
+    lag = result["app_loop_lag"]
+    print(f"\napp loop lag: p50={lag['p50_ms']}ms p99={lag['p99_ms']}ms max={lag['max_ms']}ms ({lag['samples']} samples)")
+    dlag = result["driver_loop_lag"]
+    print(f"driver loop lag: p99={dlag['p99_ms']}ms max={dlag['max_ms']}ms   app RSS: {result['app_rss_mb']} MB")
+
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+    failures = check_gates(result, args)
+    for f in failures:
+        print(f"FAIL {f}", file=sys.stderr)
+    return 1 if failures else 0
@@ -0,0 +1,592 @@
+"""
+In-process stand-ins for the subset of OpenSearch and Ollama that SailRAG calls.
+
+- OpenSearch: GET /, HEAD/PUT /<index>, POST /_bulk (index + citation updates),
+  POST /<index>/_search (match, knn, term/terms/prefix/range/bool filters,
+  sort + search_after), POST /_msearch,
+  GET /_cat/indices, GET /_plugins/_knn/warmup/<index>, GET /_plugins/_knn/stats;
+  index expressions may be comma-separated and use wildcards. The first kNN query on an
+  index since its last write (or warm-up) pays --cold-knn-latency, like an HNSW graph load
+- Ollama: GET /api/tags, GET /api/ps, POST /api/embeddings, POST /api/embed,
+  POST /api/generate (streaming and non-streaming, `context` continuation with a simulated
+  KV cache); several replicas with --ollama-port p1,p2
+
+Every endpoint sleeps for a sample of a configurable latency distribution, so
+queueing and concurrency behaviour of the backend can be exercised without the
+docker stack or network access.
+
+    python -m loadtest.fakes --opensearch-port 19200 --ollama-port 11435 \
+        --search-latency lognormal:15:0.6 --token-latency const:20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fnmatch
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Latency distribution, parsed from a spec string (milliseconds):
+    "0", "const:20", "uniform:5:50", "exp:20" (mean), "lognormal:20:0.5" (median, sigma).
+    """
+
+    kind: str = "const"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> Latency:
+        parts = spec.split(":")
+        try:
+            if len(parts) == 1:
+                return cls("const", float(parts[0]))
+            kind, args = parts[0], [float(x) for x in parts[1:]]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec {spec!r}") from None
+        if kind in ("const", "exp") and len(args) == 1:
+            return cls(kind, args[0])
+        if kind in ("uniform", "lognormal") and len(args) == 2:
+            return cls(kind, args[0], args[1])
+        raise ValueError(f"Invalid latency spec {spec!r}")
+
+    def sample_s(self, rng: random.Random) -> float:
+        if self.kind == "const":
+            ms = self.a
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "exp":
+            ms = rng.expovariate(1.0 / self.a) if self.a > 0 else 0.0
+        else:
+            ms = self.a * math.exp(rng.gauss(0.0, self.b))
+        return max(0.0, ms) / 1000.0
+
+    async def sleep(self, rng: random.Random) -> None:
+        s = self.sample_s(rng)
+        if s > 0:
+            await asyncio.sleep(s)
+
+
+def fake_embedding(text: str, dim: int) -> list[float]:
+    """
+    Deterministic feature-hashed bag of words, L2-normalized: texts sharing words
+    get similar vectors, so kNN results are stable and meaningful enough.
+    """
+    vec = [0.0] * dim
+    for w in _WORD_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest(), "big")
+        vec[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+# --- OpenSearch --------------------------------------------------------------------
+
+
+def _field_values(doc: dict, field: str) -> list:
+    """
+    Every value of a (dotted) field, flattening arrays of objects like OpenSearch.
+    """
+    values = [doc]
+    for part in field.split("."):
+        nxt = []
+        for v in values:
+            if isinstance(v, dict) and v.get(part) is not None:
+                got = v[part]
+                nxt.extend(got if isinstance(got, list) else [got])
+        values = nxt
+    return values
+
+
+def _matches(doc: dict, q: dict) -> bool:
+    """
+    Filter-context evaluation of the query clauses SailRAG sends.
+    """
+    if "bool" in q:
+        b = q["bool"]
+        should = b.get("should", [])
+        return (
+            all(_matches(doc, c) for c in b.get("filter", []) + b.get("must", []))
+            and not any(_matches(doc, c) for c in b.get("must_not", []))
+            and (not should or any(_matches(doc, c) for c in should))
+        )
+    if "term" in q:
+        (field, value), = q["term"].items()
+        return value in _field_values(doc, field)
+    if "prefix" in q:
+        (field, value), = q["prefix"].items()
+        return any(str(v).startswith(value) for v in _field_values(doc, field))
+    if "terms" in q:
+        (field, values), = q["terms"].items()
+        have = _field_values(doc, field)
+        return any(v in have for v in values)
+    if "range" in q:
+        (field, rng), = q["range"].items()
+        return any(rng.get("gte", v) <= v <= rng.get("lte", v) for v in _field_values(doc, field))
+    return True  # scoring clauses (match/knn) don't filter
+
+
+def _bm25ish(doc: dict, terms: set[str]) -> float:
+    words = _WORD_RE.findall((doc.get("text") or "").lower())
+    if not words:
+        return 0.0
+    hits = sum(1 for w in words if w in terms)
+    return hits / math.sqrt(len(words))
+
+
+class FakeOpenSearch:
+    def __init__(
+        self,
+        latency: Latency,
+        bulk_latency: Latency,
+        seed: int = 0,
+        cold_knn_latency: Latency = Latency(),
+    ):
+        self.latency = latency
+        self.bulk_latency = bulk_latency
+        self.cold_knn_latency = cold_knn_latency
+        self.rng = random.Random(seed)
+        self.indices: dict[str, dict[str, dict]] = {}
+        self.shards: dict[str, int] = {}
+        self.requests = 0
+        # Indices whose k-NN graphs are "in memory"; writes make an index cold again
+        self.warm: set[str] = set()
+        self.graph_hits = 0
+        self.graph_misses = 0
+        self._loading: dict[str, asyncio.Lock] = {}
+
+    async def load_graphs(self, index_expr: str) -> None:
+        for name in self.resolve(index_expr):
+            if name not in self.indices:
+                continue
+            if name in self.warm:
+                self.graph_hits += 1
+                continue
+            # Concurrent queries on a cold index wait for the same load
+            async with self._loading.setdefault(name, asyncio.Lock()):
+                if name in self.warm:
+                    continue
+                self.graph_misses += 1
+                await self.cold_knn_latency.sleep(self.rng)
+                self.warm.add(name)
+
+    def knn_stats(self) -> dict:
+        def graph_kb(name: str) -> int:
+            return sum(4 * len(d.get("embedding") or ()) for d in self.indices[name].values()) // 1024
+
+        in_cache = {
+            n: {"graph_memory_usage": graph_kb(n), "graph_count": self.shards.get(n, 1)} for n in sorted(self.warm)
+        }
+        used_kb = sum(i["graph_memory_usage"] for i in in_cache.values())
+        limit_kb = 1 << 20
+        return {
+            "circuit_breaker_triggered": False,
+            "nodes": {
+                "fake-node": {
+                    "graph_memory_usage": used_kb,
+                    "graph_memory_usage_percentage": round(100 * used_kb / limit_kb, 2),
+                    "cache_capacity_reached": False,
+                    "hit_count": self.graph_hits,
+                    "miss_count": self.graph_misses,
+                    "eviction_count": 0,
+                    "load_exception_count": 0,
+                    "indices_in_cache": in_cache,
+                }
+            },
+        }
+
+    def resolve(self, index_expr: str) -> list[str]:
+        """
+        Index names for a comma-separated list of names / wildcard patterns.
+        """
+        names: list[str] = []
+        for part in index_expr.split(","):
+            matched = [n for n in self.indices if fnmatch.fnmatchcase(n, part)] if "*" in part else [part]
+            names.extend(n for n in matched if n not in names)
+        return names
+
+    def _docs(self, index_expr: str) -> list[tuple[str, dict]]:
+        out = []
+        for name in self.resolve(index_expr):
+            out.extend(self.indices.get(name, {}).items())
+        return out
+
+    def search(self, index_expr: str, body: dict) -> dict:
+        size = int(body.get("size", 10))
+        query = body.get("query", {"match_all": {}})
+        docs = self._docs(index_expr)
+
+        scored: list[tuple[float, str, dict]] = []
+        if "knn" in query:
+            (field, knn), = query["knn"].items()
+            vec = knn["vector"]
+            flt = knn.get("filter")
+            for _id, d in docs:
+                if flt and not _matches(d, flt):
+                    continue
+                emb = d.get(field)
+                if emb:
+                    scored.append((sum(a * b for a, b in zip(vec, emb)) + 1.0, _id, d))
+            size = min(size, int(knn.get("k", size)))
+        else:
+            match = None
+            clauses = [query]
+            while clauses:
+                c = clauses.pop()
+                if "match" in c:
+                    match = c["match"]
+                elif "bool" in c:
+                    clauses.extend(c["bool"].get("must", []))
+            terms: set[str] = set()
+            if match:
+                (_, m), = match.items()
+                terms = set(_WORD_RE.findall((m["query"] if isinstance(m, dict) else m).lower()))
+            for _id, d in docs:
+                if not _matches(d, query):
+                    continue
+                score = _bm25ish(d, terms) if terms else 1.0
+                if score > 0:
+                    scored.append((score, _id, d))
+
+        scored.sort(key=lambda x: x[0], reverse=True)
+        sort_field = None
+        if body.get("sort"):
+            # One ascending keyword field, paged with search_after
+            (sort_field, _), = body["sort"][0].items()
+            scored.sort(key=lambda x: str(x[2].get(sort_field, "")))
+            if body.get("search_after"):
+                after = body["search_after"][0]
+                scored = [x for x in scored if str(x[2].get(sort_field, "")) > after]
+        fields = body.get("_source")
+        hits = []
+        for score, _id, d in scored[:size]:
+            src = {k: d[k] for k in fields if k in d} if isinstance(fields, list) else d
+            hits.append({"_id": _id, "_score": score, "_source": src})
+            if sort_field:
+                hits[-1]["sort"] = [str(d.get(sort_field, ""))]
+        return {"took": 1, "hits": {"total": {"value": len(scored)}, "hits": hits}}
+
+    def bulk(self, payload: str) -> dict:
+        lines = [ln for ln in payload.splitlines() if ln.strip()]
+        items = []
+        i = 0
+        while i < len(lines):
+            action = json.loads(lines[i])
+            (op, meta), = action.items()
+            doc = json.loads(lines[i + 1])
+            i += 2
+            index = self.indices.setdefault(meta["_index"], {})
+            self.warm.discard(meta["_index"])
+            if op == "index":
+                index[meta["_id"]] = doc
+                items.append({"index": {"_id": meta["_id"], "status": 201}})
+            elif op == "update":
+                existing = index.get(meta["_id"])
+                if existing is None:
+                    items.append({"update": {"_id": meta["_id"], "status": 404}})
+                    continue
+                params = doc.get("script", {}).get("params", {})
+                cites = existing.setdefault("citations", [])
+                seen = {c.get("chunk_id") for c in cites}
+                cites.extend(c for c in params.get("citations", []) if c.get("chunk_id") not in seen)
+                existing.update(doc.get("doc", {}))
+                items.append({"update": {"_id": meta["_id"], "status": 200}})
+        errors = any(next(iter(it.values()))["status"] >= 300 for it in items)
+        return {"took": 1, "errors": errors, "items": items}
+
+
+def create_opensearch_app(fake: FakeOpenSearch) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def count_requests(request: Request, call_next):
+        fake.requests += 1
+        return await call_next(request)
+
+    @app.get("/")
+    async def root():
+        return {"cluster_name": "loadtest", "version": {"number": "2.13.0-fake"}}
+
+    @app.post("/_bulk")
+    async def bulk(request: Request):
+        await fake.bulk_latency.sleep(fake.rng)
+        return fake.bulk((await request.body()).decode("utf-8"))
+
+    @app.post("/_msearch")
+    async def msearch(request: Request):
+        lines = [ln for ln in (await request.body()).decode("utf-8").splitlines() if ln.strip()]
+        await fake.latency.sleep(fake.rng)
+        responses = []
+        for header, body in zip(lines[0::2], lines[1::2]):
+            header, body = json.loads(header), json.loads(body)
+            if "knn" in body.get("query", {}):
+                await fake.load_graphs(header.get("index", ""))
+            responses.append(fake.search(header.get("index", ""), body))
+        return {"took": 1, "responses": responses}
+
+    @app.get("/_cat/indices/{pattern}")
+    async def cat_indices(pattern: str):
+        return [
+            {"index": n, "docs.count": str(len(fake.indices[n])), "store.size": "0", "pri": str(fake.shards.get(n, 1))}
+            for n in fake.resolve(pattern)
+            if n in fake.indices
+        ]
+
+    @app.post("/{index}/_search")
+    async def search(index: str, request: Request):
+        missing = [n for n in index.split(",") if "*" not in n and n not in fake.indices]
+        if missing:
+            return JSONResponse({"error": {"type": "index_not_found_exception", "index": missing[0]}}, status_code=404)
+        body = await request.json()
+        if "knn" in body.get("query", {}):
+            await fake.load_graphs(index)
+        await fake.latency.sleep(fake.rng)
+        return fake.search(index, body)
+
+    @app.get("/_plugins/_knn/warmup/{index}")
+    async def knn_warmup(index: str):
+        await fake.load_graphs(index)
+        total = sum(fake.shards.get(n, 1) for n in fake.resolve(index) if n in fake.indices)
+        return {"_shards": {"total": total, "successful": total, "failed": 0}}
+
+    @app.get("/_plugins/_knn/stats")
+    async def knn_stats():
+        return fake.knn_stats()
+
+    @app.post("/{index}/_refresh")
+    async def refresh(index: str):
+        return {"_shards": {"failed": 0}}
+
+    @app.head("/{index}")
+    async def index_exists(index: str):
+        return Response(status_code=200 if index in fake.indices else 404)
+
+    @app.put("/{index}")
+    async def index_create(index: str, request: Request):
+        if index in fake.indices:
+            return JSONResponse({"error": "resource_already_exists_exception"}, status_code=400)
+        body = await request.json()
+        fake.indices[index] = {}
+        fake.shards[index] = int(body.get("settings", {}).get("index", {}).get("number_of_shards", 1))
+        return {"acknowledged": True, "index": index}
+
+    return app
+
+
+# --- Ollama ------------------------------------------------------------------------
+
+
+class FakeOllama:
+    def __init__(
+        self,
+        embed_latency: Latency,
+        first_token_latency: Latency,
+        token_latency: Latency,
+        tokens: int = 64,
+        parallel: int = 1,
+        dim: int = 768,
+        seed: int = 0,
+        prompt_token_latency: Latency = Latency(),
+    ):
+        self.embed_latency = embed_latency
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.prompt_token_latency = prompt_token_latency
+        self.tokens = tokens
+        self.dim = dim
+        self.rng = random.Random(seed)
+        # Ollama runs OLLAMA_NUM_PARALLEL generations at once; the rest wait
+        self.slots = asyncio.Semaphore(parallel)
+        self.requests = 0
+        self.loaded: set[str] = set()
+        # Token sequences of recent generations: a prompt sharing a prefix with one of
+        # them only pays prompt evaluation for the rest, like Ollama's slot KV cache
+        self.kv: deque[list[int]] = deque(maxlen=4 * parallel)
+
+    def load(self, model: str | None) -> None:
+        if model:
+            self.loaded.add(model if ":" in model else f"{model}:latest")
+
+    def cached_prefix(self, ids: list[int]) -> int:
+        best = 0
+        for seq in self.kv:
+            n = 0
+            for a, b in zip(seq, ids):
+                if a != b:
+                    break
+                n += 1
+            best = max(best, n)
+        return best
+
+
+def _token_ids(words: list[str]) -> list[int]:
+    return [zlib.crc32(w.encode("utf-8")) & 0xFFFF for w in words]
+
+
+def create_ollama_app(fake: FakeOllama) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def count_requests(request: Request, call_next):
+        fake.requests += 1
+        return await call_next(request)
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "nomic-embed-text:latest"}, {"name": "llama3.2:3b"}]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": m} for m in sorted(fake.loaded)]}
+
+    @app.post("/api/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        fake.load(body.get("model"))
+        await fake.embed_latency.sleep(fake.rng)
+        return {"embedding": fake_embedding(body.get("prompt", ""), fake.dim)}
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        inputs = body.get("input", "")
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        fake.load(body.get("model"))
+        await fake.embed_latency.sleep(fake.rng)
+        return {"model": body.get("model"), "embeddings": [fake_embedding(t, fake.dim) for t in inputs]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        fake.load(body.get("model"))
+        if not body.get("prompt"):
+            # Empty prompt only loads the model
+            await fake.first_token_latency.sleep(fake.rng)
+            return {"model": body.get("model"), "response": "", "done": True, "done_reason": "load"}
+
+        # Answers end naturally after `tokens`; num_predict can only cut them shorter
+        num_predict = int((body.get("options") or {}).get("num_predict") or -1)
+        n = min(num_predict, fake.tokens) if num_predict > 0 else fake.tokens
+        words = _WORD_RE.findall(body.get("prompt", "")) or ["ok"]
+        prompt_ids = [*(body.get("context") or []), *_token_ids(words)]
+
+        timings = {}
+
+        async def tokens():
+            async with fake.slots:
+                t0 = time.perf_counter()
+                evaluated = len(prompt_ids) - fake.cached_prefix(prompt_ids)
+                await fake.first_token_latency.sleep(fake.rng)
+                per_token_s = fake.prompt_token_latency.sample_s(fake.rng)
+                if per_token_s > 0:
+                    await asyncio.sleep(per_token_s * evaluated)
+                t1 = time.perf_counter()
+                answer = []
+                for i in range(n):
+                    if i:
+                        await fake.token_latency.sleep(fake.rng)
+                    answer.append(words[i % len(words)])
+                    yield answer[-1] + " "
+                context = prompt_ids + _token_ids(answer)
+                fake.kv.append(context)
+                timings.update(
+                    context=context,
+                    prompt_eval_count=evaluated,
+                    prompt_eval_duration=int(1e9 * (t1 - t0)),
+                    eval_count=n,
+                    eval_duration=int(1e9 * (time.perf_counter() - t1)),
+                )
+
+        if body.get("stream", True):
+
+            async def ndjson():
+                async for tok in tokens():
+                    yield json.dumps({"model": body.get("model"), "response": tok, "done": False}) + "\n"
+                yield json.dumps({"model": body.get("model"), "response": "", "done": True, **timings}) + "\n"
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        text = "".join([tok async for tok in tokens()])
+        return {"model": body.get("model"), "response": text, "done": True, **timings}
+
+    return app
+
+
+async def serve(apps: list[tuple[FastAPI, int]], host: str = "127.0.0.1") -> None:
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False))
+        for app, port in apps
+    ]
+    await asyncio.gather(*(s.serve() for s in servers))
+
+
+def add_latency_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--search-latency", default="lognormal:10:0.5", help="OpenSearch _search/_msearch (ms)")
+    ap.add_argument("--bulk-latency", default="lognormal:30:0.5", help="OpenSearch _bulk (ms)")
+    ap.add_argument(
+        "--cold-knn-latency", default="0", help="OpenSearch kNN graph load per index since its last write (ms)"
+    )
+    ap.add_argument("--embed-latency", default="lognormal:15:0.4", help="Ollama embeddings (ms)")
+    ap.add_argument("--first-token-latency", default="lognormal:200:0.3", help="Ollama prompt eval (ms)")
+    ap.add_argument("--token-latency", default="const:5", help="Ollama per generated token (ms)")
+    ap.add_argument(
+        "--prompt-token-latency", default="0", help="Ollama per prompt token outside the KV cache (ms)"
+    )
+    ap.add_argument("--tokens", type=int, default=64, help="tokens per generation")
+    ap.add_argument("--llm-parallel", type=int, default=1, help="OLLAMA_NUM_PARALLEL of the fake")
+    ap.add_argument("--seed", type=int, default=0)
+
+
+def build_fakes(args: argparse.Namespace) -> tuple[FakeOpenSearch, FakeOllama]:
+    os_fake = FakeOpenSearch(
+        Latency.parse(args.search_latency),
+        Latency.parse(args.bulk_latency),
+        seed=args.seed,
+        cold_knn_latency=Latency.parse(args.cold_knn_latency),
+    )
+    ollama_fake = FakeOllama(
+        Latency.parse(args.embed_latency),
+        Latency.parse(args.first_token_latency),
+        Latency.parse(args.token_latency),
+        tokens=args.tokens,
+        parallel=args.llm_parallel,
+        seed=args.seed,
+        prompt_token_latency=Latency.parse(args.prompt_token_latency),
+    )
+    return os_fake, ollama_fake
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--opensearch-port", type=int, default=19200)
+    ap.add_argument("--ollama-port", default="11435", help="one port per Ollama replica, comma-separated")
+    add_latency_args(ap)
+    args = ap.parse_args()
+
+    os_fake, _ = build_fakes(args)
+    apps = [(create_opensearch_app(os_fake), args.opensearch_port)]
+    for port in args.ollama_port.split(","):
+        # Each replica has its own generation slots
+        _, ollama_fake = build_fakes(args)
+        apps.append((create_ollama_app(ollama_fake), int(port)))
+    asyncio.run(serve(apps))
+
+
+if __name__ == "__main__":
+    main()
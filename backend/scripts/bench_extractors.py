@@ -0,0 +1,66 @@
+"""
+Per-page throughput and quality of each installed PDF text-extraction backend.
+
+For every PDF (default: DATA_DIR/raw_pdfs) and every available backend, extracts
+all pages (or the first --max-pages) and reports pages/s and the share of pages
+passing `is_text_good_enough`.
+
+    python scripts/bench_extractors.py [paths ...] [--backends pypdf,pdfium] [--max-pages 50]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from sailrag.ingest.pdf_loader import available_extractors, is_text_good_enough, open_extractor
+from sailrag.settings import settings
+
+
+def bench(pdf_path: Path, backend: str, max_pages: int) -> dict:
+    t0 = time.perf_counter()
+    doc = open_extractor(pdf_path, backend)
+    try:
+        n = min(doc.page_count(), max_pages) if max_pages else doc.page_count()
+        good = 0
+        for page_no in range(1, n + 1):
+            if is_text_good_enough(doc.extract_page(page_no)):
+                good += 1
+    finally:
+        doc.close()
+    elapsed = time.perf_counter() - t0
+    return {"pages": n, "good": good, "seconds": elapsed}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="*", type=Path)
+    ap.add_argument("--backends", default=",".join(available_extractors()))
+    ap.add_argument("--max-pages", type=int, default=0, help="0 = all pages")
+    args = ap.parse_args()
+
+    paths = args.paths or sorted((Path(settings.data_dir) / "raw_pdfs").glob("*.pdf"))
+    if not paths:
+        raise SystemExit("No PDFs found")
+    backends = [b for b in args.backends.split(",") if b]
+
+    totals = {b: {"pages": 0, "good": 0, "seconds": 0.0} for b in backends}
+    print(f"{'document':<40} {'backend':<8} {'pages':>6} {'pages/s':>9} {'good %':>7}")
+    for path in paths:
+        for backend in backends:
+            r = bench(path, backend, args.max_pages)
+            for k in totals[backend]:
+                totals[backend][k] += r[k]
+            rate = r["pages"] / r["seconds"] if r["seconds"] else 0.0
+            good = 100 * r["good"] / r["pages"] if r["pages"] else 0.0
+            print(f"{path.name[:40]:<40} {backend:<8} {r['pages']:>6} {rate:>9.1f} {good:>7.1f}")
+
+    print()
+    for backend, t in totals.items():
+        rate = t["pages"] / t["seconds"] if t["seconds"] else 0.0
+        good = 100 * t["good"] / t["pages"] if t["pages"] else 0.0
+        print(f"{'TOTAL':<40} {backend:<8} {t['pages']:>6} {rate:>9.1f} {good:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
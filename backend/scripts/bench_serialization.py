@@ -0,0 +1,134 @@
+"""
+Micro-benchmark of the /search serialization path, without OpenSearch.
+
+For each k, builds synthetic BM25 and kNN `_search` responses and times, per request:
+- parse: response bytes -> SearchHits (stdlib json + field copies vs orjson + parse_hits)
+- render: response body with fused results and, with --include-raw, both raw lists
+  (to_dict + jsonable_encoder + json.dumps vs orjson on the dataclasses)
+- knn body: encoding the kNN request (a 768-d query vector)
+
+    python scripts/bench_serialization.py [--k 8,50,200,1000] [--text-chars 1200] [--include-raw]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from sailrag.opensearch.search import SearchHit, build_knn_body, fuse_hits, parse_hits, to_dict
+from sailrag.serialization import dumps, loads
+
+
+def fake_response(k: int, text_chars: int, rng: random.Random) -> bytes:
+    words = ["port", "starboard", "vessel", "give-way", "stand-on", "light", "signal", "channel"]
+    hits = []
+    for i in range(k):
+        text = " ".join(rng.choice(words) for _ in range(text_chars // 7))[:text_chars]
+        hits.append(
+            {
+                "_index": "sailrag-chunks",
+                "_id": f"doc-{i % 17}-p{i}-c{i % 5}",
+                "_score": rng.random() * 20,
+                "_source": {
+                    "chunk_id": f"doc-{i % 17}-p{i}-c{i % 5}",
+                    "doc_id": f"doc-{i % 17}",
+                    "page_number": i + 1,
+                    "tags": ["colregs", "rules"],
+                    "text": text,
+                    "citations": [{"doc_id": f"doc-{i % 17}", "page_number": i + 1, "chunk_id": f"c{i}"}],
+                },
+            }
+        )
+    return json.dumps({"took": 3, "hits": {"total": {"value": k}, "hits": hits}}).encode()
+
+
+def baseline_parse(body: bytes, source: str) -> list[SearchHit]:
+    data = json.loads(body)
+    hits = []
+    for h in data.get("hits", {}).get("hits", []):
+        src = h.get("_source", {})
+        hits.append(
+            SearchHit(
+                chunk_id=src.get("chunk_id", h.get("_id")),
+                doc_id=src.get("doc_id", ""),
+                page_number=int(src.get("page_number", 0) or 0),
+                tags=list(src.get("tags") or []),
+                text=src.get("text", ""),
+                score=float(h.get("_score") or 0.0),
+                source=source,
+                citations=list(src.get("citations") or []),
+            )
+        )
+    return hits
+
+
+def baseline_render(k: int, fused, bm25, knn, include_raw: bool) -> bytes:
+    resp = {"query": "q", "k": k, "results": [to_dict(h) for h in fused]}
+    if include_raw:
+        resp["bm25_raw"] = [to_dict(h) for h in bm25]
+        resp["knn_raw"] = [to_dict(h) for h in knn]
+    return json.dumps(jsonable_encoder(resp), separators=(",", ":")).encode()
+
+
+def fast_render(k: int, fused, bm25, knn, include_raw: bool) -> bytes:
+    resp = {"query": "q", "k": k, "results": fused}
+    if include_raw:
+        resp["bm25_raw"] = bm25
+        resp["knn_raw"] = knn
+    return dumps(resp)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--k", default="8,50,200,1000")
+    ap.add_argument("--text-chars", type=int, default=1200)
+    ap.add_argument("--include-raw", action="store_true")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    vector = [rng.uniform(-1, 1) for _ in range(768)]
+
+    print(f"{'k':>6} {'stage':<8} {'baseline ms':>12} {'fast ms':>9} {'speedup':>8}")
+    for k in [int(x) for x in args.k.split(",") if x]:
+        bm25_body = fake_response(k, args.text_chars, rng)
+        knn_body = fake_response(k, args.text_chars, rng)
+        bm25, knn = parse_hits(loads(bm25_body), "bm25"), parse_hits(loads(knn_body), "knn")
+        fused = fuse_hits(bm25, knn)[:k]
+
+        # Both paths must produce the same JSON document
+        assert loads(baseline_render(k, fused, bm25, knn, True)) == loads(fast_render(k, fused, bm25, knn, True))
+
+        stages = {
+            "parse": (
+                lambda: (baseline_parse(bm25_body, "bm25"), baseline_parse(knn_body, "knn")),
+                lambda: (parse_hits(loads(bm25_body), "bm25"), parse_hits(loads(knn_body), "knn")),
+            ),
+            "render": (
+                lambda: baseline_render(k, fused, bm25, knn, args.include_raw),
+                lambda: fast_render(k, fused, bm25, knn, args.include_raw),
+            ),
+            "knn body": (
+                lambda: json.dumps(build_knn_body(vector, k)),
+                lambda: dumps(build_knn_body(vector, k)),
+            ),
+        }
+        for stage, (baseline, fast) in stages.items():
+            b, f = timed(baseline, args.repeat), timed(fast, args.repeat)
+            print(f"{k:>6} {stage:<8} {b:>12.3f} {f:>9.3f} {b / f:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Recall of coarse-to-fine kNN against flat kNN.
+
+For every evaluation question, runs flat kNN over all chunks and coarse-to-fine kNN
+for each (level, fan-out) configuration, and reports:
+- recall@k vs flat: share of the flat top-k chunks also returned by the coarse search
+- evidence@k: share of questions whose expected (doc_id, page_number) is in the top-k
+  (only for questions that carry one)
+- mean latency and regions searched
+
+The dataset is JSONL, one {"question": ..., "doc_id": ..., "page_number": ...} per
+line (default: DATA_DIR/eval/questions.jsonl); --from-querylog N uses the N most
+frequent logged queries instead (no evidence labels).
+
+    python scripts/eval_coarse.py [--dataset path] [--k 10] [--configs page:10,page:50,doc:3]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from sailrag.embeddings.ollama import embed_texts_ollama
+from sailrag.opensearch.collections import search_target
+from sailrag.opensearch.search import SearchHit, knn_search
+from sailrag.opensearch.summaries import LEVELS, coarse_to_fine_knn
+from sailrag.querylog.log import top_queries
+from sailrag.settings import settings
+
+
+def load_questions(args: argparse.Namespace) -> list[dict]:
+    if args.from_querylog:
+        path = Path(settings.data_dir) / "querylog" / "queries.jsonl"
+        return [{"question": q.query} for q in top_queries(path, args.from_querylog)]
+    path = args.dataset or Path(settings.data_dir) / "eval" / "questions.jsonl"
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(ln) for ln in f if ln.strip()]
+
+
+def has_evidence(hits: list[SearchHit], q: dict) -> bool:
+    want = (q.get("doc_id"), int(q.get("page_number") or 0))
+    for h in hits:
+        if (h.doc_id, h.page_number) == want:
+            return True
+        if any((c.get("doc_id"), c.get("page_number")) == want for c in h.citations):
+            return True
+    return False
+
+
+async def run(args: argparse.Namespace) -> None:
+    questions = load_questions(args)
+    if not questions:
+        raise SystemExit("No questions")
+    configs = []
+    for spec in args.configs.split(","):
+        level, fan_out = spec.split(":")
+        if level not in LEVELS:
+            raise SystemExit(f"Unknown level {level!r} (expected {LEVELS})")
+        configs.append((level, int(fan_out)))
+    target = search_target(settings.opensearch_index, args.collections.split(",") if args.collections else None)
+
+    texts = [q["question"] for q in questions]
+    vectors: list[list[float]] = []
+    for i in range(0, len(texts), 32):
+        vectors += await embed_texts_ollama(settings.ollama_url, settings.ollama_embed_model, texts[i : i + 32])
+
+    labelled = [i for i, q in enumerate(questions) if q.get("doc_id")]
+    rows = {"flat": {"recall": 0.0, "evidence": 0, "ms": 0.0, "regions": 0}}
+    rows.update({f"{lvl}:{n}": {"recall": 0.0, "evidence": 0, "ms": 0.0, "regions": 0} for lvl, n in configs})
+
+    for i, (q, vec) in enumerate(zip(questions, vectors)):
+        t0 = time.perf_counter()
+        flat = await knn_search(settings.opensearch_url, target, vec, k=args.k)
+        rows["flat"]["ms"] += 1000 * (time.perf_counter() - t0)
+        rows["flat"]["recall"] += 1.0
+        rows["flat"]["evidence"] += i in labelled and has_evidence(flat, q)
+        flat_ids = {h.chunk_id for h in flat}
+
+        for level, fan_out in configs:
+            row = rows[f"{level}:{fan_out}"]
+            t0 = time.perf_counter()
+            hits, regions = await coarse_to_fine_knn(
+                settings.opensearch_url, settings.opensearch_index, target, vec, args.k, level, fan_out
+            )
+            row["ms"] += 1000 * (time.perf_counter() - t0)
+            row["regions"] += regions
+            row["recall"] += len(flat_ids & {h.chunk_id for h in hits}) / len(flat_ids) if flat_ids else 1.0
+            row["evidence"] += i in labelled and has_evidence(hits, q)
+
+    n = len(questions)
+    print(f"{n} questions ({len(labelled)} with evidence labels), k={args.k}, target {target}")
+    print(f"{'config':<10} {'recall@k vs flat':>17} {'evidence@k':>11} {'mean ms':>8} {'regions':>8}")
+    for name, r in rows.items():
+        evidence = f"{r['evidence'] / len(labelled):.3f}" if labelled else "-"
+        print(f"{name:<10} {r['recall'] / n:>17.3f} {evidence:>11} {r['ms'] / n:>8.1f} {r['regions'] / n:>8.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset", type=Path)
+    ap.add_argument("--from-querylog", type=int, default=0, metavar="N")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--configs", default="page:10,page:25,page:50,doc:2,doc:5")
+    ap.add_argument("--collections", default="", help="comma-separated (default: all)")
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
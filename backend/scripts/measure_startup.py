@@ -0,0 +1,74 @@
+"""
+Cold-start time and memory of each ASGI entry point.
+
+Each entry point is imported in a fresh interpreter (no bytecode/import state shared),
+repeated a few times; reports median import+app-build time and resident memory.
+
+    python scripts/measure_startup.py [--runs 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = ["sailrag.query_main", "sailrag.ingest_main", "sailrag.main"]
+
+_PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import importlib
+mod = importlib.import_module(sys.argv[1])
+assert mod.app is not None
+elapsed = time.perf_counter() - t0
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for ln in f:
+        if ln.startswith("VmRSS:"):
+            rss_kb = int(ln.split()[1])
+print(json.dumps({
+    "import_s": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted(m for m in ("pypdf", "pdf2image", "pytesseract", "PIL") if m in sys.modules),
+}))
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, module],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "entry_point": f"{module}:app",
+        "import_ms_median": round(1000 * statistics.median(s["import_s"] for s in samples), 1),
+        "rss_mb_median": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "maxrss_mb_median": round(statistics.median(s["maxrss_mb"] for s in samples), 1),
+        "heavy_modules": samples[-1]["heavy_modules"],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'entry point':<28} {'import ms':>10} {'RSS MB':>8} {'maxRSS MB':>10}  heavy modules")
+    for module in ENTRY_POINTS:
+        r = measure(module, args.runs)
+        print(
+            f"{r['entry_point']:<28} {r['import_ms_median']:>10} {r['rss_mb_median']:>8} "
+            f"{r['maxrss_mb_median']:>10}  {','.join(r['heavy_modules']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
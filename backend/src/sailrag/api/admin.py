@@ -0,0 +1,143 @@
+import asyncio
+import secrets
+import threading
+
+from fastapi import APIRouter, Body, Depends, FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from sailrag.profiling.requests import MODES, RequestProfiler, RequestProfilerMiddleware
+from sailrag.profiling.sampler import StackSampler, TracingCapture
+from sailrag.profiling.stacks import collapse
+from sailrag.profiling.watchdog import LoopWatchdog
+from sailrag.settings import settings
+
+
+async def _require_admin(x_admin_token: str = Header("")):
+    if not settings.admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
+
+router = APIRouter(prefix="/admin/profile", tags=["admin"], dependencies=[Depends(_require_admin)])
+
+request_profiler = RequestProfiler()
+loop_watchdog = LoopWatchdog(threshold_s=settings.loop_watchdog_ms / 1000)
+
+_MODE_PATTERN = f"^({'|'.join(MODES)})$"
+
+
+def _render(result: dict, fmt: str):
+    if fmt == "collapsed":
+        return PlainTextResponse(result["collapsed"])
+    return result
+
+
+@router.post("/window")
+async def profile_window(
+    seconds: float = Body(10.0, embed=True, gt=0.0, le=120.0),
+    mode: str = Body("sample", embed=True, pattern=_MODE_PATTERN),
+    interval_ms: float = Body(5.0, embed=True, ge=1.0, le=1000.0),
+    include_idle: bool = Body(False, embed=True),
+    format: str = Body("collapsed", embed=True, pattern="^(collapsed|json)$"),
+):
+    """
+    Profile the event loop thread for `seconds`, across all requests.
+    "sample" snapshots stacks every `interval_ms` (cheap, wall-clock);
+    "trace" runs cProfile (exact, slows every call while it runs).
+    The collapsed output feeds flamegraph.pl / speedscope directly.
+    """
+    if not request_profiler.busy.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Another profile capture is running")
+    try:
+        if mode == "sample":
+            sampler = StackSampler(threading.get_ident(), interval_ms / 1000, skip_idle=not include_idle).start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                counts = sampler.stop()
+            info = sampler.stats()
+        else:
+            capture = TracingCapture().start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                capture.stop()
+            counts = capture.collapsed()
+            info = {}
+    finally:
+        request_profiler.busy.release()
+
+    return _render({"mode": mode, "seconds": seconds, **info, "collapsed": collapse(counts)}, format)
+
+
+@router.post("/request")
+async def arm_request_profile(
+    tag: str = Body(..., embed=True, pattern=r"^[A-Za-z0-9._-]{1,64}$"),
+    mode: str = Body("trace", embed=True, pattern=_MODE_PATTERN),
+    interval_ms: float = Body(1.0, embed=True, ge=0.5, le=1000.0),
+):
+    """
+    Arm a one-shot profile: the next request sent with `X-Profile-Tag: <tag>`
+    is captured end to end. Fetch it with GET /admin/profile/request/<tag>.
+    """
+    armed = request_profiler.arm(tag, mode, interval_ms / 1000)
+    request_profiler.results.pop(tag, None)
+    return {"armed": armed.tag, "mode": armed.mode, "header": "X-Profile-Tag"}
+
+
+@router.get("/request/{tag}")
+async def get_request_profile(tag: str, format: str = "collapsed"):
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=422, detail="format must be 'collapsed' or 'json'")
+    result = request_profiler.results.get(tag)
+    if result is None:
+        if tag in request_profiler.armed:
+            raise HTTPException(status_code=409, detail=f"Profile {tag!r} is armed; no tagged request yet")
+        raise HTTPException(status_code=404, detail=f"No profile {tag!r}")
+    return _render(result, format)
+
+
+@router.get("/loop")
+async def loop_status():
+    """
+    Event-loop lag and the stacks captured while the loop was blocked.
+    """
+    return {**loop_watchdog.stats(), "events": list(loop_watchdog.events)}
+
+
+@router.post("/loop")
+async def configure_loop_watchdog(threshold_ms: float = Body(..., embed=True, ge=0.0, le=60_000.0)):
+    """
+    Start (or retune) the loop watchdog; 0 stops it. 422 for a threshold at or
+    below the watchdog's heartbeat interval.
+    """
+    try:
+        loop_watchdog.check_threshold(threshold_ms / 1000)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    loop_watchdog.threshold_s = threshold_ms / 1000
+    if threshold_ms > 0:
+        loop_watchdog.start()
+    else:
+        await loop_watchdog.stop()
+    return loop_watchdog.stats()
+
+
+async def start_watchdog() -> None:
+    if loop_watchdog.threshold_s > 0:
+        loop_watchdog.start()
+
+
+async def stop_watchdog() -> None:
+    await loop_watchdog.stop()
+
+
+def install_profiling(app: FastAPI) -> None:
+    """
+    Mount /admin/profile/* and the tagged-request middleware when ADMIN_TOKEN is
+    set. Not installed otherwise, so a default deployment carries no profiling
+    code path. The app's lifespan runs the loop watchdog (start_watchdog /
+    stop_watchdog) when LOOP_WATCHDOG_MS > 0.
+    """
+    if settings.admin_token:
+        app.include_router(router)
+        app.add_middleware(RequestProfilerMiddleware, profiler=request_profiler)
@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+from fastapi import APIRouter
+
+from sailrag.api.knn import knn_warmer
+from sailrag.api.pools import embed_pool, llm_pool
+from sailrag.opensearch.knn import knn_state
+from sailrag.settings import settings
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/healthz")
+async def healthz():
+    """
+    Health endpoint checks basic reachability of dependencies.
+    This is not a full readiness check, but good enough for compose gating.
+    Ollama is ok when each pool (embeddings, generation) has a healthy replica.
+    A tripped k-NN circuit breaker makes OpenSearch degraded; "knn" also shows
+    graph memory, cache hit rate and whether memory is near the limit.
+    """
+    async with httpx.AsyncClient(timeout=3.0) as client:
+        os_ok = False
+
+        try:
+            r = await client.get(f"{settings.opensearch_url}")
+            os_ok = r.status_code == 200
+        except Exception:
+            os_ok = False
+
+    knn, _, _ = await asyncio.gather(
+        knn_warmer.refresh_stats() if os_ok else asyncio.sleep(0),
+        embed_pool.check_health(),
+        llm_pool.check_health(),
+    )
+    knn_ok = knn_state(knn, knn_warmer.memory_warn_pct) != "breaker_tripped"
+    ollama_ok = embed_pool.healthy and llm_pool.healthy
+
+    return {
+        "status": "ok" if (os_ok and knn_ok and ollama_ok) else "degraded",
+        "opensearch_ok": os_ok,
+        "ollama_ok": ollama_ok,
+        "knn": {"state": knn_state(knn, knn_warmer.memory_warn_pct), **(knn or {})},
+        "ollama": {
+            "embed": [{"url": e.url, "healthy": e.healthy} for e in embed_pool.endpoints],
+            "llm": [{"url": e.url, "healthy": e.healthy} for e in llm_pool.endpoints],
+        },
+        "env": settings.app_env,
+    }
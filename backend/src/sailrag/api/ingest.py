@@ -0,0 +1,532 @@
+import time
+from pathlib import Path
+from typing import Callable
+
+from fastapi import APIRouter, Body, HTTPException
+
+from sailrag.api.knn import knn_warmer
+from sailrag.api.pools import embed_many, embed_texts
+from sailrag.chunking.chunker import chunk_text_tokens, chunk_text_windowed, looks_like_table_of_contents
+from sailrag.chunking.dedup import IndexedFingerprint, band_keys, dedup_chunks, match_indexed, parse_simhash
+from sailrag.chunking.models import Chunk, Citation
+from sailrag.chunking.tokens import Tokenizer, get_tokenizer
+from sailrag.embeddings.vectors import l2_normalize
+from sailrag.ingest.boilerplate import RepeatedLineDetector
+from sailrag.ingest.cache import PageTextCache, file_sha256, page_cache_key
+from sailrag.ingest.models import DocumentPreview, DocumentPreviewSummary, PageText
+from sailrag.ingest.ocr import ocr_pdf_page, ocr_pdf_page_adaptive, tesseract_version
+from sailrag.ingest.pdf_loader import TextExtractor, is_text_good_enough, open_extractor, _quality
+from sailrag.opensearch.cache import bump_index_generation
+from sailrag.opensearch.client import bulk_append_citations, bulk_index
+from sailrag.opensearch.collections import DEFAULT_COLLECTION, collection_index, shards_for_collection
+from sailrag.opensearch.index import ensure_index
+from sailrag.opensearch.search import find_by_simhash_bands
+from sailrag.opensearch.summaries import index_summaries, summary_index
+from sailrag.settings import settings
+
+router = APIRouter(tags=["ingest"])
+
+page_cache = (
+    PageTextCache(
+        Path(settings.data_dir) / "cache" / "pages",
+        max_bytes=settings.page_cache_max_mb * 1024 * 1024,
+    )
+    if settings.page_cache_enabled
+    else None
+)
+
+OCR_DPI = 200
+
+
+def _page_text(page_number: int, method: str, text: str) -> PageText:
+    q = _quality(text)
+    return PageText(
+        page_number=page_number,
+        method=method,
+        text=text,
+        char_count=q.char_count,
+        non_whitespace_ratio=q.non_whitespace_ratio,
+    )
+
+
+def _extract_page(pdf_path: Path, extractor: TextExtractor, file_hash: str, page_no: int) -> PageText:
+    """
+    Text layer first, OCR fallback; both results go through the persistent page cache.
+    """
+    text_key = page_cache_key(file_hash, page_no, f"text:{extractor.name}")
+    extracted = page_cache.get(text_key) if page_cache else None
+    if extracted is None:
+        extracted = _page_text(page_no, "text", extractor.extract_page(page_no))
+        if page_cache:
+            page_cache.put(text_key, extracted)
+
+    if is_text_good_enough(extracted.text):
+        return extracted
+
+    if settings.ocr_adaptive:
+        # The method tag changes whenever the classifier's DPI/psm choice does
+        ocr_key = page_cache_key(
+            file_hash, page_no, "ocr-adaptive-2", settings.ocr_classify_dpi, tesseract_version()
+        )
+    else:
+        ocr_key = page_cache_key(file_hash, page_no, "ocr", OCR_DPI, tesseract_version())
+    ocr = page_cache.get(ocr_key) if page_cache else None
+    if ocr is None:
+        ocr = _ocr_page(pdf_path, page_no)
+        if page_cache:
+            page_cache.put(ocr_key, ocr)
+
+    if ocr.method == "blank" and extracted.text.strip():
+        # Keep whatever the text layer had rather than nothing
+        return extracted
+    return ocr
+
+
+def _ocr_page(pdf_path: Path, page_no: int) -> PageText:
+    if not settings.ocr_adaptive:
+        return _page_text(page_no, "ocr", ocr_pdf_page(pdf_path, page_no, dpi=OCR_DPI))
+
+    text, pc = ocr_pdf_page_adaptive(pdf_path, page_no, classify_dpi=settings.ocr_classify_dpi)
+    if pc is None or pc.kind == "blank":
+        return _page_text(page_no, "blank", "").model_copy(update={"page_class": "blank"})
+    return _page_text(page_no, "ocr", text).model_copy(
+        update={"page_class": pc.kind, "ocr_dpi": pc.dpi, "ocr_psm": pc.psm}
+    )
+
+
+@router.get("/ingest/list")
+async def ingest_list():
+    base = Path(settings.data_dir) / "raw_pdfs"
+    if not base.exists():
+        return {"base": str(base), "pdfs": []}
+
+    pdfs = sorted([p.name for p in base.glob("*.pdf")])
+    return {"base": str(base), "pdfs": pdfs}
+
+
+@router.post("/ingest/preview", response_model=DocumentPreview)
+async def ingest_preview(
+    path: str = Body(..., embed=True),
+    max_pages: int = Body(3, embed=True, ge=1, le=20),
+    extractor: str | None = Body(None, embed=True),
+):
+    """
+    Preview document extraction with PAGE-LEVEL adaptive fallback:
+    - for each page in the preview range:
+      - try PDF text extraction (backend: `extractor`, default PDF_EXTRACTOR)
+      - if text quality is weak -> OCR that page (blank pages skipped, DPI/psm chosen per page)
+    - extracted/OCR'd pages are served from the persistent page cache when available
+    """
+    pdf_path = Path(settings.data_dir) / path
+    if not pdf_path.exists():
+        raise HTTPException(status_code=404, detail=f"File not found: {pdf_path}")
+
+    try:
+        doc = open_extractor(pdf_path, extractor or settings.pdf_extractor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        total_pages = doc.page_count()
+
+        preview_pages = min(max_pages, total_pages)
+
+        file_hash = file_sha256(pdf_path)
+
+        pages: list[PageText] = []
+        text_pages = 0
+        ocr_pages = 0
+        blank_pages = 0
+
+        for page_no in range(1, preview_pages + 1):
+            page = _extract_page(pdf_path, doc, file_hash, page_no)
+            if page.method == "text":
+                text_pages += 1
+            elif page.method == "blank":
+                blank_pages += 1
+            else:
+                ocr_pages += 1
+            pages.append(page)
+    finally:
+        doc.close()
+
+    return DocumentPreview(
+        path=path,
+        pages_total=total_pages,
+        pages_previewed=len(pages),
+        summary=DocumentPreviewSummary(
+            text_pages=text_pages, ocr_pages=ocr_pages, blank_pages=blank_pages
+        ),
+        pages=pages,
+    )
+    
+
+
+def _make_splitter(
+    chunking: str,
+    max_chars: int,
+    overlap: int,
+    min_chars: int,
+    max_tokens: int,
+    overlap_tokens: int,
+    min_tokens: int,
+) -> tuple[Callable[[str], list[str]], Tokenizer | None]:
+    """
+    Select the page chunker: "chars" (character budget) or "tokens" (embedding-model token budget).
+    Returns the splitter and, for token mode, the tokenizer used to count tokens.
+    """
+    if chunking == "tokens":
+        if overlap_tokens >= max_tokens:
+            raise HTTPException(status_code=422, detail="overlap_tokens must be < max_tokens")
+        tok = get_tokenizer(settings.tokenizer_path)
+
+        def split(text: str) -> list[str]:
+            return chunk_text_tokens(
+                text,
+                max_tokens=max_tokens,
+                overlap_tokens=overlap_tokens,
+                min_tokens=min_tokens,
+                tokenizer=tok,
+            )
+
+        return split, tok
+
+    if overlap >= max_chars:
+        raise HTTPException(status_code=422, detail="overlap must be < max_chars")
+
+    def split(text: str) -> list[str]:
+        return chunk_text_windowed(text, max_chars=max_chars, overlap=overlap, min_chars=min_chars)
+
+    return split, None
+
+
+def _strip_boilerplate(pages: list[PageText]) -> list[PageText]:
+    """
+    Document-level pass: drop running headers/footers/page numbers repeated across pages.
+    Two passes over the pages, so they are all held in memory (ingest has them all
+    anyway); only the detector's own state is bounded.
+    """
+    detector = RepeatedLineDetector()
+    for page in pages:
+        detector.observe(page.text)
+    return [page.model_copy(update={"text": detector.strip(page.text, i)}) for i, page in enumerate(pages)]
+
+
+def _build_chunks(
+    pages: list[PageText],
+    doc_id: str,
+    split: Callable[[str], list[str]],
+    tokenizer: Tokenizer | None = None,
+) -> list[Chunk]:
+    """
+    Chunk every page and tag TOC pages.
+    """
+    chunks: list[Chunk] = []
+    for page in pages:
+        is_toc = looks_like_table_of_contents(page.text)
+        tags = ["toc"] if is_toc else []
+
+        for idx, ch in enumerate(split(page.text), start=1):
+            chunks.append(
+                Chunk(
+                    doc_id=doc_id,
+                    page_number=page.page_number,
+                    chunk_id=f"{doc_id}-p{page.page_number}-c{idx}",
+                    text=ch,
+                    char_count=len(ch),
+                    token_count=len(tokenizer.spans(ch)) if tokenizer else None,
+                    tags=tags,
+                )
+            )
+    return chunks
+
+
+@router.post("/chunk/preview")
+async def chunk_preview(
+    path: str = Body(..., embed=True),
+    max_pages: int = Body(3, embed=True, ge=1, le=30),
+    max_chars: int = Body(900, embed=True, ge=200, le=3000),
+    overlap: int = Body(150, embed=True, ge=0, le=500),
+    min_chars: int = Body(120, embed=True, ge=20, le=500),
+    chunking: str = Body("chars", embed=True, pattern="^(chars|tokens)$"),
+    max_tokens: int = Body(512, embed=True, ge=32, le=2048),
+    overlap_tokens: int = Body(64, embed=True, ge=0, le=512),
+    min_tokens: int = Body(32, embed=True, ge=1, le=512),
+    strip_boilerplate: bool = Body(True, embed=True),
+    extractor: str | None = Body(None, embed=True),
+):
+    """
+    Run ingestion preview + chunking preview (no indexing yet).
+    Returns chunk examples for debugging.
+    """
+    # reuse the existing ingestion preview logic by calling the function directly
+    preview = await ingest_preview(path=path, max_pages=max_pages, extractor=extractor)
+
+    # derive doc_id from filename
+    doc_id = Path(path).name.replace(".pdf", "")
+
+    split, tok = _make_splitter(
+        chunking, max_chars, overlap, min_chars, max_tokens, overlap_tokens, min_tokens
+    )
+    pages = _strip_boilerplate(preview.pages) if strip_boilerplate else preview.pages
+    chunks = _build_chunks(pages, doc_id, split, tok)
+
+    non_toc = [c for c in chunks if "toc" not in c.tags]
+
+    return {
+        "doc_id": doc_id,
+        "pages_previewed": preview.pages_previewed,
+        "chunking": chunking,
+        "tokenizer": tok.name if tok else None,
+        "chunks_total": len(chunks),
+        "chunks_non_toc_total": len(non_toc),
+        "chunks": [c.model_dump() for c in non_toc[:3]],  # show first 3 non-TOC chunks
+    }
+
+
+@router.post("/embed/preview")
+async def embed_preview(
+    text: str = Body(..., embed=True),
+):
+    vec = (await embed_texts([text]))[0]
+    return {"dim": len(vec), "vector_head": vec[:8]}
+
+
+@router.post("/embed/chunks_preview")
+async def embed_chunks_preview(
+    path: str = Body(..., embed=True),
+    max_pages: int = Body(3, embed=True, ge=1, le=30),
+    max_chars: int = Body(900, embed=True, ge=200, le=3000),
+    overlap: int = Body(150, embed=True, ge=0, le=500),
+    min_chars: int = Body(120, embed=True, ge=20, le=500),
+    max_chunks: int = Body(12, embed=True, ge=1, le=100),
+    strip_boilerplate: bool = Body(True, embed=True),
+    extractor: str | None = Body(None, embed=True),
+):
+    """
+    Debug endpoint: ingest -> chunk -> (filter TOC) -> embed first N chunks.
+    No indexing yet.
+    """
+    t0 = time.time()
+
+    # 1) Ingest preview (page-level adaptive)
+    preview = await ingest_preview(path=path, max_pages=max_pages, extractor=extractor)
+
+    doc_id = Path(path).name.replace(".pdf", "")
+
+    # 2) Chunk preview and TOC filtering (reuse your logic)
+    split, _ = _make_splitter("chars", max_chars, overlap, min_chars, 0, 0, 0)
+    pages = _strip_boilerplate(preview.pages) if strip_boilerplate else preview.pages
+    chunks = _build_chunks(pages, doc_id, split)
+
+    non_toc = [c for c in chunks if "toc" not in c.tags]
+    to_embed = non_toc[:max_chunks]
+
+    # 3) Embeddings (batched, spread over the embedding replicas)
+    vectors_head = [vec[:8] for vec in await embed_many([c.text for c in to_embed])]
+
+    elapsed_ms = int((time.time() - t0) * 1000)
+
+    return {
+        "doc_id": doc_id,
+        "pages_previewed": preview.pages_previewed,
+        "chunks_total": len(chunks),
+        "chunks_non_toc_total": len(non_toc),
+        "embedded_chunks": len(to_embed),
+        "embedding_dim": 768,  # we can also compute from first vec if you want
+        "elapsed_ms": elapsed_ms,
+        "examples": [
+            {
+                "chunk_id": c.chunk_id,
+                "page_number": c.page_number,
+                "char_count": c.char_count,
+                "vector_head": vectors_head[i],
+            }
+            for i, c in enumerate(to_embed)
+        ],
+    }
+
+
+def _resolve_collection(collection: str | None, shards: int | None, expected_chunks: int | None) -> tuple[str, int]:
+    """
+    (index name, primary shards) for a collection; 422 on an invalid name.
+    """
+    try:
+        index_name = collection_index(settings.opensearch_index, collection)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if shards is None:
+        shards = shards_for_collection(
+            expected_chunks or 0,
+            settings.collection_chunks_per_shard,
+            settings.collection_max_shards,
+        )
+    return index_name, shards
+
+
+@router.post("/index/create")
+async def index_create(
+    collection: str | None = Body(None, embed=True),
+    shards: int | None = Body(None, embed=True, ge=1, le=64),
+    expected_chunks: int | None = Body(None, embed=True, ge=0),
+):
+    """
+    Create the index of a collection (default: the base index). Shards come from
+    `shards`, or are sized from `expected_chunks`.
+    """
+    index_name, shards = _resolve_collection(collection, shards, expected_chunks)
+    res = await ensure_index(
+        opensearch_url=settings.opensearch_url,
+        index_name=index_name,
+        embedding_dim=768,
+        shards=shards,
+    )
+    if res["status"] == "exists":
+        knn_warmer.schedule(index_name)
+    return res
+
+
+async def _dedup_against_index(
+    chunks: list[Chunk],
+    max_distance: int,
+    index_name: str,
+) -> tuple[list[Chunk], dict[str, list[Citation]]]:
+    """
+    Collapse near-duplicates within the batch, then against chunks already in the index.
+    """
+    canonical = dedup_chunks(chunks, max_distance=max_distance)
+
+    bands = sorted({b for c in canonical for b in band_keys(parse_simhash(c.simhash))})
+    found = await find_by_simhash_bands(settings.opensearch_url, index_name, bands)
+    indexed = [
+        IndexedFingerprint(
+            id=f["_id"],
+            chunk_id=f.get("chunk_id", f["_id"]),
+            doc_id=f.get("doc_id", ""),
+            simhash=parse_simhash(f["simhash"]),
+            citations=[Citation.model_validate(x) for x in f.get("citations") or []],
+        )
+        for f in found
+    ]
+    return match_indexed(canonical, indexed, max_distance=max_distance)
+
+
+@router.post("/index/ingest")
+async def index_ingest(
+    path: str = Body(..., embed=True),
+    max_pages: int = Body(30, embed=True, ge=1, le=300),
+    max_chars: int = Body(900, embed=True, ge=200, le=3000),
+    overlap: int = Body(150, embed=True, ge=0, le=500),
+    min_chars: int = Body(120, embed=True, ge=20, le=500),
+    chunking: str = Body("chars", embed=True, pattern="^(chars|tokens)$"),
+    max_tokens: int = Body(512, embed=True, ge=32, le=2048),
+    overlap_tokens: int = Body(64, embed=True, ge=0, le=512),
+    min_tokens: int = Body(32, embed=True, ge=1, le=512),
+    dedup: bool = Body(True, embed=True),
+    dedup_max_distance: int = Body(3, embed=True, ge=0, le=3),
+    strip_boilerplate: bool = Body(True, embed=True),
+    extractor: str | None = Body(None, embed=True),
+    collection: str | None = Body(None, embed=True),
+    shards: int | None = Body(None, embed=True, ge=1, le=64),
+    expected_chunks: int | None = Body(None, embed=True, ge=0),
+):
+    """
+    Ingest a PDF into a collection's index (default: the base index). A new
+    collection index is created with `shards` primary shards, or sized from
+    `expected_chunks`.
+    """
+    split, tok = _make_splitter(
+        chunking, max_chars, overlap, min_chars, max_tokens, overlap_tokens, min_tokens
+    )
+    index_name, shards = _resolve_collection(collection, shards, expected_chunks)
+
+    # Ensure index exists
+    index_res = await ensure_index(settings.opensearch_url, index_name, embedding_dim=768, shards=shards)
+    if index_res["status"] == "exists":
+        # An existing index may have gone cold (e.g. OpenSearch restarted since startup)
+        knn_warmer.schedule(index_name)
+
+    preview = await ingest_preview(path=path, max_pages=max_pages, extractor=extractor)
+    doc_id = Path(path).name.replace(".pdf", "")
+
+    # Strip running headers/footers, chunk + filter TOC
+    pages = _strip_boilerplate(preview.pages) if strip_boilerplate else preview.pages
+    chunks = _build_chunks(pages, doc_id, split, tok)
+
+    non_toc = [c for c in chunks if "toc" not in c.tags]
+
+    # Near-duplicate collapse (before embedding, so duplicates cost nothing downstream)
+    to_index = non_toc
+    citation_updates: dict[str, list[Citation]] = {}
+    if dedup:
+        to_index, citation_updates = await _dedup_against_index(non_toc, dedup_max_distance, index_name)
+
+    # Embed (batched, spread over the embedding replicas) + prepare bulk docs
+    bulk_docs: list[dict] = []
+    vectors = await embed_many([c.text for c in to_index])
+    for c, raw in zip(to_index, vectors):
+        vec = l2_normalize(raw)
+        bulk_docs.append(
+            {
+                "id": c.chunk_id,
+                "doc_id": c.doc_id,
+                "chunk_id": c.chunk_id,
+                "page_number": c.page_number,
+                "tags": c.tags,
+                "text": c.text,
+                "embedding": vec,
+            }
+        )
+        if c.simhash:
+            bulk_docs[-1].update(
+                {
+                    "simhash": c.simhash,
+                    "simhash_bands": band_keys(parse_simhash(c.simhash)),
+                    "citations": [x.model_dump() for x in c.citations],
+                }
+            )
+
+    try:
+        bulk_res = await bulk_index(settings.opensearch_url, index_name, bulk_docs)
+        citations_res = await bulk_append_citations(
+            settings.opensearch_url,
+            index_name,
+            {i: [x.model_dump() for x in cs] for i, cs in citation_updates.items()},
+        )
+
+        # Page/document centroids for coarse-to-fine retrieval, over every chunk of the
+        # ingested pages now in the index (including those kept from earlier ingests)
+        pages_touched = sorted({c.page_number for c in non_toc})
+        summaries_res = (
+            await index_summaries(
+                settings.opensearch_url, settings.opensearch_index, index_name, doc_id, pages_touched
+            )
+            if settings.summaries_enabled
+            else {"pages": 0, "doc": False}
+        )
+    finally:
+        # Retrieval cache keys embed the index generation. The writes above return once
+        # searchable (refresh=wait_for), so no query after this bump can still see the
+        # old index and cache it under the new generation. Bumped even if one failed.
+        bump_index_generation()
+
+    # New segments start cold: refresh them into existence and load their graphs
+    # in the background instead of on the first query that reaches them
+    knn_warmer.schedule(index_name, refresh=True)
+    if settings.summaries_enabled:
+        knn_warmer.schedule(summary_index(settings.opensearch_index), refresh=True)
+
+    return {
+        "doc_id": doc_id,
+        "collection": collection or DEFAULT_COLLECTION,
+        "index": index_name,
+        "index_status": index_res["status"],
+        "pages_indexed": preview.pages_previewed,
+        "chunking": chunking,
+        "chunks_total": len(chunks),
+        "chunks_indexed": len(to_index),
+        "chunks_deduplicated": len(non_toc) - len(to_index),
+        "bulk": bulk_res,
+        "citations_merged": citations_res,
+        "summaries": summaries_res,
+    }
@@ -0,0 +1,27 @@
+from sailrag.opensearch.knn import KnnWarmer
+from sailrag.opensearch.summaries import summary_index
+from sailrag.settings import settings
+
+# Every collection index plus the page/document centroid index
+KNN_TARGET = f"{settings.opensearch_index}*,{summary_index(settings.opensearch_index)}*"
+
+# Shared by every router of the process: ingest schedules warm-ups, /healthz and /metrics read its stats
+knn_warmer = KnnWarmer(
+    settings.opensearch_url,
+    KNN_TARGET,
+    interval_s=settings.knn_warmup_interval_s,
+    memory_warn_pct=settings.knn_memory_warn_pct,
+)
+
+
+async def start_knn_warmer(periodic: bool) -> None:
+    """
+    `periodic` (query role): also keep every collection warm at start and every
+    KNN_WARMUP_INTERVAL_S. Otherwise only the warm-ups ingest schedules run.
+    """
+    if settings.knn_warmup_enabled:
+        knn_warmer.start(periodic=periodic)
+
+
+async def stop_knn_warmer() -> None:
+    await knn_warmer.stop()
@@ -0,0 +1,96 @@
+import asyncio
+
+from sailrag.embeddings.ollama import embed_texts_ollama
+from sailrag.llm.ollama import Generation, generate_ollama_result, load_model_ollama
+from sailrag.llm.pool import EndpointPool, parse_urls
+from sailrag.settings import settings
+
+# Shared by every router of the process, so outstanding counts are global
+embed_pool = EndpointPool(
+    "embed",
+    parse_urls(settings.ollama_embed_urls, settings.ollama_url),
+    health_interval_s=settings.ollama_health_interval_s,
+    hedge_min_ms=settings.embed_hedge_min_ms,
+)
+llm_pool = EndpointPool(
+    "llm",
+    parse_urls(settings.ollama_llm_urls, settings.ollama_url),
+    health_interval_s=settings.ollama_health_interval_s,
+)
+
+# Texts per /api/embed call when embedding many (ingest)
+EMBED_BATCH = 32
+
+
+async def embed_texts(texts: list[str], timeout_s: float = 60.0) -> list[list[float]]:
+    """
+    One multi-input embedding call on the least-busy embedding replica
+    (hedged across replicas when EMBED_HEDGE is on).
+    """
+    model = settings.ollama_embed_model
+
+    async def call(url: str) -> list[list[float]]:
+        return await embed_texts_ollama(url, model, texts, timeout_s=timeout_s)
+
+    if settings.embed_hedge:
+        return await embed_pool.hedged(call, model)
+    return await embed_pool.call(call, model)
+
+
+async def embed_many(texts: list[str]) -> list[list[float]]:
+    """
+    Embed any number of texts in batches, spread over all embedding replicas.
+    """
+    limit = asyncio.Semaphore(len(embed_pool) * settings.ollama_num_parallel)
+
+    async def batch(chunk: list[str]) -> list[list[float]]:
+        async with limit:
+            return await embed_pool.call(
+                lambda url: embed_texts_ollama(url, settings.ollama_embed_model, chunk),
+                settings.ollama_embed_model,
+            )
+
+    batches = await asyncio.gather(*(batch(texts[i : i + EMBED_BATCH]) for i in range(0, len(texts), EMBED_BATCH)))
+    return [v for b in batches for v in b]
+
+
+async def generate(
+    prompt: str,
+    timeout_s: float = 120.0,
+    num_predict: int | None = None,
+    context: list[int] | None = None,
+    prefer: str | None = None,
+) -> Generation:
+    """
+    Generation on the least-busy LLM replica. A conversation continued with
+    `context` should pass the replica of its previous turn as `prefer`: Ollama
+    reuses the KV cache of the shared prefix there instead of re-evaluating it.
+    """
+    model = settings.ollama_llm_model
+    return await llm_pool.call(
+        lambda url: generate_ollama_result(
+            url, model, prompt, timeout_s=timeout_s, num_predict=num_predict, context=context
+        ),
+        model,
+        prefer=prefer,
+    )
+
+
+async def load_models() -> None:
+    """
+    Load the embedding and LLM models into memory on every replica.
+    """
+    await asyncio.gather(
+        *(embed_texts_ollama(ep.url, settings.ollama_embed_model, ["warm-up"]) for ep in embed_pool.endpoints),
+        *(load_model_ollama(ep.url, settings.ollama_llm_model) for ep in llm_pool.endpoints),
+    )
+
+
+async def start_pools() -> None:
+    embed_pool.start()
+    llm_pool.start()
+
+
+async def stop_pools() -> None:
+    await embed_pool.stop()
+    await llm_pool.stop()
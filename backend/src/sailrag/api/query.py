@@ -0,0 +1,1079 @@
+import asyncio
+import math
+import time
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+import httpx
+from fastapi import APIRouter, Body, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from sailrag.api.knn import knn_warmer
+from sailrag.api.pools import embed_pool, embed_texts, generate, llm_pool, load_models
+from sailrag.api.responses import FastJSONResponse, FastJSONRoute
+from sailrag.embeddings.batcher import EmbeddingBatcher
+from sailrag.llm.ollama import Generation
+from sailrag.llm.scheduler import PRIORITIES, GenerationScheduler, SchedulerOverloaded
+from sailrag.opensearch.cache import RetrievalCache
+from sailrag.opensearch.collections import list_collections, search_target
+from sailrag.opensearch.models import SearchFilters
+from sailrag.opensearch.search import SearchHit, bm25_search, fuse_hits, hybrid_msearch, knn_search
+from sailrag.opensearch.summaries import coarse_to_fine_knn
+from sailrag.querylog.log import FrequentQuery, QueryLog, top_queries
+from sailrag.querylog.warmup import ActivityTracker, Warmup
+from sailrag.rag.deadline import CHARS_PER_TOKEN, Deadline, GenerationRates, plan_generation
+from sailrag.rag.prompting import build_followup_prompt, build_rag_prompt
+from sailrag.rag.selection import select_adaptive_k
+from sailrag.rag.sessions import Session, SessionStore, Turn, blend_query_vectors
+from sailrag.serialization import dumps
+from sailrag.settings import settings
+
+# Live requests in flight; background warm-up waits for quiet periods
+activity = ActivityTracker()
+
+
+async def _live_request():
+    activity.enter()
+    try:
+        yield
+    finally:
+        activity.exit()
+
+
+# Bodies parsed and responses rendered with orjson; handlers return FastJSONResponse
+# with SearchHit dataclasses as-is (no to_dict / jsonable_encoder pass)
+router = APIRouter(
+    tags=["query"],
+    dependencies=[Depends(_live_request)],
+    route_class=FastJSONRoute,
+    default_response_class=FastJSONResponse,
+)
+
+# Coalesces concurrent query embeddings into multi-input calls
+query_embedder = EmbeddingBatcher(
+    embed_texts,
+    window_ms=settings.embed_batch_window_ms,
+    max_batch=settings.embed_batch_max_size,
+    cache_size=settings.query_embedding_cache_size,
+)
+
+retrieval_cache = RetrievalCache(
+    max_entries=settings.retrieval_cache_max_entries,
+    ttl_s=settings.retrieval_cache_ttl_s,
+)
+
+
+query_log = (
+    QueryLog(
+        Path(settings.data_dir) / "querylog" / "queries.jsonl",
+        sample_rate=settings.query_log_sample_rate,
+        max_bytes=settings.query_log_max_mb << 20,
+    )
+    if settings.query_log_enabled
+    else None
+)
+
+
+def _log_query(endpoint: str, query: str, params: dict, timings_ms: dict, **extra) -> None:
+    if query_log is not None:
+        query_log.record(endpoint, query, params, timings_ms, **extra)
+
+
+def _cache_bypassed(no_cache: bool, cache_control: str | None) -> bool:
+    cc = (cache_control or "").lower()
+    return no_cache or "no-cache" in cc or "no-store" in cc
+
+
+def _search_target(collections: list[str] | None) -> str:
+    """
+    Index expression for the requested collections (all collections when omitted).
+    """
+    try:
+        return search_target(settings.opensearch_index, collections)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _coarse_spec(coarse: str | None, fan_out: int | None) -> tuple[str, int] | None:
+    """
+    (level, fan-out) of coarse-to-fine kNN, from the request or the settings; None = flat kNN.
+    """
+    level = coarse or settings.coarse_level
+    if level == "off":
+        return None
+    if level not in ("page", "doc"):
+        raise HTTPException(status_code=422, detail=f"Invalid coarse level {level!r} (off, page or doc)")
+    default = settings.coarse_page_fan_out if level == "page" else settings.coarse_doc_fan_out
+    return level, fan_out or default
+
+
+def _coarse_params(spec: tuple[str, int] | None) -> dict:
+    """
+    Query-log params of a resolved coarse spec, so warm-ups replay the same path.
+    """
+    return {"coarse": spec[0], "fan_out": spec[1]} if spec else {"coarse": "off", "fan_out": None}
+
+
+# Per-stage caps (seconds); a request deadline can only shorten them
+EMBED_TIMEOUT_S = 60.0
+BM25_TIMEOUT_S = 20.0
+KNN_TIMEOUT_S = 30.0
+
+_TIMEOUTS = (asyncio.TimeoutError, httpx.TimeoutException)
+
+
+def _stage_timeout(deadline: Deadline | None, cap_s: float) -> float:
+    return deadline.timeout(cap_s) if deadline else cap_s
+
+
+def _failure(e: BaseException) -> str:
+    return "timeout" if isinstance(e, _TIMEOUTS) else type(e).__name__
+
+
+async def _retrieve(
+    query: str,
+    k: int,
+    use_cache: bool = True,
+    filters: SearchFilters | None = None,
+    index: str | None = None,
+    deadline: Deadline | None = None,
+    degradations: list[dict] | None = None,
+    coarse: tuple[str, int] | None = None,
+) -> tuple[list[SearchHit], list[SearchHit], bool]:
+    """
+    Raw BM25 + kNN hits for a query over `index` (default: every collection), served
+    from the retrieval cache when possible. A bypassed lookup still refreshes the
+    cached entry. Returns (bm25_hits, knn_hits, cached).
+
+    BM25 runs concurrently with embedding + kNN, all bounded by `deadline`. When a
+    `degradations` list is given, a side that times out or fails is dropped instead
+    of failing the request (recorded there, and the partial result isn't cached).
+    With `coarse` = (level, fan_out), kNN only searches the chunks of the top pages/documents.
+    """
+    if filters is not None and filters.is_empty():
+        filters = None
+    index = index or _search_target(None)
+
+    fkey = filters.cache_key() if filters else ()
+    key = RetrievalCache.key(index, query, k, fkey + (("coarse", *coarse),) if coarse else fkey)
+    if use_cache:
+        entry = retrieval_cache.get(key)
+        if entry is not None:
+            return entry.bm25_hits, entry.knn_hits, True
+
+    async def bm25() -> list[SearchHit]:
+        return await bm25_search(
+            settings.opensearch_url, index, query=query, k=k, filters=filters,
+            timeout_s=_stage_timeout(deadline, BM25_TIMEOUT_S),
+        )
+
+    async def knn() -> list[SearchHit]:
+        qvec = await asyncio.wait_for(query_embedder.embed(query), _stage_timeout(deadline, EMBED_TIMEOUT_S))
+        if coarse:
+            hits, _ = await coarse_to_fine_knn(
+                settings.opensearch_url, settings.opensearch_index, index, qvec, k, *coarse, filters=filters,
+                timeout_s=_stage_timeout(deadline, KNN_TIMEOUT_S),
+            )
+            return hits
+        return await knn_search(
+            settings.opensearch_url, index, query_vector=qvec, k=k, filters=filters,
+            timeout_s=_stage_timeout(deadline, KNN_TIMEOUT_S),
+        )
+
+    async def bounded(coro) -> list[SearchHit]:
+        # httpx timeouts are per network operation; this bounds the whole stage
+        return await asyncio.wait_for(coro, deadline.remaining_s()) if deadline else await coro
+
+    bm25_res, knn_res = await asyncio.gather(bounded(bm25()), bounded(knn()), return_exceptions=True)
+
+    for res in (bm25_res, knn_res):
+        if isinstance(res, httpx.HTTPStatusError) and res.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"Unknown collection index in {index!r}")
+        if isinstance(res, BaseException) and not isinstance(res, Exception):
+            raise res  # cancellation
+
+    if isinstance(bm25_res, Exception) and isinstance(knn_res, Exception):
+        if degradations is not None and isinstance(bm25_res, _TIMEOUTS) and isinstance(knn_res, _TIMEOUTS):
+            raise HTTPException(status_code=504, detail="Retrieval exceeded the request deadline")
+        raise bm25_res
+    if degradations is None:
+        for res in (bm25_res, knn_res):
+            if isinstance(res, Exception):
+                raise res
+
+    if isinstance(knn_res, Exception):
+        degradations.append({"type": "bm25_only", "reason": f"embedding/kNN {_failure(knn_res)}"})
+        return bm25_res, [], False
+    if isinstance(bm25_res, Exception):
+        degradations.append({"type": "knn_only", "reason": f"BM25 {_failure(bm25_res)}"})
+        return [], knn_res, False
+
+    retrieval_cache.put(key, bm25_res, knn_res)
+    return bm25_res, knn_res, False
+
+
+@router.post("/search")
+async def search(
+    query: str = Body(..., embed=True),
+    k: int = Body(8, embed=True, ge=1, le=50),
+    w_bm25: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    w_knn: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    include_raw: bool = Body(False, embed=True),
+    no_cache: bool = Body(False, embed=True),
+    cache_control: str | None = Header(None),
+    filters: SearchFilters | None = Body(None, embed=True),
+    collections: list[str] | None = Body(None, embed=True),
+    deadline_ms: int | None = Body(None, embed=True, ge=50, le=600_000),
+    coarse: str | None = Body(None, embed=True, pattern="^(off|page|doc)$"),
+    fan_out: int | None = Body(None, embed=True, ge=1, le=1000),
+):
+    """
+    Hybrid retrieval over the named collections (default: all):
+    - BM25 (lexical) over 'text'
+    - kNN (semantic) over 'embedding'
+    - weighted fusion of normalized scores
+    Raw BM25/kNN lists are cached per (query, k); weights are applied on every request.
+    Within `deadline_ms` (default SEARCH_DEADLINE_S), a slow side is dropped and
+    listed in "degradations". `coarse` ("page"/"doc", default COARSE_LEVEL) restricts
+    kNN to the chunks of the `fan_out` pages/documents closest to the query.
+    """
+    t0 = time.perf_counter()
+    deadline = Deadline(deadline_ms / 1000 if deadline_ms else settings.search_deadline_s)
+    index = _search_target(collections)
+    coarse_spec = _coarse_spec(coarse, fan_out)
+    degradations: list[dict] = []
+
+    # 1) Query embedding + retrieve (or cache hit)
+    bm25_hits, knn_hits, cached = await _retrieve(
+        query,
+        k,
+        use_cache=not _cache_bypassed(no_cache, cache_control),
+        filters=filters,
+        index=index,
+        deadline=deadline,
+        degradations=degradations,
+        coarse=coarse_spec,
+    )
+    t_retrieved = time.perf_counter()
+
+    # 2) Fuse
+    fused = fuse_hits(bm25_hits, knn_hits, w_bm25=w_bm25, w_knn=w_knn)[:k]
+
+    resp = {
+        "query": query,
+        "k": k,
+        "weights": {"bm25": w_bm25, "knn": w_knn},
+        "filters": filters.model_dump() if filters else None,
+        "collections": collections,
+        "coarse": {"level": coarse_spec[0], "fan_out": coarse_spec[1]} if coarse_spec else None,
+        "cached": cached,
+        "degradations": degradations,
+        "results": fused,
+    }
+
+    if include_raw:
+        resp["bm25_raw"] = bm25_hits
+        resp["knn_raw"] = knn_hits
+
+    _log_query(
+        "search",
+        query,
+        {
+            "k": k,
+            "w_bm25": w_bm25,
+            "w_knn": w_knn,
+            "filters": resp["filters"],
+            "collections": collections,
+            **_coarse_params(coarse_spec),
+        },
+        {"retrieve": 1000 * (t_retrieved - t0), "total": 1000 * (time.perf_counter() - t0)},
+        cached=cached,
+        degradations=[d["type"] for d in degradations],
+    )
+    return FastJSONResponse(resp)
+
+
+# Generation slots across all LLM replicas
+llm_scheduler = GenerationScheduler(
+    slots=settings.ollama_num_parallel * len(llm_pool),
+    max_queue=settings.llm_max_queue,
+    queue_timeout_s=settings.llm_queue_timeout_s,
+)
+
+generation_rates = GenerationRates(
+    prompt_tokens_per_s=settings.llm_initial_prompt_tokens_per_s,
+    tokens_per_s=settings.llm_initial_tokens_per_s,
+)
+
+
+def _overloaded(e: SchedulerOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after_s))},
+    )
+
+
+def _hit_contexts(fused: list[SearchHit]) -> list[dict]:
+    return [
+        {
+            "doc_id": h.doc_id,
+            "page_number": h.page_number,
+            "chunk_id": h.chunk_id,
+            "text": h.text,
+            "citations": h.citations,
+        }
+        for h in fused
+    ]
+
+
+def _plan_contexts(
+    prompt_for: Callable[[list[dict]], str],
+    contexts: list[dict],
+    deadline: Deadline,
+    priority: str,
+    degradations: list[dict],
+) -> tuple[int, int]:
+    """
+    (contexts to keep, num_predict) so that the prompt built by `prompt_for` and the
+    answer fit into what's left of `deadline` after the expected queue wait.
+    Reductions are recorded in `degradations`.
+    """
+    base_chars = len(prompt_for([]))
+    n_contexts, num_predict, capped = plan_generation(
+        base_chars=base_chars,
+        context_chars=[len(prompt_for([c])) - base_chars for c in contexts],
+        budget_s=deadline.remaining_s() - llm_scheduler.estimate_wait_s(priority),
+        rates=generation_rates,
+        max_tokens=settings.answer_max_tokens,
+        min_tokens=settings.answer_min_tokens,
+    )
+    if n_contexts < len(contexts):
+        degradations.append({"type": "contexts_reduced", "from": len(contexts), "to": n_contexts})
+    if capped:
+        degradations.append({"type": "num_predict_capped", "num_predict": num_predict})
+    return n_contexts, num_predict
+
+
+async def _generate_within(
+    prompt: str,
+    priority: str,
+    deadline: Deadline,
+    num_predict: int,
+    degradations: list[dict],
+    context: list[int] | None = None,
+    prefer: str | None = None,
+) -> Generation:
+    """
+    Generation through the LLM scheduler, bounded by `deadline`: 503 when shed,
+    504 when it runs out of time (queued or generating).
+    """
+    try:
+        async with llm_scheduler.slot(priority, timeout_s=deadline.remaining_s()):
+            generation = await generate(
+                prompt,
+                timeout_s=max(0.1, deadline.remaining_s()),
+                num_predict=num_predict,
+                context=context,
+                prefer=prefer,
+            )
+    except SchedulerOverloaded as e:
+        if e.reason != "deadline":
+            raise _overloaded(e)
+        raise HTTPException(
+            status_code=504,
+            detail={"error": "Request deadline expired while queued for generation", "degradations": degradations},
+        )
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504,
+            detail={"error": "Generation exceeded the request deadline", "degradations": degradations},
+        )
+    generation_rates.observe(
+        generation.prompt_eval_count, generation.prompt_eval_s, generation.eval_count, generation.eval_s
+    )
+    return generation
+
+
+@router.post("/answer")
+async def answer(
+    question: str = Body(..., embed=True),
+    k: int = Body(6, embed=True, ge=1, le=20),
+    w_bm25: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    w_knn: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    no_cache: bool = Body(False, embed=True),
+    cache_control: str | None = Header(None),
+    filters: SearchFilters | None = Body(None, embed=True),
+    adaptive_k: bool = Body(False, embed=True),
+    k_min: int = Body(1, embed=True, ge=1, le=20),
+    min_score: float = Body(0.0, embed=True, ge=0.0, le=1.0),
+    score_mass: float = Body(0.9, embed=True, gt=0.0, le=1.0),
+    gap_ratio: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    priority: str = Body("normal", embed=True, pattern="^(high|normal|low)$"),
+    collections: list[str] | None = Body(None, embed=True),
+    deadline_ms: int | None = Body(None, embed=True, ge=100, le=600_000),
+    coarse: str | None = Body(None, embed=True, pattern="^(off|page|doc)$"),
+    fan_out: int | None = Body(None, embed=True, ge=1, le=1000),
+):
+    """
+    RAG answer over the top-k fused hits. With adaptive_k, k acts as k_max and the
+    number of contexts is chosen per query from the fused score distribution.
+    Generation goes through the LLM scheduler: 503 + Retry-After when overloaded.
+
+    All stages share one deadline (`deadline_ms`, default ANSWER_DEADLINE_S). When it
+    is tight the answer degrades instead of failing: BM25-only (or kNN-only)
+    retrieval, fewer contexts, a capped num_predict. 504 if nothing can be done in
+    time. Applied degradations are listed in "degradations".
+    """
+    t0 = time.perf_counter()
+    deadline = Deadline(deadline_ms / 1000 if deadline_ms else settings.answer_deadline_s)
+    degradations: list[dict] = []
+
+    # Shed load before spending embedding/search work on a request we can't serve
+    try:
+        llm_scheduler.check_admission(priority)
+    except SchedulerOverloaded as e:
+        raise _overloaded(e)
+
+    index = _search_target(collections)
+    coarse_spec = _coarse_spec(coarse, fan_out)
+
+    # 1) Retrieve context (shared with /search, including the retrieval cache),
+    #    leaving most of the budget to generation
+    bm25_hits, knn_hits, cached = await _retrieve(
+        question,
+        k,
+        use_cache=not _cache_bypassed(no_cache, cache_control),
+        filters=filters,
+        index=index,
+        deadline=deadline.portion(settings.retrieval_budget_ratio),
+        degradations=degradations,
+        coarse=coarse_spec,
+    )
+    fused = fuse_hits(bm25_hits, knn_hits, w_bm25=w_bm25, w_knn=w_knn)[:k]
+    t_retrieved = time.perf_counter()
+
+    k_reason = "fixed"
+    if adaptive_k:
+        k_used, k_reason = select_adaptive_k(
+            fused,
+            k_min=k_min,
+            k_max=k,
+            min_score=min_score,
+            score_mass=score_mass,
+            gap_ratio=gap_ratio,
+        )
+        fused = fused[:k_used]
+
+    contexts = _hit_contexts(fused)
+
+    # 2) Fit contexts and answer length into what's left after the expected queue wait
+    n_contexts, num_predict = _plan_contexts(
+        lambda cs: build_rag_prompt(question, cs), contexts, deadline, priority, degradations
+    )
+    contexts = contexts[:n_contexts]
+
+    # 3) Prompt + generate
+    generation = await _generate_within(
+        build_rag_prompt(question, contexts), priority, deadline, num_predict, degradations
+    )
+    t_generated = time.perf_counter()
+
+    _log_query(
+        "answer",
+        question,
+        {
+            "k": k,
+            "w_bm25": w_bm25,
+            "w_knn": w_knn,
+            "filters": filters.model_dump() if filters else None,
+            "collections": collections,
+            "adaptive_k": adaptive_k,
+            "priority": priority,
+            **_coarse_params(coarse_spec),
+        },
+        {
+            "retrieve": 1000 * (t_retrieved - t0),
+            "generate": 1000 * (t_generated - t_retrieved),
+            "total": 1000 * (t_generated - t0),
+        },
+        cached=cached,
+        k_used=len(contexts),
+        degradations=[d["type"] for d in degradations],
+    )
+
+    return FastJSONResponse(
+        {
+            "question": question,
+            "k": k,
+            "weights": {"bm25": w_bm25, "knn": w_knn},
+            "retrieval_cached": cached,
+            "k_used": len(contexts),
+            "k_reason": k_reason,
+            "deadline_ms": round(1000 * deadline.budget_s),
+            "degradations": degradations,
+            "answer": generation.response.strip(),
+            "citations": contexts,
+        }
+    )
+
+
+# Conversations: per-session hits, query vector and Ollama context, bounded in memory
+sessions = SessionStore(
+    max_sessions=settings.session_max_count,
+    max_bytes=settings.session_max_mb << 20,
+    ttl_s=settings.session_ttl_s,
+)
+
+# Answer length assumed when deciding whether a follow-up still fits the session
+# context and ANSWER_MAX_TOKENS doesn't bound it
+SESSION_ANSWER_TOKENS = 512
+# Earlier turns carried into a rebuilt prompt, so the follow-up keeps its conversation
+SESSION_HISTORY_TOKENS = 1024
+
+
+def _get_session(session_id: str) -> Session:
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session {session_id!r}")
+    return session
+
+
+@router.post("/sessions")
+async def session_create(
+    k: int = Body(6, embed=True, ge=1, le=20),
+    k_followup: int = Body(3, embed=True, ge=1, le=20),
+    w_bm25: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    w_knn: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    filters: SearchFilters | None = Body(None, embed=True),
+    collections: list[str] | None = Body(None, embed=True),
+):
+    """
+    Open a conversation for POST /sessions/{id}/answer. Retrieval settings are
+    fixed for all of its turns: `k` contexts for the first one, up to `k_followup`
+    new ones per follow-up.
+    """
+    session = sessions.create(
+        index=_search_target(collections),
+        filters=None if filters is None or filters.is_empty() else filters,
+        w_bm25=w_bm25,
+        w_knn=w_knn,
+        k=k,
+        k_followup=k_followup,
+    )
+    return session.info()
+
+
+async def _retrieve_followup(
+    session: Session,
+    question: str,
+    deadline: Deadline,
+    degradations: list[dict],
+) -> tuple[list[SearchHit], list[float] | None]:
+    """
+    Incremental retrieval for a follow-up: the top k_followup chunks for BM25 over
+    the previous and the new question and for kNN with the conversation's query
+    vector blended with the new one, minus the chunks the model has already seen.
+    A follow-up on the same topic thus adds few or no contexts. Returns (new fused
+    hits, blended query vector or None).
+
+    Not cached (results depend on the session). A failed side is dropped; when
+    both fail the turn goes on with the existing context ("retrieval_skipped").
+    """
+    k = session.k_followup
+    blended: list[float] | None = None
+
+    async def bm25() -> list[SearchHit]:
+        return await bm25_search(
+            settings.opensearch_url, session.index, query=f"{session.turns[-1].question} {question}", k=k,
+            filters=session.filters, timeout_s=_stage_timeout(deadline, BM25_TIMEOUT_S),
+        )
+
+    async def knn() -> list[SearchHit]:
+        nonlocal blended
+        qvec = await asyncio.wait_for(
+            query_embedder.embed(question), _stage_timeout(deadline, EMBED_TIMEOUT_S)
+        )
+        blended = blend_query_vectors(session.query_vector, qvec, settings.session_query_carry)
+        return await knn_search(
+            settings.opensearch_url, session.index, query_vector=blended, k=k,
+            filters=session.filters, timeout_s=_stage_timeout(deadline, KNN_TIMEOUT_S),
+        )
+
+    bm25_res, knn_res = await asyncio.gather(
+        asyncio.wait_for(bm25(), deadline.remaining_s()),
+        asyncio.wait_for(knn(), deadline.remaining_s()),
+        return_exceptions=True,
+    )
+    for res in (bm25_res, knn_res):
+        if isinstance(res, httpx.HTTPStatusError) and res.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"Unknown collection index in {session.index!r}")
+        if isinstance(res, BaseException) and not isinstance(res, Exception):
+            raise res  # cancellation
+
+    if isinstance(bm25_res, Exception) and isinstance(knn_res, Exception):
+        degradations.append(
+            {
+                "type": "retrieval_skipped",
+                "reason": f"BM25 {_failure(bm25_res)}, embedding/kNN {_failure(knn_res)}",
+            }
+        )
+        return [], blended
+    if isinstance(knn_res, Exception):
+        degradations.append({"type": "bm25_only", "reason": f"embedding/kNN {_failure(knn_res)}"})
+        knn_res = []
+    elif isinstance(bm25_res, Exception):
+        degradations.append({"type": "knn_only", "reason": f"BM25 {_failure(bm25_res)}"})
+        bm25_res = []
+    seen = {h.chunk_id for h in session.hits}
+    fused = fuse_hits(bm25_res, knn_res, w_bm25=session.w_bm25, w_knn=session.w_knn)[:k]
+    return [h for h in fused if h.chunk_id not in seen], blended
+
+
+async def _query_vector(question: str) -> list[float]:
+    # Usually served by the embedding cache (retrieval just embedded the question)
+    try:
+        return await asyncio.wait_for(query_embedder.embed(question), EMBED_TIMEOUT_S)
+    except Exception:
+        return []
+
+
+@router.post("/sessions/{session_id}/answer")
+async def session_answer(
+    session_id: str,
+    question: str = Body(..., embed=True),
+    priority: str = Body("normal", embed=True, pattern="^(high|normal|low)$"),
+    deadline_ms: int | None = Body(None, embed=True, ge=100, le=600_000),
+):
+    """
+    One turn of a conversation. The first turn runs like /answer. Follow-ups
+    continue the model's own context (Ollama `context` tokens, preferably on the
+    replica that served the previous turn, which still holds them in its KV
+    cache): the prompt carries only the question and the chunks that incremental
+    retrieval found beyond those already shown, so neither retrieval nor prompt
+    evaluation starts from scratch.
+
+    When the context would outgrow SESSION_MAX_CONTEXT_TOKENS (or there is none),
+    the turn starts over with a full prompt of the newest contexts and the latest
+    earlier turns ("mode": "rebuilt"). Citations are numbered across the
+    conversation; "citations" lists all of them.
+    """
+    t0 = time.perf_counter()
+    session = _get_session(session_id)
+    deadline = Deadline(deadline_ms / 1000 if deadline_ms else settings.answer_deadline_s)
+    degradations: list[dict] = []
+
+    try:
+        llm_scheduler.check_admission(priority)
+    except SchedulerOverloaded as e:
+        raise _overloaded(e)
+
+    async with session.lock:
+        # 1) Retrieve: full for the first turn, only unseen chunks for follow-ups
+        retrieval_deadline = deadline.portion(settings.retrieval_budget_ratio)
+        cached = False
+        if not session.turns:
+            bm25_hits, knn_hits, cached = await _retrieve(
+                question,
+                session.k,
+                filters=session.filters,
+                index=session.index,
+                deadline=retrieval_deadline,
+                degradations=degradations,
+            )
+            fused = fuse_hits(bm25_hits, knn_hits, w_bm25=session.w_bm25, w_knn=session.w_knn)
+            new_hits = fused[: session.k]
+            vector_task = asyncio.ensure_future(_query_vector(question))
+        else:
+            new_hits, blended = await _retrieve_followup(session, question, retrieval_deadline, degradations)
+            vector_task = None
+        t_retrieved = time.perf_counter()
+
+        # 2) Continue the context, unless there is none yet or it would grow too long
+        start = len(session.hits) + 1
+        mode = "initial"
+        if session.turns:
+            followup_chars = len(build_followup_prompt(question, _hit_contexts(new_hits), start))
+            answer_tokens = settings.answer_max_tokens or SESSION_ANSWER_TOKENS
+            tokens = len(session.context) + followup_chars / CHARS_PER_TOKEN + answer_tokens
+            fits = bool(session.context) and tokens <= settings.session_max_context_tokens
+            mode = "followup" if fits else "rebuilt"
+
+        if mode == "followup":
+            prompt_for = partial(build_followup_prompt, question, start=start)
+            context, prefer = session.context, session.endpoint
+        else:
+            history = None
+            if mode == "rebuilt":
+                # This turn's hits first, then the earlier ones from the latest back
+                new_hits = [*new_hits, *reversed(session.hits)][: session.k]
+                history = session.history(int(SESSION_HISTORY_TOKENS * CHARS_PER_TOKEN))
+            prompt_for = partial(build_rag_prompt, question, history=history)
+            context, prefer = None, None
+
+        contexts = _hit_contexts(new_hits)
+        n_contexts, num_predict = _plan_contexts(prompt_for, contexts, deadline, priority, degradations)
+        new_hits = new_hits[:n_contexts]
+
+        # 3) Generate, then remember what the model has seen
+        try:
+            generation = await _generate_within(
+                prompt_for(contexts[:n_contexts]), priority, deadline, num_predict, degradations, context, prefer
+            )
+        finally:
+            if vector_task is not None:
+                blended = await vector_task
+        t_generated = time.perf_counter()
+
+        answer_text = generation.response.strip()
+        session.hits = [*session.hits, *new_hits] if mode == "followup" else new_hits
+        if blended:
+            session.query_vector = blended
+        session.context = generation.context
+        session.endpoint = generation.endpoint or None
+        session.turns.append(Turn(question, answer_text, len(new_hits), mode))
+        sessions.turns[mode] += 1
+        if session.id in sessions:
+            sessions.update(session)  # not if it was deleted meanwhile
+
+    _log_query(
+        "session",
+        question,
+        {"turn": len(session.turns), "mode": mode, "k": session.k, "priority": priority},
+        {
+            "retrieve": 1000 * (t_retrieved - t0),
+            "generate": 1000 * (t_generated - t_retrieved),
+            "total": 1000 * (t_generated - t0),
+        },
+        cached=cached,
+        k_used=len(new_hits),
+        degradations=[d["type"] for d in degradations],
+    )
+
+    return FastJSONResponse(
+        {
+            "session_id": session.id,
+            "turn": len(session.turns),
+            "mode": mode,
+            "question": question,
+            "retrieval_cached": cached,
+            "new_contexts": len(new_hits),
+            "context_tokens": len(session.context),
+            "deadline_ms": round(1000 * deadline.budget_s),
+            "degradations": degradations,
+            "answer": answer_text,
+            "citations": _hit_contexts(session.hits),
+        }
+    )
+
+
+@router.get("/sessions/{session_id}")
+async def session_get(session_id: str):
+    session = _get_session(session_id)
+    return {
+        **session.info(),
+        "turns": [
+            {"question": t.question, "answer": t.answer, "mode": t.mode, "new_contexts": t.new_contexts}
+            for t in session.turns
+        ],
+        "citations": _hit_contexts(session.hits),
+    }
+
+
+@router.delete("/sessions/{session_id}")
+async def session_delete(session_id: str):
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session {session_id!r}")
+    return {"deleted": session_id}
+
+
+# Queries per embed + _msearch round-trip in the batch endpoints
+BATCH_SLICE = 32
+
+
+async def _retrieve_slice(
+    queries: list[str],
+    k: int,
+    filters: SearchFilters | None,
+    use_cache: bool,
+    index: str,
+) -> list[tuple[list[SearchHit], list[SearchHit], bool]]:
+    """
+    Retrieval for a slice of queries: cache lookups, then ONE batched embed call
+    and ONE _msearch for all misses.
+    """
+    if filters is not None and filters.is_empty():
+        filters = None
+    fkey = filters.cache_key() if filters else ()
+
+    keys = [RetrievalCache.key(index, q, k, fkey) for q in queries]
+    results: list[tuple[list[SearchHit], list[SearchHit], bool] | None] = [None] * len(queries)
+    if use_cache:
+        for i, key in enumerate(keys):
+            entry = retrieval_cache.get(key)
+            if entry is not None:
+                results[i] = (entry.bm25_hits, entry.knn_hits, True)
+
+    misses = [i for i, r in enumerate(results) if r is None]
+    if misses:
+        miss_queries = [queries[i] for i in misses]
+        vectors = await embed_texts(miss_queries)
+        found = await hybrid_msearch(
+            settings.opensearch_url,
+            index,
+            miss_queries,
+            vectors,
+            k=k,
+            filters=filters,
+        )
+        for i, (bm25_hits, knn_hits) in zip(misses, found):
+            retrieval_cache.put(keys[i], bm25_hits, knn_hits)
+            results[i] = (bm25_hits, knn_hits, False)
+
+    return results  # type: ignore[return-value]
+
+
+async def _retrieve_stream(
+    queries: list[str],
+    k: int,
+    filters: SearchFilters | None,
+    use_cache: bool,
+    index: str,
+) -> AsyncIterator[tuple[int, tuple[list[SearchHit], list[SearchHit], bool] | Exception]]:
+    """
+    Yield (query index, retrieval result or error) slice by slice.
+    The next slice is already being retrieved while the current one is consumed.
+    """
+    slices = [list(range(i, min(len(queries), i + BATCH_SLICE))) for i in range(0, len(queries), BATCH_SLICE)]
+
+    def start(idx: list[int]) -> asyncio.Task:
+        return asyncio.create_task(_retrieve_slice([queries[i] for i in idx], k, filters, use_cache, index))
+
+    pending = start(slices[0]) if slices else None
+    try:
+        for n, idx in enumerate(slices):
+            current = pending
+            pending = start(slices[n + 1]) if n + 1 < len(slices) else None
+            try:
+                results = await current
+            except Exception as e:
+                for i in idx:
+                    yield i, e
+                continue
+            for i, res in zip(idx, results):
+                yield i, res
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def _ndjson(obj: dict) -> bytes:
+    return dumps(obj) + b"\n"
+
+
+@router.post("/search/batch")
+async def search_batch(
+    queries: list[str] = Body(..., embed=True, min_length=1, max_length=5000),
+    k: int = Body(8, embed=True, ge=1, le=50),
+    w_bm25: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    w_knn: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    no_cache: bool = Body(False, embed=True),
+    cache_control: str | None = Header(None),
+    filters: SearchFilters | None = Body(None, embed=True),
+    collections: list[str] | None = Body(None, embed=True),
+):
+    """
+    Offline/bulk hybrid retrieval. Queries are embedded in batches and searched via
+    _msearch; one NDJSON line per query is streamed as soon as its slice is done.
+    """
+
+    index = _search_target(collections)
+    use_cache = not _cache_bypassed(no_cache, cache_control)
+
+    async def lines() -> AsyncIterator[bytes]:
+        async for i, res in _retrieve_stream(queries, k, filters, use_cache=use_cache, index=index):
+            if isinstance(res, Exception):
+                yield _ndjson({"index": i, "query": queries[i], "error": str(res)})
+                continue
+            bm25_hits, knn_hits, cached = res
+            fused = fuse_hits(bm25_hits, knn_hits, w_bm25=w_bm25, w_knn=w_knn)[:k]
+            yield _ndjson(
+                {
+                    "index": i,
+                    "query": queries[i],
+                    "cached": cached,
+                    "results": fused,
+                }
+            )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _generate_low_priority(prompt: str, max_attempts: int = 10) -> str:
+    """
+    Batch generation yields to interactive traffic: low priority, and when shed,
+    wait for the suggested Retry-After instead of failing the item.
+    """
+    for attempt in range(max_attempts):
+        try:
+            async with llm_scheduler.slot("low"):
+                return (await generate(prompt)).response
+        except SchedulerOverloaded as e:
+            if attempt == max_attempts - 1:
+                raise
+            await asyncio.sleep(e.retry_after_s)
+    raise RuntimeError("unreachable")
+
+
+@router.post("/answer/batch")
+async def answer_batch(
+    questions: list[str] = Body(..., embed=True, min_length=1, max_length=5000),
+    k: int = Body(6, embed=True, ge=1, le=20),
+    w_bm25: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    w_knn: float = Body(0.5, embed=True, ge=0.0, le=1.0),
+    concurrency: int | None = Body(None, embed=True, ge=1, le=64),
+    no_cache: bool = Body(False, embed=True),
+    cache_control: str | None = Header(None),
+    filters: SearchFilters | None = Body(None, embed=True),
+    collections: list[str] | None = Body(None, embed=True),
+):
+    """
+    Offline/bulk RAG answers. Retrieval is batched (see /search/batch) and overlaps with
+    generation, which runs `concurrency` requests at a time (default: the generation
+    slots of all LLM replicas) at low priority in the LLM scheduler.
+    One NDJSON line per question is streamed in completion order (carries "index").
+    """
+    limit = asyncio.Semaphore(concurrency or llm_scheduler.slots)
+    index = _search_target(collections)
+    use_cache = not _cache_bypassed(no_cache, cache_control)
+
+    async def lines() -> AsyncIterator[bytes]:
+        out: asyncio.Queue[str | None] = asyncio.Queue()
+        tasks: set[asyncio.Task] = set()
+
+        async def answer_one(i: int, fused: list[SearchHit], cached: bool) -> None:
+            # Holds a `limit` slot acquired by the producer
+            contexts = _hit_contexts(fused)
+            try:
+                response = await _generate_low_priority(build_rag_prompt(questions[i], contexts))
+            except Exception as e:
+                await out.put(_ndjson({"index": i, "question": questions[i], "error": str(e)}))
+                return
+            finally:
+                limit.release()
+            await out.put(
+                _ndjson(
+                    {
+                        "index": i,
+                        "question": questions[i],
+                        "retrieval_cached": cached,
+                        "answer": response.strip(),
+                        "citations": contexts,
+                    }
+                )
+            )
+
+        async def produce() -> None:
+            # At most `limit` answers are in flight, so retrieval stays only that far ahead
+            try:
+                async for i, res in _retrieve_stream(questions, k, filters, use_cache=use_cache, index=index):
+                    if isinstance(res, Exception):
+                        await out.put(_ndjson({"index": i, "question": questions[i], "error": str(res)}))
+                        continue
+                    bm25_hits, knn_hits, cached = res
+                    fused = fuse_hits(bm25_hits, knn_hits, w_bm25=w_bm25, w_knn=w_knn)[:k]
+                    await limit.acquire()
+                    task = asyncio.create_task(answer_one(i, fused, cached))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            except Exception as e:
+                await out.put(_ndjson({"error": f"retrieval failed: {e}"}))
+            finally:
+                while tasks:
+                    await asyncio.gather(*list(tasks), return_exceptions=True)
+                await out.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (line := await out.get()) is not None:
+                yield line
+            await producer
+        finally:
+            # Client went away: stop retrieval and pending generations
+            producer.cancel()
+            for t in list(tasks):
+                t.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/collections")
+async def collections_list():
+    """
+    Searchable collections (one index each) with document count, size and shards.
+    """
+    return {"collections": await list_collections(settings.opensearch_url, settings.opensearch_index)}
+
+
+@router.get("/metrics")
+async def metrics():
+    """
+    In-process serving metrics (per worker): LLM queue, caches, embedding batcher,
+    and the latest k-NN warm-up and graph memory stats.
+    """
+    return {
+        "llm_scheduler": llm_scheduler.metrics(),
+        "llm_queue_wait_estimate_s": {p: round(llm_scheduler.estimate_wait_s(p), 3) for p in PRIORITIES},
+        "llm_rates": generation_rates.stats(),
+        "retrieval_cache": retrieval_cache.stats(),
+        "sessions": sessions.stats(),
+        "embed_batcher": query_embedder.stats(),
+        "ollama": {"embed": embed_pool.stats(), "llm": llm_pool.stats()},
+        "knn": knn_warmer.stats(),
+        "query_log": query_log.stats() if query_log else {"enabled": False},
+        "warmup": warmup.stats(),
+    }
+
+
+warmup = Warmup(activity, rate_per_s=settings.warmup_rate_per_s, idle_s=settings.warmup_idle_s)
+_background: set[asyncio.Task] = set()
+
+
+async def _warm_query(q: FrequentQuery) -> bool:
+    filters = SearchFilters.model_validate(q.filters) if q.filters else None
+    index = search_target(settings.opensearch_index, q.collections)
+    _, _, cached = await _retrieve(
+        q.query, q.k, use_cache=True, filters=filters, index=index, coarse=_coarse_spec(q.coarse, q.fan_out)
+    )
+    return cached
+
+
+async def _load_models() -> None:
+    async with llm_scheduler.slot("low"):
+        await load_models()
+
+
+async def _warm_up() -> None:
+    await asyncio.sleep(settings.warmup_delay_s)
+    queries: list[FrequentQuery] = []
+    if query_log is not None:
+        queries = await asyncio.to_thread(top_queries, query_log.path, settings.warmup_top_n)
+    await warmup.run(queries, _warm_query, _load_models if settings.warmup_load_models else None)
+
+
+async def start_warmup() -> None:
+    if warmup.state != "pending":
+        return  # already started by an earlier run of the app (e.g. in tests)
+    if not settings.warmup_enabled:
+        warmup.state = "disabled"
+        return
+    warmup.state = "scheduled"
+    task = asyncio.create_task(_warm_up())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def stop_background() -> None:
+    for task in list(_background):
+        task.cancel()
@@ -0,0 +1,38 @@
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from sailrag.serialization import dumps, loads
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson. Returned directly from a handler, it also
+    skips FastAPI's `jsonable_encoder` pass over the content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body())
+        return self._json
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Route class parsing JSON request bodies with orjson.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(FastJSONRequest(request.scope, request.receive))
+
+        return route_handler
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+from fastapi import FastAPI
+
+from sailrag.settings import settings
+
+ROLES = ("query", "ingest")
+
+Hook = Callable[[], Awaitable[None]]
+
+
+def create_app(roles: Iterable[str] | None = None) -> FastAPI:
+    """
+    Build the API with only the selected route groups:
+    - "query": /search, /answer (+ batch), /metrics — no PDF/OCR stack is imported
+    - "ingest": /ingest/*, /chunk/preview, /embed/*, /index/* — pypdf, pdf2image, tesseract
+    /healthz is always mounted; /admin/profile/* only when ADMIN_TOKEN is set. Routers are imported lazily, so a query-only
+    process never pays the ingestion import time and memory.
+    """
+    selected = [r.strip() for r in (roles if roles is not None else settings.app_roles.split(",")) if r.strip()]
+    unknown = set(selected) - set(ROLES)
+    if unknown:
+        raise ValueError(f"Unknown app roles: {sorted(unknown)} (expected {ROLES})")
+
+    # (start, stop) pairs of background work, run by the app's lifespan: started in
+    # order, stopped in reverse
+    hooks: list[tuple[Hook, Hook]] = []
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            for start, stop in hooks:
+                await start()
+                stack.push_async_callback(stop)
+            yield
+
+    app = FastAPI(title="SailRAG API", version="0.1.0", lifespan=lifespan)
+
+    from sailrag.api.health import router as health_router
+    from sailrag.api.knn import start_knn_warmer, stop_knn_warmer
+    from sailrag.api.pools import start_pools, stop_pools
+
+    app.include_router(health_router)
+    # Background health/loaded-model checks of the Ollama replicas
+    hooks.append((start_pools, stop_pools))
+    # k-NN graphs loaded into OpenSearch memory before queries need them; only
+    # processes serving queries keep all collections warm
+    hooks.append((partial(start_knn_warmer, periodic="query" in selected), stop_knn_warmer))
+
+    if "query" in selected:
+        from sailrag.api.query import router as query_router
+        from sailrag.api.query import start_warmup, stop_background
+
+        app.include_router(query_router)
+        # Cache warm-up from the query log, once the process is otherwise idle
+        hooks.append((start_warmup, stop_background))
+
+    if "ingest" in selected:
+        from sailrag.api.ingest import router as ingest_router
+
+        app.include_router(ingest_router)
+
+    if settings.admin_token or settings.loop_watchdog_ms > 0:
+        from sailrag.api.admin import install_profiling, start_watchdog, stop_watchdog
+
+        install_profiling(app)
+        hooks.append((start_watchdog, stop_watchdog))
+
+    app.state.roles = selected
+    return app
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import re
 
+from sailrag.chunking.tokens import Tokenizer, get_tokenizer
+
+
 def looks_like_table_of_contents(text: str) -> bool:
     t = (text or "").lower()
     if "table of contents" in t or t.strip().startswith("contents"):
@@ -86,12 +89,7 @@ def chunk_text_windowed(
     if not text:
         return []
 
-    # First try paragraph split
-    paras = [p.strip() for p in text.split("\n\n") if p.strip()]
-
-    # If paragraph split yields too many tiny pieces, use line-merge strategy
-    if len(paras) > 50:
-        paras = _merge_lines_into_blocks(text)
+    paras = _split_paragraphs(text)
 
     chunks: list[str] = []
     buf = ""
@@ -125,6 +123,84 @@ def chunk_text_windowed(
     return final
 
 
+def chunk_text_tokens(
+    text: str,
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+    min_tokens: int = 32,
+    tokenizer: Tokenizer | None = None,
+) -> list[str]:
+    """
+    Token-aware variant of `chunk_text_windowed`:
+    - same normalization and paragraph/line-block packing
+    - budgets measured in embedding-model tokens instead of characters
+    - oversized blocks are windowed on token boundaries with token overlap
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be > 0")
+    if overlap_tokens < 0 or overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be >=0 and < max_tokens")
+
+    tok = tokenizer or get_tokenizer()
+
+    text = normalize_pdf_text(text)
+    if not text:
+        return []
+
+    paras = _split_paragraphs(text)
+
+    chunks: list[tuple[str, int]] = []
+    buf = ""
+    buf_tokens = 0
+
+    for p in paras:
+        if len(p) < 2:
+            continue
+        p_tokens = len(tok.spans(p))
+        if not buf:
+            buf, buf_tokens = p, p_tokens
+            continue
+        if buf_tokens + p_tokens <= max_tokens:
+            buf = f"{buf}\n\n{p}"
+            buf_tokens += p_tokens
+        else:
+            if buf_tokens >= min_tokens:
+                chunks.append((buf.strip(), buf_tokens))
+            buf, buf_tokens = p, p_tokens
+
+    if buf and buf_tokens >= min_tokens:
+        chunks.append((buf.strip(), buf_tokens))
+
+    # The token budget is a hard limit (the model truncates beyond it), so window anything over it
+    final: list[str] = []
+    for c, n_tokens in chunks:
+        if n_tokens <= max_tokens:
+            final.append(c)
+        else:
+            final.extend(
+                _token_windows(
+                    c,
+                    tok.spans(c),
+                    max_tokens=max_tokens,
+                    overlap_tokens=overlap_tokens,
+                    min_tokens=min_tokens,
+                )
+            )
+
+    return final
+
+
+def _split_paragraphs(text: str) -> list[str]:
+    # First try paragraph split
+    paras = [p.strip() for p in text.split("\n\n") if p.strip()]
+
+    # If paragraph split yields too many tiny pieces, use line-merge strategy
+    if len(paras) > 50:
+        paras = _merge_lines_into_blocks(text)
+
+    return paras
+
+
 def _merge_lines_into_blocks(text: str, target_block_chars: int = 700) -> list[str]:
     """
     Merge lines into rough blocks when paragraph boundaries are unreliable.
@@ -162,4 +238,28 @@ def _sliding_windows(text: str, max_chars: int, overlap: int, min_chars: int) ->
             break
         start = end - overlap
 
-    return chunks
\ No newline at end of file
+    return chunks
+
+
+def _token_windows(
+    text: str,
+    spans: list[tuple[int, int]],
+    max_tokens: int,
+    overlap_tokens: int,
+    min_tokens: int,
+) -> list[str]:
+    chunks: list[str] = []
+    start = 0
+    n = len(spans)
+
+    while start < n:
+        end = min(n, start + max_tokens)
+        if end - start >= min_tokens:
+            chunk = text[spans[start][0] : spans[end - 1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+        if end == n:
+            break
+        start = end - overlap_tokens
+
+    return chunks
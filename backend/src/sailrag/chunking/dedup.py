@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+
+from sailrag.chunking.models import Chunk, Citation
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+SIMHASH_BITS = 64
+# 4 bands x 16 bits: by pigeonhole, fingerprints within Hamming distance 3 share at least one band
+SIMHASH_BANDS = 4
+MAX_BAND_DISTANCE = SIMHASH_BANDS - 1
+
+
+def simhash64(text: str, shingle_words: int = 3) -> int:
+    """
+    64-bit SimHash over lowercase word shingles.
+    Near-identical texts (boilerplate, repeated rules, window overlaps) get fingerprints
+    with a small Hamming distance.
+    """
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return 0
+    if len(words) < shingle_words:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i : i + shingle_words]) for i in range(len(words) - shingle_words + 1)}
+
+    counts = [0] * SIMHASH_BITS
+    for sh in shingles:
+        h = int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            counts[bit] += 1 if (h >> bit) & 1 else -1
+
+    fp = 0
+    for bit, c in enumerate(counts):
+        if c > 0:
+            fp |= 1 << bit
+    return fp
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def band_keys(fp: int) -> list[str]:
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    return [f"{i}:{(fp >> (i * width)) & mask:04x}" for i in range(SIMHASH_BANDS)]
+
+
+def format_simhash(fp: int) -> str:
+    return f"{fp:016x}"
+
+
+def parse_simhash(value: str) -> int:
+    return int(value, 16)
+
+
+def _merge_citations(target: list[Citation], extra: list[Citation]) -> None:
+    seen = {c.chunk_id for c in target}
+    for c in extra:
+        if c.chunk_id not in seen:
+            target.append(c)
+            seen.add(c.chunk_id)
+
+
+def dedup_chunks(chunks: list[Chunk], max_distance: int = 3) -> list[Chunk]:
+    """
+    Collapse near-duplicate chunks (SimHash Hamming distance <= max_distance) into the
+    first occurrence. The canonical chunk carries a citation for every collapsed location.
+    Every returned chunk has `simhash` and `citations` (its own location first) set.
+    """
+    if max_distance > MAX_BAND_DISTANCE:
+        raise ValueError(f"max_distance must be <= {MAX_BAND_DISTANCE}")
+
+    canonical: list[tuple[Chunk, int]] = []
+    buckets: dict[str, list[int]] = {}
+
+    for c in chunks:
+        fp = simhash64(c.text)
+        own = Citation(doc_id=c.doc_id, page_number=c.page_number, chunk_id=c.chunk_id)
+        keys = band_keys(fp)
+
+        match: int | None = None
+        for key in keys:
+            for idx in buckets.get(key, []):
+                if hamming(fp, canonical[idx][1]) <= max_distance:
+                    match = idx
+                    break
+            if match is not None:
+                break
+
+        if match is not None:
+            _merge_citations(canonical[match][0].citations, [own])
+            continue
+
+        canon = c.model_copy(update={"simhash": format_simhash(fp), "citations": [own]})
+        canonical.append((canon, fp))
+        for key in keys:
+            buckets.setdefault(key, []).append(len(canonical) - 1)
+
+    return [c for c, _ in canonical]
+
+
+@dataclass(frozen=True)
+class IndexedFingerprint:
+    """
+    A chunk already in the index, as returned by a `simhash_bands` lookup.
+    """
+
+    id: str
+    chunk_id: str
+    doc_id: str
+    simhash: int
+    citations: list[Citation]
+
+
+def match_indexed(
+    chunks: list[Chunk],
+    indexed: list[IndexedFingerprint],
+    max_distance: int = 3,
+) -> tuple[list[Chunk], dict[str, list[Citation]]]:
+    """
+    Match deduplicated chunks against near-duplicates already in the index.
+
+    - a chunk re-ingested under the same chunk_id keeps citations other documents
+      previously merged into it
+    - otherwise, a chunk matching an indexed chunk of another document, or of the
+      same document under a chunk_id this batch doesn't overwrite (e.g. after
+      re-chunking), is dropped; its citations are returned as an update for that
+      indexed chunk (keyed by _id)
+    Returns (chunks_to_index, citation_updates).
+    """
+    batch_ids = {c.chunk_id for c in chunks}
+    by_band: dict[str, list[IndexedFingerprint]] = {}
+    for f in indexed:
+        for key in band_keys(f.simhash):
+            by_band.setdefault(key, []).append(f)
+
+    to_index: list[Chunk] = []
+    updates: dict[str, list[Citation]] = {}
+
+    for c in chunks:
+        fp = parse_simhash(c.simhash) if c.simhash else simhash64(c.text)
+        candidates = {
+            f.id: f
+            for key in band_keys(fp)
+            for f in by_band.get(key, [])
+            if hamming(fp, f.simhash) <= max_distance
+        }.values()
+
+        same = next((f for f in candidates if f.chunk_id == c.chunk_id), None)
+        if same is not None:
+            _merge_citations(c.citations, [x for x in same.citations if x.doc_id != c.doc_id])
+            to_index.append(c)
+            continue
+
+        other = next(
+            (f for f in candidates if f.doc_id != c.doc_id or f.chunk_id not in batch_ids),
+            None,
+        )
+        if other is not None:
+            _merge_citations(updates.setdefault(other.id, []), c.citations)
+            continue
+
+        to_index.append(c)
+
+    return to_index, updates
@@ -1,10 +1,20 @@
 from pydantic import BaseModel, Field
 
 
+class Citation(BaseModel):
+    doc_id: str
+    page_number: int
+    chunk_id: str
+
+
 class Chunk(BaseModel):
     doc_id: str
     page_number: int = Field(..., ge=1)
     chunk_id: str
     text: str
     char_count: int
-    tags: list[str] = Field(default_factory=list)
\ No newline at end of file
+    token_count: int | None = None
+    tags: list[str] = Field(default_factory=list)
+    # set by near-duplicate detection: fingerprint + every location this text was found at
+    simhash: str | None = None
+    citations: list[Citation] = Field(default_factory=list)
\ No newline at end of file
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+
+# (start, end) character offsets of one token in the source text
+Span = tuple[int, int]
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class Tokenizer(Protocol):
+    name: str
+
+    def spans(self, text: str) -> list[Span]: ...
+
+
+class ApproxWordPieceTokenizer:
+    """
+    Dependency-free approximation of the BERT WordPiece tokenizer used by nomic-embed-text.
+
+    Words and punctuation marks are tokens; long words are split into ~4-char pieces.
+    It slightly over-counts compared to the real vocabulary, which keeps chunks
+    safely under the model's context window.
+    """
+
+    name = "approx-wordpiece"
+
+    def __init__(self, whole_word_chars: int = 8, piece_chars: int = 4):
+        self.whole_word_chars = whole_word_chars
+        self.piece_chars = piece_chars
+
+    def spans(self, text: str) -> list[Span]:
+        out: list[Span] = []
+        for m in _WORD_RE.finditer(text):
+            start, end = m.span()
+            length = end - start
+            if length <= self.whole_word_chars:
+                out.append((start, end))
+                continue
+            pieces = 1 + math.ceil((length - self.whole_word_chars) / self.piece_chars)
+            step = math.ceil(length / pieces)
+            for s in range(start, end, step):
+                out.append((s, min(end, s + step)))
+        return out
+
+
+class HFTokenizer:
+    """
+    Exact tokenizer loaded from a local HuggingFace `tokenizer.json`
+    (requires the optional `tokenizers` package).
+    """
+
+    def __init__(self, path: Path):
+        from tokenizers import Tokenizer as _Tokenizer
+
+        self.name = f"hf:{path.name}"
+        self._tok = _Tokenizer.from_file(str(path))
+        self._tok.no_truncation()
+        self._tok.no_padding()
+
+    def spans(self, text: str) -> list[Span]:
+        enc = self._tok.encode(text, add_special_tokens=False)
+        return [(s, e) for s, e in enc.offsets]
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(tokenizer_path: str = "") -> Tokenizer:
+    """
+    Load (once per process) the tokenizer used for token-aware chunking.
+    Falls back to the approximate tokenizer when no local tokenizer file is usable.
+    """
+    if tokenizer_path:
+        path = Path(tokenizer_path)
+        if path.exists():
+            try:
+                return HFTokenizer(path)
+            except ImportError:
+                pass
+    return ApproxWordPieceTokenizer()
+
+
+def count_tokens(text: str, tokenizer: Tokenizer | None = None) -> int:
+    tok = tokenizer or get_tokenizer()
+    return len(tok.spans(text))
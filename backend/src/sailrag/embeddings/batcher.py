@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+
+class EmbeddingBatcher:
+    """
+    Request-coalescing micro-batcher for query embeddings.
+
+    Concurrent `embed()` calls are collected for up to `window_ms` (or until
+    `max_batch` texts are waiting) and sent as one multi-input `embed_texts(texts,
+    timeout_s)` call; each caller gets its own vector back. A single caller pays at most `window_ms`.
+    With `cache_size` > 0, vectors of recent texts are kept in an LRU and served
+    without a round-trip (embeddings don't change when the index does).
+    """
+
+    def __init__(
+        self,
+        embed_texts: Callable[[list[str], float], Awaitable[list[list[float]]]],
+        window_ms: float = 5.0,
+        max_batch: int = 32,
+        timeout_s: float = 60.0,
+        cache_size: int = 0,
+    ):
+        self.embed_texts = embed_texts
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.timeout_s = timeout_s
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, list[float]] = OrderedDict()
+
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future[list[float]]]] | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self.batches_sent = 0
+        self.texts_embedded = 0
+        self.cache_hits = 0
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+        return self._queue
+
+    def cached(self, text: str) -> list[float] | None:
+        vec = self._cache.get(text)
+        if vec is not None:
+            self._cache.move_to_end(text)
+        return vec
+
+    def _remember(self, text: str, vec: list[float]) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[text] = vec
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def embed(self, text: str) -> list[float]:
+        vec = self.cached(text)
+        if vec is not None:
+            self.cache_hits += 1
+            return vec
+        queue = self._ensure_worker()
+        fut: asyncio.Future[list[float]] = asyncio.get_running_loop().create_future()
+        await queue.put((text, fut))
+        return await fut
+
+    async def _collect(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Dispatch without waiting, so the next batch can be collected meanwhile
+            task = loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, asyncio.Future[list[float]]]]) -> None:
+        waiting = [(t, f) for t, f in batch if not f.done()]
+        if not waiting:
+            return
+
+        # Identical concurrent queries are embedded once
+        unique = list(dict.fromkeys(t for t, _ in waiting))
+        try:
+            vectors = await self.embed_texts(unique, self.timeout_s)
+        except Exception as e:
+            for _, f in waiting:
+                if not f.done():
+                    f.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.texts_embedded += len(unique)
+        by_text = dict(zip(unique, vectors))
+        for t, v in by_text.items():
+            self._remember(t, v)
+        for t, f in waiting:
+            if not f.done():
+                f.set_result(by_text[t])
+
+    def stats(self) -> dict:
+        return {
+            "batches_sent": self.batches_sent,
+            "texts_embedded": self.texts_embedded,
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+        }
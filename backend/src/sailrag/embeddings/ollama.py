@@ -8,6 +8,10 @@ class EmbedResponse(BaseModel):
     embedding: list[float]
 
 
+class EmbedBatchResponse(BaseModel):
+    embeddings: list[list[float]]
+
+
 async def embed_text_ollama(
     ollama_url: str,
     model: str,
@@ -20,5 +24,29 @@ async def embed_text_ollama(
             json={"model": model, "prompt": text},
         )
         r.raise_for_status()
-        data = EmbedResponse.model_validate(r.json())
-        return data.embedding
\ No newline at end of file
+        data = EmbedResponse.model_validate_json(r.content)
+        return data.embedding
+
+
+async def embed_texts_ollama(
+    ollama_url: str,
+    model: str,
+    texts: list[str],
+    timeout_s: float = 60.0,
+) -> list[list[float]]:
+    """
+    Embed several texts in ONE call (Ollama /api/embed with a list input).
+    Vectors come back L2-normalized, which doesn't change cosine similarity.
+    """
+    if not texts:
+        return []
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        r = await client.post(
+            f"{ollama_url}/api/embed",
+            json={"model": model, "input": texts},
+        )
+        r.raise_for_status()
+        data = EmbedBatchResponse.model_validate_json(r.content)
+        if len(data.embeddings) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(data.embeddings)}")
+        return data.embeddings
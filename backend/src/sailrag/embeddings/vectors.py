@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+
+def l2_normalize(vec: list[float]) -> list[float]:
+    """
+    Scale to unit length. The index uses inner product, which equals cosine similarity on unit vectors.
+    """
+    norm = sum(x * x for x in vec) ** 0.5
+    if norm == 0.0:
+        return vec
+    return [x / norm for x in vec]
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import re
+
+# Lowercase roman numerals 1-89: front-matter page numbers, not words like "civil" or "ill"
+_ROMAN_RE = re.compile(r"^(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100}
+_PAGE_WORD_RE = re.compile(r"\bpage (\d{1,4})\b")
+_LEADING_NUM_RE = re.compile(r"^(\d{1,4})(?=\W)")
+_TRAILING_NUM_RE = re.compile(r"(?<=\W)(\d{1,4})$")
+# A number right after one of these labels numbers the content ("Rule 5", "Section 6"),
+# even when it happens to advance one per page
+_NUMBERING_LABEL_RE = re.compile(
+    r"\b(rule|section|sec|chapter|ch|article|art|part|annex|appendix|regulation|reg|clause"
+    r"|lesson|unit|step|exercise|figure|fig|table|item|no)\.?\s*$|§\s*$"
+)
+_SPACES_RE = re.compile(r"\s+")
+_DECORATION = " -\u2013\u2014|\u00b7\u2022.[]()"
+
+
+def _normalize_line(line: str) -> str:
+    """
+    Canonical form used to match running headers/footers across pages:
+    case-folded and whitespace-collapsed.
+    """
+    return _SPACES_RE.sub(" ", line.strip().lower())
+
+
+def _roman_value(token: str) -> int:
+    if not token or not _ROMAN_RE.match(token):
+        return 0
+    values = [_ROMAN_VALUES[ch] for ch in token]
+    return sum(-v if i + 1 < len(values) and v < values[i + 1] else v for i, v in enumerate(values))
+
+
+def _page_number_form(line: str, page_index: int) -> str | None:
+    """
+    A normalized line with its page-number token (the whole line, "page N", or a
+    leading / trailing number) replaced by the token's offset from the page's
+    position in the document. A running page number keeps the same offset on
+    every page; other numbers in that spot ("Rule 5" on one page, "Rule 9" on the
+    next) rarely do, and a number after a numbering label ("Rule", "Section", ...)
+    is never taken for one. None if the line has no such token.
+    """
+
+    def mark(value: int) -> str:
+        return f"#{value - page_index:+d}"
+
+    core = line.strip(_DECORATION)
+    if core.isdigit() and len(core) <= 4:
+        return mark(int(core))
+    if roman := _roman_value(core):
+        return "r" + mark(roman)
+    for pattern in (_PAGE_WORD_RE, _LEADING_NUM_RE, _TRAILING_NUM_RE):
+        m = pattern.search(line)
+        if m and (pattern is _PAGE_WORD_RE or not _NUMBERING_LABEL_RE.search(line[: m.start(1)])):
+            return line[: m.start(1)] + mark(int(m.group(1))) + line[m.end(1) :]
+    return None
+
+
+class RepeatedLineDetector:
+    """
+    Detector for running headers, footers and page numbers, in two passes.
+
+    Pages are fed one at a time, in document order, with `observe`; only the
+    first/last `edge_lines` non-empty lines of each page are considered, keyed by
+    their position from the top or bottom and by their text, and also by their
+    page-number form when they carry one (see `_page_number_form`). Counts are kept
+    in a bounded Misra-Gries summary, so memory is O(capacity) regardless of
+    document length. A line is boilerplate when either key appears on at least
+    `min_ratio` of the pages (and `min_pages` pages). Call `strip` on each page
+    afterwards (second pass, with the same page positions).
+    """
+
+    def __init__(
+        self,
+        edge_lines: int = 2,
+        min_pages: int = 3,
+        min_ratio: float = 0.4,
+        max_line_chars: int = 120,
+        capacity: int = 512,
+    ):
+        self.edge_lines = edge_lines
+        self.min_pages = min_pages
+        self.min_ratio = min_ratio
+        self.max_line_chars = max_line_chars
+        self.capacity = capacity
+        self.pages_seen = 0
+        self._counts: dict[tuple[str, int, str], int] = {}
+
+    def _edge_keys(self, text: str, page_index: int) -> list[tuple[tuple[str, int, str], int]]:
+        """
+        (key, line index within the page's non-empty lines) for the page's edge lines.
+        """
+        lines = [ln for ln in (text or "").splitlines() if ln.strip()]
+        n = len(lines)
+        edges: list[tuple[str, int, int]] = [("head", i, i) for i in range(min(self.edge_lines, n))]
+        for i in range(min(self.edge_lines, n)):
+            j = n - 1 - i
+            if j < self.edge_lines:
+                break  # already covered as a head line
+            edges.append(("tail", i, j))
+
+        out: list[tuple[tuple[str, int, str], int]] = []
+        for pos, i, j in edges:
+            line = _normalize_line(lines[j])
+            if len(line) > self.max_line_chars:
+                continue
+            out.append(((pos, i, line), j))
+            form = _page_number_form(line, page_index)
+            if form is not None:
+                out.append(((pos, i, form), j))
+        return out
+
+    def observe(self, text: str) -> None:
+        for key, _ in self._edge_keys(text, self.pages_seen):
+            if key in self._counts:
+                self._counts[key] += 1
+            elif len(self._counts) < self.capacity:
+                self._counts[key] = 1
+            else:
+                # Misra-Gries: decrement everything, drop zeros
+                self._counts = {k: c - 1 for k, c in self._counts.items() if c > 1}
+        self.pages_seen += 1
+
+    def _threshold(self) -> int:
+        return max(self.min_pages, int(self.pages_seen * self.min_ratio + 0.999))
+
+    def repeated(self) -> set[tuple[str, int, str]]:
+        threshold = self._threshold()
+        return {k for k, c in self._counts.items() if c >= threshold}
+
+    def strip(self, text: str, page_index: int) -> str:
+        """
+        Drop the page's boilerplate lines; `page_index` is the page's position in
+        the `observe` order (0-based).
+        """
+        repeated = self.repeated()
+        if not repeated:
+            return text
+
+        drop = {idx for key, idx in self._edge_keys(text, page_index) if key in repeated}
+        if not drop:
+            return text
+
+        kept: list[str] = []
+        idx = -1
+        for ln in (text or "").splitlines():
+            if ln.strip():
+                idx += 1
+                if idx in drop:
+                    continue
+            kept.append(ln)
+        return "\n".join(kept)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from sailrag.ingest.models import PageText
+
+
+@lru_cache(maxsize=256)
+def _file_sha256(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Content hash of a file, memoized per (path, mtime, size) so repeated requests
+    for the same PDF don't re-read it.
+    """
+    st = path.stat()
+    return _file_sha256(str(path), st.st_mtime_ns, st.st_size)
+
+
+def page_cache_key(
+    file_hash: str,
+    page_number: int,
+    method: str,
+    dpi: int = 0,
+    tesseract_version: str = "",
+) -> str:
+    raw = f"{file_hash}|{page_number}|{method}|{dpi}|{tesseract_version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PageTextCache:
+    """
+    On-disk cache of extracted `PageText`, shared by all endpoints and worker processes.
+
+    - one JSON file per entry, written atomically (tmp file + rename)
+    - reads bump the file mtime, so eviction is approximately LRU
+    - when the tracked size exceeds `max_bytes`, oldest entries are removed down to 90%
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._approx_bytes: int | None = None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> PageText | None:
+        path = self._path(key)
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            page = PageText.model_validate_json(raw)
+        except ValueError:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return page
+
+    def put(self, key: str, page: PageText) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = page.model_dump_json().encode("utf-8")
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        if self._approx_bytes is None:
+            self._approx_bytes = self._disk_usage()
+        else:
+            self._approx_bytes += len(data)
+        if self._approx_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue  # evicted concurrently by another worker
+            out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        self._approx_bytes = total
@@ -3,15 +3,20 @@ from pydantic import BaseModel, Field
 
 class PageText(BaseModel):
     page_number: int = Field(..., ge=1)
-    method: str  # "text" or "ocr"
+    method: str  # "text", "ocr" or "blank" (OCR skipped: no ink on the page)
     text: str
     char_count: int
     non_whitespace_ratio: float
+    # adaptive OCR decisions (None for text-layer pages)
+    page_class: str | None = None
+    ocr_dpi: int | None = None
+    ocr_psm: int | None = None
 
 
 class DocumentPreviewSummary(BaseModel):
     text_pages: int
     ocr_pages: int
+    blank_pages: int = 0
 
 
 class DocumentPreview(BaseModel):
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import math
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 import pytesseract
@@ -58,4 +61,138 @@ def ocr_pdf_page(
     if not images:
         return ""
 
-    return pytesseract.image_to_string(images[0], lang="eng")
\ No newline at end of file
+    return pytesseract.image_to_string(images[0], lang="eng")
+
+
+@lru_cache(maxsize=1)
+def tesseract_version() -> str:
+    """
+    Installed Tesseract version (part of the page cache key: OCR output changes across versions).
+    """
+    return str(pytesseract.get_tesseract_version())
+
+
+@dataclass(frozen=True)
+class PageClass:
+    kind: str  # "blank", "text" or "image"
+    ink_ratio: float
+    text_lines: int
+    line_height_px: float  # median text-line height at the classification DPI
+    line_pitch_px: float  # median distance between text-line tops at the classification DPI
+    dpi: int  # OCR resolution chosen for this page
+    psm: int  # Tesseract page segmentation mode chosen for this page
+
+
+def render_page_gray(pdf_path: Path, page_number_1based: int, dpi: int) -> Image.Image | None:
+    """
+    Render ONE page straight to an 8-bit grayscale image.
+    poppler streams PGM to stdout, which PIL decodes in memory (no PNG encode/decode).
+    """
+    images = convert_from_path(
+        str(pdf_path),
+        dpi=dpi,
+        first_page=page_number_1based,
+        last_page=page_number_1based,
+        fmt="ppm",
+        grayscale=True,
+    )
+    return images[0] if images else None
+
+
+def _row_bands(ink: Image.Image, min_row_ink: float) -> list[tuple[int, int]]:
+    """
+    (top row, height) of contiguous runs of rows containing ink: roughly one run per text line.
+    `ink` is a mode "L" mask.
+    """
+    w, h = ink.size
+    # BOX-resize to a single column gives each row's mean ink (0..255), one byte per row
+    profile = ink.resize((1, h), Image.Resampling.BOX).tobytes()
+    threshold = 255 * min_row_ink
+
+    bands: list[tuple[int, int]] = []
+    run = 0
+    for y, v in enumerate(profile):
+        if v > threshold:
+            run += 1
+        elif run:
+            bands.append((y - run, run))
+            run = 0
+    if run:
+        bands.append((h - run, run))
+    return bands
+
+
+def _median(values: list[int]) -> float:
+    ordered = sorted(values)
+    return float(ordered[len(ordered) // 2]) if ordered else 0.0
+
+
+def classify_page_image(
+    img: Image.Image,
+    classify_dpi: int,
+    blank_ink_ratio: float = 0.001,
+    image_ink_ratio: float = 0.30,
+    target_pitch_px: float = 36.0,
+    min_dpi: int = 150,
+    max_dpi: int = 300,
+) -> PageClass:
+    """
+    Cheap page classification on a low-DPI grayscale render:
+    - ink density decides blank vs. content vs. dense artwork/photo
+    - the horizontal ink profile counts text lines and their spacing, which picks
+      the OCR DPI and Tesseract --psm. The DPI puts text lines about
+      `target_pitch_px` apart (10 pt body text: 200 DPI, smaller text more, large
+      print less), rounded up to a multiple of 50 so text never gets less than it
+      needs. Line pitch is used rather than line height: at a low classification
+      DPI, ink-band heights are too coarse to tell 8 pt from 14 pt text.
+    """
+    gray = img.convert("L")
+    ink = gray.point(lambda p: 255 if p < 160 else 0)
+    w, h = ink.size
+    ink_ratio = ink.histogram()[255] / float(max(1, w * h))
+
+    if ink_ratio < blank_ink_ratio:
+        return PageClass("blank", ink_ratio, 0, 0.0, 0.0, 0, 0)
+
+    bands = _row_bands(ink, min_row_ink=0.01)
+    # Text lines are short bands; very tall bands are figures/photos
+    max_line_px = 0.5 * classify_dpi  # ~0.5 inch
+    lines = [(top, height) for top, height in bands if height <= max_line_px]
+    text_lines = len(lines)
+    line_height = _median([height for _, height in lines])
+    line_pitch = _median([b[0] - a[0] for a, b in zip(lines, lines[1:])])
+
+    if text_lines < 3 or (ink_ratio >= image_ink_ratio and text_lines < 8):
+        # Artwork, diagrams, photos: sparse-text mode picks up labels/callouts
+        return PageClass("image", ink_ratio, text_lines, line_height, line_pitch, 200, 11)
+
+    dpi = math.ceil(target_pitch_px * classify_dpi / max(1.0, line_pitch) / 50.0) * 50
+    dpi = max(min_dpi, min(max_dpi, dpi))
+    psm = 3 if text_lines >= 8 else 6  # full auto layout vs. single uniform block
+    return PageClass("text", ink_ratio, text_lines, line_height, line_pitch, dpi, psm)
+
+
+def ocr_pdf_page_adaptive(
+    pdf_path: Path,
+    page_number_1based: int,
+    classify_dpi: int = 50,
+) -> tuple[str, PageClass | None]:
+    """
+    Classify the page from a low-DPI grayscale render, then:
+    - blank pages: skip OCR
+    - image pages: sparse-text OCR (--psm 11)
+    - text pages: OCR at the DPI/psm chosen from the measured text-line height
+    """
+    thumb = render_page_gray(pdf_path, page_number_1based, dpi=classify_dpi)
+    if thumb is None:
+        return "", None
+
+    pc = classify_page_image(thumb, classify_dpi=classify_dpi)
+    if pc.kind == "blank":
+        return "", pc
+
+    img = render_page_gray(pdf_path, page_number_1based, dpi=pc.dpi)
+    if img is None:
+        return "", pc
+
+    return pytesseract.image_to_string(img, lang="eng", config=f"--psm {pc.psm}"), pc
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Protocol
 
 from pypdf import PdfReader
 
@@ -123,3 +124,122 @@ def extract_text_for_page(pdf_path: Path, page_number_1based: int) -> str:
     if page_number_1based < 1 or page_number_1based > total_pages:
         return ""
     return reader.pages[page_number_1based - 1].extract_text() or ""
+
+
+class TextExtractor(Protocol):
+    """
+    Text-layer extraction for ONE open document. Implementations keep the parsed
+    document open, so per-page calls don't re-parse the file.
+    """
+
+    name: str
+
+    def page_count(self) -> int: ...
+
+    def extract_page(self, page_number_1based: int) -> str: ...
+
+    def close(self) -> None: ...
+
+
+class PypdfExtractor:
+    name = "pypdf"
+
+    def __init__(self, pdf_path: Path):
+        self._reader = PdfReader(str(pdf_path))
+
+    def page_count(self) -> int:
+        return len(self._reader.pages)
+
+    def extract_page(self, page_number_1based: int) -> str:
+        if page_number_1based < 1 or page_number_1based > self.page_count():
+            return ""
+        return self._reader.pages[page_number_1based - 1].extract_text() or ""
+
+    def close(self) -> None:
+        pass
+
+
+class PdfiumExtractor:
+    """
+    PDFium via the optional `pypdfium2` package (fast C text extraction).
+    """
+
+    name = "pdfium"
+
+    def __init__(self, pdf_path: Path):
+        import pypdfium2 as pdfium
+
+        self._doc = pdfium.PdfDocument(str(pdf_path))
+
+    def page_count(self) -> int:
+        return len(self._doc)
+
+    def extract_page(self, page_number_1based: int) -> str:
+        if page_number_1based < 1 or page_number_1based > self.page_count():
+            return ""
+        page = self._doc[page_number_1based - 1]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range() or ""
+        finally:
+            textpage.close()
+            page.close()
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+class PymupdfExtractor:
+    """
+    MuPDF via the optional `pymupdf` package.
+    """
+
+    name = "pymupdf"
+
+    def __init__(self, pdf_path: Path):
+        import pymupdf
+
+        self._doc = pymupdf.open(str(pdf_path))
+
+    def page_count(self) -> int:
+        return self._doc.page_count
+
+    def extract_page(self, page_number_1based: int) -> str:
+        if page_number_1based < 1 or page_number_1based > self.page_count():
+            return ""
+        return self._doc[page_number_1based - 1].get_text("text") or ""
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+EXTRACTORS: dict[str, type] = {
+    "pypdf": PypdfExtractor,
+    "pdfium": PdfiumExtractor,
+    "pymupdf": PymupdfExtractor,
+}
+
+
+def open_extractor(pdf_path: Path, backend: str = "pypdf") -> TextExtractor:
+    """
+    Open a document with the named text-extraction backend.
+    Raises ValueError for unknown backends or when the optional package is missing.
+    """
+    cls = EXTRACTORS.get(backend)
+    if cls is None:
+        raise ValueError(f"Unknown PDF extractor {backend!r} (expected one of {sorted(EXTRACTORS)})")
+    try:
+        return cls(pdf_path)
+    except ImportError as e:
+        raise ValueError(f"PDF extractor {backend!r} is not installed ({e.name})") from e
+
+
+def available_extractors() -> list[str]:
+    out = []
+    for name, module in (("pypdf", "pypdf"), ("pdfium", "pypdfium2"), ("pymupdf", "pymupdf")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        out.append(name)
+    return out
@@ -0,0 +1,4 @@
+from sailrag.app import create_app
+
+# Ingestion service: PDF extraction, OCR, chunking, embedding and indexing routes
+app = create_app(["ingest"])
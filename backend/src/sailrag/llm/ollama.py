@@ -1,7 +1,65 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+
 import httpx
 
+from sailrag.serialization import dumps, loads
+
+
+@dataclass(frozen=True)
+class Generation:
+    response: str
+    prompt_eval_count: int = 0
+    prompt_eval_s: float = 0.0
+    eval_count: int = 0
+    eval_s: float = 0.0
+    done_reason: str = ""
+    # Token ids of prompt + answer; passed back as `context` to continue the conversation
+    context: list[int] = field(default_factory=list)
+    endpoint: str = ""  # Ollama URL that served it
+
+
+async def generate_ollama_result(
+    ollama_url: str,
+    model: str,
+    prompt: str,
+    timeout_s: float = 120.0,
+    num_predict: int | None = None,
+    context: list[int] | None = None,
+) -> Generation:
+    """
+    Non-streaming generation, with Ollama's token counts and timings.
+    `num_predict` caps the answer length (tokens). `context` (from an earlier
+    Generation) continues that exchange: only `prompt` is new to the model.
+    """
+    options: dict = {"temperature": 0.2}
+    if num_predict is not None:
+        options["num_predict"] = num_predict
+    body: dict = {"model": model, "prompt": prompt, "stream": False, "options": options}
+    if context:
+        body["context"] = context
+
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        r = await client.post(
+            f"{ollama_url}/api/generate",
+            content=dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        r.raise_for_status()
+        data = loads(r.content)
+
+    return Generation(
+        response=data.get("response", ""),
+        prompt_eval_count=int(data.get("prompt_eval_count") or 0),
+        prompt_eval_s=(data.get("prompt_eval_duration") or 0) / 1e9,
+        eval_count=int(data.get("eval_count") or 0),
+        eval_s=(data.get("eval_duration") or 0) / 1e9,
+        done_reason=data.get("done_reason", ""),
+        context=data.get("context") or [],
+        endpoint=ollama_url,
+    )
+
 
 async def generate_ollama(
     ollama_url: str,
@@ -12,18 +70,17 @@ async def generate_ollama(
     """
     Simple non-streaming generation.
     """
+    result = await generate_ollama_result(ollama_url, model, prompt, timeout_s=timeout_s)
+    return result.response
+
+
+async def load_model_ollama(ollama_url: str, model: str, timeout_s: float = 300.0) -> None:
+    """
+    Load a model into Ollama's memory without generating (empty prompt).
+    """
     async with httpx.AsyncClient(timeout=timeout_s) as client:
         r = await client.post(
             f"{ollama_url}/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.2,
-                },
-            },
+            json={"model": model, "prompt": "", "stream": False},
         )
         r.raise_for_status()
-        data = r.json()
-        return data.get("response", "")
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+# An endpoint without the model in memory counts as this many extra outstanding
+# requests: loading a model costs seconds, so a busier warm replica usually wins
+COLD_MODEL_PENALTY = 2
+
+# Errors that mean "this endpoint is down", not "this request was slow"
+_DOWN_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+def _canonical(model: str) -> str:
+    # Ollama reports "name:tag"; a bare name means ":latest"
+    return model if ":" in model else f"{model}:latest"
+
+
+def parse_urls(urls: str, fallback: str) -> list[str]:
+    """
+    Comma-separated endpoint list (trailing slashes dropped); `fallback` when empty.
+    """
+    out = [u.strip().rstrip("/") for u in urls.split(",") if u.strip()]
+    return list(dict.fromkeys(out)) or [fallback.rstrip("/")]
+
+
+@dataclass
+class Endpoint:
+    url: str
+    outstanding: int = 0
+    healthy: bool = True
+    installed: set[str] = field(default_factory=set)  # /api/tags
+    loaded: set[str] = field(default_factory=set)  # /api/ps (models in memory)
+    requests: int = 0
+    failures: int = 0
+    last_error: str = ""
+    checked_at: float = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "loaded": sorted(self.loaded),
+        }
+
+
+class EndpointPool:
+    """
+    Ollama replicas serving one kind of work (embeddings or generation).
+
+    Each call goes to the healthy endpoint with the fewest outstanding requests,
+    preferring endpoints that have the model loaded. An endpoint that refuses
+    connections is marked down (and the call retried elsewhere) until the
+    background health check sees it answer again; the same check refreshes
+    which models every endpoint has installed and loaded.
+
+    `hedged()` sends a duplicate to a second endpoint when the first hasn't
+    answered within the pool's recent p95 latency, and keeps whichever finishes
+    first: for short idempotent calls (embeddings) this cuts the tail caused by
+    one slow or stalled replica, at the cost of ~5% extra requests.
+    """
+
+    def __init__(self, name: str, urls: list[str], health_interval_s: float = 10.0, hedge_min_ms: float = 20.0):
+        if not urls:
+            raise ValueError(f"Ollama pool {name!r} needs at least one URL")
+        self.name = name
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.health_interval_s = health_interval_s
+        self.hedge_min_s = hedge_min_ms / 1000
+        self.latencies_s: deque[float] = deque(maxlen=512)
+        self._rr = itertools.count()
+        self._health_task: asyncio.Task | None = None
+
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    # --- routing ----------------------------------------------------------------
+
+    def pick(
+        self,
+        model: str | None = None,
+        exclude: set[str] | frozenset = frozenset(),
+        prefer: str | None = None,
+    ) -> Endpoint:
+        """
+        Least-outstanding healthy endpoint (round-robin among ties, but `prefer`
+        wins a tie). If every endpoint is down, all are candidates: better to try
+        than to fail outright.
+        """
+        candidates = [e for e in self.endpoints if e.url not in exclude]
+        if not candidates:
+            raise RuntimeError(f"No Ollama endpoint left in pool {self.name!r}")
+        healthy = [e for e in candidates if e.healthy] or candidates
+        start = next(self._rr)
+        n = len(healthy)
+        model = _canonical(model) if model else None
+
+        def load(i: int) -> tuple[int, bool, int]:
+            e = healthy[(start + i) % n]
+            cold = model is not None and bool(e.loaded or e.installed) and model not in e.loaded
+            return e.outstanding + (COLD_MODEL_PENALTY if cold else 0), e.url != prefer, i
+
+        return healthy[(start + min(range(n), key=load)) % n]
+
+    async def _run(self, ep: Endpoint, fn: Callable[[str], Awaitable[T]], model: str | None) -> T:
+        ep.outstanding += 1
+        ep.requests += 1
+        t0 = time.monotonic()
+        try:
+            result = await fn(ep.url)
+        except _DOWN_ERRORS as e:
+            ep.healthy = False
+            ep.failures += 1
+            ep.last_error = f"{type(e).__name__}: {e}"
+            raise
+        except httpx.HTTPStatusError as e:
+            ep.failures += 1
+            ep.last_error = f"HTTP {e.response.status_code}"
+            raise
+        finally:
+            ep.outstanding -= 1
+        self.latencies_s.append(time.monotonic() - t0)
+        if model:
+            ep.loaded.add(_canonical(model))  # Ollama keeps a model it just served in memory
+        return result
+
+    async def call(
+        self,
+        fn: Callable[[str], Awaitable[T]],
+        model: str | None = None,
+        prefer: str | None = None,
+    ) -> T:
+        """
+        Run `fn(url)` on the least-loaded endpoint; on a connection failure (nothing
+        was processed), retry on the next endpoint. `prefer` is taken when no other
+        endpoint is less loaded (e.g. the replica holding a conversation's KV cache).
+        """
+        tried: set[str] = set()
+        while True:
+            ep = self.pick(model, exclude=tried, prefer=prefer)
+            tried.add(ep.url)
+            try:
+                return await self._run(ep, fn, model)
+            except _DOWN_ERRORS:
+                if len(tried) >= len(self.endpoints):
+                    raise
+                self.failovers += 1
+
+    def hedge_delay_s(self) -> float:
+        if len(self.latencies_s) < 20:
+            return max(self.hedge_min_s, 1.0)
+        ordered = sorted(self.latencies_s)
+        return max(self.hedge_min_s, ordered[int(0.95 * (len(ordered) - 1))])
+
+    async def hedged(self, fn: Callable[[str], Awaitable[T]], model: str | None = None) -> T:
+        """
+        `call()` with a backup request to a second endpoint after `hedge_delay_s()`.
+        Only for idempotent calls.
+        """
+        if len(self.endpoints) < 2:
+            return await self.call(fn, model)
+
+        first_ep = self.pick(model)
+        first = asyncio.ensure_future(self._run(first_ep, fn, model))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_delay_s())
+            if done and not isinstance(first.exception(), _DOWN_ERRORS):
+                return first.result()
+            if done:
+                # Primary is down: plain failover
+                self.failovers += 1
+                return await self.call(fn, model)
+
+            backup_ep = self.pick(model, exclude={first_ep.url})
+            if backup_ep.outstanding > first_ep.outstanding:
+                return await first  # every alternative is busier; a hedge would just add load
+            self.hedges += 1
+            backup = asyncio.ensure_future(self._run(backup_ep, fn, model))
+            tasks.append(backup)
+            pending = {first, backup}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both failed: surface the primary's error
+            return first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    # --- health -----------------------------------------------------------------
+
+    async def check_health(self, timeout_s: float = 3.0) -> None:
+        async def check(ep: Endpoint) -> None:
+            try:
+                async with httpx.AsyncClient(timeout=timeout_s) as client:
+                    tags, ps = await asyncio.gather(client.get(f"{ep.url}/api/tags"), client.get(f"{ep.url}/api/ps"))
+                tags.raise_for_status()
+                ep.installed = {_canonical(m["name"]) for m in tags.json().get("models", [])}
+                ep.loaded = (
+                    {_canonical(m["name"]) for m in ps.json().get("models", [])} if ps.status_code == 200 else set()
+                )
+                ep.healthy = True
+            except Exception as e:
+                ep.healthy = False
+                ep.last_error = f"{type(e).__name__}: {e}"
+            ep.checked_at = time.time()
+
+        await asyncio.gather(*(check(ep) for ep in self.endpoints))
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval_s)
+
+    def start(self) -> None:
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+    @property
+    def healthy(self) -> bool:
+        return any(e.healthy for e in self.endpoints)
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": [e.stats() for e in self.endpoints],
+            "hedge_delay_ms": round(1000 * self.hedge_delay_s(), 1),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+        }
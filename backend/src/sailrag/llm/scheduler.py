@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class SchedulerOverloaded(Exception):
+    """
+    Raised when a generation is not admitted: reason "queue_full", "preempted",
+    "queue_timeout", or "deadline" (the caller's own timeout ran out first).
+    """
+
+    def __init__(self, reason: str, retry_after_s: float):
+        super().__init__(f"LLM overloaded ({reason}); retry after ~{retry_after_s:.0f}s")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class GenerationScheduler:
+    """
+    Admission control for LLM generation.
+
+    - `slots` generations run concurrently (match Ollama's OLLAMA_NUM_PARALLEL)
+    - at most `max_queue` requests wait, served by priority then arrival order;
+      when the queue is full, a higher-priority arrival takes the place of the
+      newest lower-priority waiter (which fails with "preempted"), so a backlog
+      of batch work never turns interactive requests away
+    - a full queue, or waiting longer than `queue_timeout_s`, fails fast with
+      SchedulerOverloaded carrying a Retry-After estimate
+    - wait estimates use an EWMA of observed generation durations
+    """
+
+    def __init__(
+        self,
+        slots: int = 1,
+        max_queue: int = 16,
+        queue_timeout_s: float = 60.0,
+        initial_duration_s: float = 20.0,
+        ewma_alpha: float = 0.2,
+    ):
+        self.slots = max(1, slots)
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.ewma_alpha = ewma_alpha
+        self.avg_duration_s = initial_duration_s
+
+        self._active = 0
+        self._heap: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._waiting = {p: 0 for p in PRIORITIES.values()}
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.preempted = 0
+        self.completed = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(self._waiting.values())
+
+    def estimate_wait_s(self, priority: str = "normal") -> float:
+        """
+        Expected queue time for a request arriving now at `priority`.
+        """
+        if self._active < self.slots and self.queued == 0:
+            return 0.0
+        p = PRIORITIES[priority]
+        ahead = sum(n for q, n in self._waiting.items() if q <= p)
+        return (ahead // self.slots + 1) * self.avg_duration_s
+
+    def _retry_after_s(self) -> float:
+        return max(1.0, math.ceil(self.queued / self.slots) * self.avg_duration_s)
+
+    def _has_room(self, p: int) -> bool:
+        return self.queued < self.max_queue or any(n for q, n in self._waiting.items() if q > p)
+
+    def check_admission(self, priority: str = "normal") -> None:
+        """
+        Cheap pre-check so callers can shed load before doing retrieval work.
+        """
+        if not self._has_room(PRIORITIES[priority]):
+            self.rejected += 1
+            raise SchedulerOverloaded("queue_full", self._retry_after_s())
+
+    def _preempt(self, p: int) -> None:
+        """
+        Make room for an arrival at priority `p`: fail the newest waiter of the
+        lowest priority below it.
+        """
+        lowest = max(q for q, n in self._waiting.items() if n)
+        _, _, fut = max(
+            ((q, seq, f) for q, seq, f in self._heap if q == lowest and not f.done()),
+            key=lambda e: e[1],
+        )
+        self._waiting[lowest] -= 1
+        self.preempted += 1
+        fut.set_exception(SchedulerOverloaded("preempted", self._retry_after_s()))
+
+    async def _acquire(self, priority: str, timeout_s: float | None = None) -> None:
+        p = PRIORITIES[priority]
+        if self._active < self.slots and self.queued == 0:
+            self._active += 1
+            return
+
+        if not self._has_room(p):
+            self.rejected += 1
+            raise SchedulerOverloaded("queue_full", self._retry_after_s())
+        if self.queued >= self.max_queue:
+            self._preempt(p)
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (p, next(self._seq), fut))
+        self._waiting[p] += 1
+        deadline_bound = timeout_s is not None and timeout_s < self.queue_timeout_s
+        wait_s = timeout_s if deadline_bound else self.queue_timeout_s
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if not fut.done():
+                fut.cancel()
+                self._waiting[p] -= 1
+            elif not fut.cancelled() and fut.exception() is None:
+                # A slot was handed over just as we gave up: pass it on
+                self._release()
+            # else: preempted just as we gave up, already off the queue
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                reason = "deadline" if deadline_bound else "queue_timeout"
+                raise SchedulerOverloaded(reason, self._retry_after_s()) from None
+            raise
+
+    def _release(self) -> None:
+        while self._heap:
+            p, _, fut = heapq.heappop(self._heap)
+            if fut.done():
+                continue  # waiter gave up
+            self._waiting[p] -= 1
+            fut.set_result(None)  # slot transferred, _active unchanged
+            return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "normal", timeout_s: float | None = None) -> AsyncIterator[None]:
+        """
+        Hold a generation slot. `timeout_s` shortens the queue wait (e.g. to a request deadline).
+        """
+        await self._acquire(priority, timeout_s)
+        self.admitted += 1
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - t0
+            self.avg_duration_s += self.ewma_alpha * (elapsed - self.avg_duration_s)
+            self.completed += 1
+            self._release()
+
+    def metrics(self) -> dict:
+        names = {v: k for k, v in PRIORITIES.items()}
+        return {
+            "slots": self.slots,
+            "active": self._active,
+            "queued": self.queued,
+            "queued_by_priority": {names[p]: n for p, n in self._waiting.items()},
+            "max_queue": self.max_queue,
+            "avg_generation_s": round(self.avg_duration_s, 3),
+            "estimated_wait_s": round(self.estimate_wait_s("normal"), 3),
+            "admitted_total": self.admitted,
+            "completed_total": self.completed,
+            "rejected_total": self.rejected,
+            "timed_out_total": self.timed_out,
+            "preempted_total": self.preempted,
+        }
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sailrag.opensearch.search import SearchHit
+
+# Bumped after every write to the index (an ingest's chunks, citations and summaries;
+# index creation).
+# Cache keys embed it, so entries from before a write are never served again.
+_index_generation = 0
+
+
+def index_generation() -> int:
+    return _index_generation
+
+
+def bump_index_generation() -> int:
+    global _index_generation
+    _index_generation += 1
+    return _index_generation
+
+
+@dataclass(frozen=True)
+class RetrievalEntry:
+    bm25_hits: list[SearchHit]
+    knn_hits: list[SearchHit]
+    created_at: float
+
+
+class RetrievalCache:
+    """
+    Bounded LRU of raw BM25/kNN hit lists per (index, generation, query, k, filters).
+
+    Raw lists are cached rather than fused ones, so requests differing only in
+    w_bm25/w_knn are served by re-fusing without touching Ollama or OpenSearch.
+    The TTL bounds staleness for writes made by other worker processes, whose
+    generation bumps this process doesn't see.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[tuple, RetrievalEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(index_name: str, query: str, k: int, filters_key: tuple = ()) -> tuple:
+        return (index_name, index_generation(), query, k, filters_key)
+
+    def get(self, key: tuple) -> RetrievalEntry | None:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry.created_at > self.ttl_s:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, bm25_hits: list[SearchHit], knn_hits: list[SearchHit]) -> None:
+        self._entries[key] = RetrievalEntry(bm25_hits, knn_hits, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
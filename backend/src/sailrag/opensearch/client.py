@@ -1,27 +1,83 @@
 from __future__ import annotations
 
-import json
 import httpx
 
+from sailrag.serialization import dumps, loads
+
 
 async def bulk_index(opensearch_url: str, index_name: str, docs: list[dict]) -> dict:
     """
     Bulk index documents. Each doc must contain an 'id' key used as _id.
+    Returns once the documents are visible to search (refresh=wait_for).
     """
     lines = []
     for d in docs:
         doc_id = d.pop("id")
-        lines.append(json.dumps({"index": {"_index": index_name, "_id": doc_id}}))
-        lines.append(json.dumps(d))
+        lines.append(dumps({"index": {"_index": index_name, "_id": doc_id}}))
+        lines.append(dumps(d))
+
+    payload = b"\n".join(lines) + b"\n"
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        r = await client.post(
+            f"{opensearch_url}/_bulk",
+            content=payload,
+            headers={"Content-Type": "application/x-ndjson"},
+            params={"refresh": "wait_for"},
+        )
+        r.raise_for_status()
+        data = loads(r.content)
+        return {"errors": data.get("errors", False), "items": len(data.get("items", []))}
+
+
+_APPEND_CITATIONS_SCRIPT = """
+if (ctx._source.citations == null) { ctx._source.citations = []; }
+for (c in params.citations) {
+  boolean found = false;
+  for (e in ctx._source.citations) {
+    if (e.chunk_id == c.chunk_id) { found = true; break; }
+  }
+  if (!found) { ctx._source.citations.add(c); }
+}
+"""
+
+
+async def bulk_append_citations(
+    opensearch_url: str,
+    index_name: str,
+    citations_by_id: dict[str, list[dict]],
+) -> dict:
+    """
+    Append citations (deduplicated by chunk_id) to already indexed chunks, keyed by _id.
+    Returns once the updates are visible to search (refresh=wait_for).
+    """
+    if not citations_by_id:
+        return {"errors": False, "items": 0}
+
+    lines = []
+    for doc_id, citations in citations_by_id.items():
+        lines.append(dumps({"update": {"_index": index_name, "_id": doc_id}}))
+        lines.append(
+            dumps(
+                {
+                    "script": {
+                        "source": _APPEND_CITATIONS_SCRIPT,
+                        "lang": "painless",
+                        "params": {"citations": citations},
+                    }
+                }
+            )
+        )
 
-    payload = "\n".join(lines) + "\n"
+    payload = b"\n".join(lines) + b"\n"
 
     async with httpx.AsyncClient(timeout=60.0) as client:
         r = await client.post(
             f"{opensearch_url}/_bulk",
             content=payload,
             headers={"Content-Type": "application/x-ndjson"},
+            params={"refresh": "wait_for"},
         )
         r.raise_for_status()
-        data = r.json()
+        data = loads(r.content)
         return {"errors": data.get("errors", False), "items": len(data.get("items", []))}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import math
+import re
+
+import httpx
+
+# Collection names become part of an index name: lowercase, no separators OpenSearch reserves
+_COLLECTION_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+# Refers to the base index itself (documents ingested without a collection)
+DEFAULT_COLLECTION = "default"
+
+
+def validate_collection(name: str) -> str:
+    if not _COLLECTION_RE.match(name):
+        raise ValueError(f"Invalid collection name {name!r} (lowercase letters, digits, '-' and '_')")
+    return name
+
+
+def collection_index(base_index: str, collection: str | None) -> str:
+    """
+    Index holding one collection: `<base>-<collection>`; no collection -> the base index.
+    """
+    if not collection or collection == DEFAULT_COLLECTION:
+        return base_index
+    return f"{base_index}-{validate_collection(collection)}"
+
+
+def search_target(base_index: str, collections: list[str] | None) -> str:
+    """
+    Index expression for a query: the named collections (comma-joined, deduplicated,
+    sorted so it is a stable cache key), or every collection via `<base>*`.
+    """
+    if not collections:
+        return f"{base_index}*"
+    return ",".join(sorted({collection_index(base_index, c) for c in collections}))
+
+
+def shards_for_collection(expected_chunks: int, chunks_per_shard: int, max_shards: int) -> int:
+    """
+    Primary shard count for a collection of `expected_chunks` chunks: small collections
+    stay on one shard (one HNSW graph per query); large ones are split so each
+    shard's graph stays around `chunks_per_shard` vectors and is searched in parallel.
+    """
+    if expected_chunks <= 0 or chunks_per_shard <= 0:
+        return 1
+    return max(1, min(max_shards, math.ceil(expected_chunks / chunks_per_shard)))
+
+
+async def list_collections(opensearch_url: str, base_index: str, timeout_s: float = 10.0) -> list[dict]:
+    """
+    Collections (indices matching `<base>*`) with document count, size and shard count.
+    """
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        r = await client.get(
+            f"{opensearch_url}/_cat/indices/{base_index}*",
+            params={"format": "json", "h": "index,docs.count,store.size,pri", "bytes": "b"},
+        )
+        r.raise_for_status()
+        rows = r.json()
+
+    out = []
+    for row in rows:
+        index = row.get("index", "")
+        if index == base_index:
+            name = DEFAULT_COLLECTION
+        elif index.startswith(base_index + "-"):
+            name = index[len(base_index) + 1 :]
+        else:
+            continue
+        out.append(
+            {
+                "collection": name,
+                "index": index,
+                "docs": int(row.get("docs.count") or 0),
+                "size_bytes": int(row.get("store.size") or 0),
+                "shards": int(row.get("pri") or 0),
+            }
+        )
+    return sorted(out, key=lambda c: c["collection"])
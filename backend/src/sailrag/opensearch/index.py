@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import httpx
 
+from sailrag.opensearch.cache import bump_index_generation
 
-def build_index_body(embedding_dim: int) -> dict:
+
+def build_index_body(embedding_dim: int, shards: int | None = None) -> dict:
+    index_settings: dict = {"knn": True}
+    if shards is not None:
+        index_settings["number_of_shards"] = shards
     return {
         "settings": {
-            "index": {
-                "knn": True,
-                "knn.algo_param.ef_search": 100,
-            }
+            "index": index_settings,
         },
         "mappings": {
             "properties": {
@@ -18,14 +20,26 @@ def build_index_body(embedding_dim: int) -> dict:
                 "page_number": {"type": "integer"},
                 "tags": {"type": "keyword"},
                 "text": {"type": "text"},  # BM25
+                # near-duplicate detection (SimHash fingerprint + LSH band keys)
+                "simhash": {"type": "keyword", "index": False},
+                "simhash_bands": {"type": "keyword"},
+                "citations": {
+                    "properties": {
+                        "doc_id": {"type": "keyword"},
+                        "page_number": {"type": "integer"},
+                        "chunk_id": {"type": "keyword"},
+                    }
+                },
                 "embedding": {
                     "type": "knn_vector",
                     "dimension": embedding_dim,
+                    # faiss supports efficient (in-graph) filtering; vectors are stored
+                    # L2-normalized so inner product ranks like cosine similarity
                     "method": {
                         "name": "hnsw",
-                        "space_type": "cosinesimil",
-                        "engine": "nmslib",
-                        "parameters": {"ef_construction": 128, "m": 16},
+                        "space_type": "innerproduct",
+                        "engine": "faiss",
+                        "parameters": {"ef_construction": 128, "m": 16, "ef_search": 100},
                     },
                 },
             }
@@ -33,8 +47,17 @@ def build_index_body(embedding_dim: int) -> dict:
     }
 
 
-async def ensure_index(opensearch_url: str, index_name: str, embedding_dim: int) -> dict:
-    body = build_index_body(embedding_dim)
+async def ensure_index(
+    opensearch_url: str,
+    index_name: str,
+    embedding_dim: int,
+    shards: int | None = None,
+) -> dict:
+    """
+    Create the index if missing. `shards` only applies at creation (primary shard
+    count is fixed for the life of an index).
+    """
+    body = build_index_body(embedding_dim, shards)
 
     async with httpx.AsyncClient(timeout=30.0) as client:
         # Check if exists
@@ -45,4 +68,5 @@ async def ensure_index(opensearch_url: str, index_name: str, embedding_dim: int)
         # Create
         r = await client.put(f"{opensearch_url}/{index_name}", json=body)
         r.raise_for_status()
-        return {"status": "created", "index": index_name}
+        bump_index_generation()
+        return {"status": "created", "index": index_name, "shards": shards or 1}
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import httpx
+
+from sailrag.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+
+async def warmup_knn(
+    opensearch_url: str,
+    index_expr: str,
+    refresh: bool = False,
+    timeout_s: float = 300.0,
+) -> dict:
+    """
+    Load the HNSW graphs of every segment of `index_expr` into the k-NN plugin's
+    native memory (GET /_plugins/_knn/warmup/<indices>), so that the first queries
+    don't load them. Blocks until loaded. With `refresh`, the index is refreshed
+    first so that just-indexed documents are in a segment that gets warmed too.
+    Returns the shard counts.
+    """
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        if refresh:
+            r = await client.post(f"{opensearch_url}/{index_expr}/_refresh")
+            r.raise_for_status()
+        r = await client.get(f"{opensearch_url}/_plugins/_knn/warmup/{index_expr}")
+        r.raise_for_status()
+        shards = loads(r.content).get("_shards") or {}
+    return {
+        "total": int(shards.get("total") or 0),
+        "successful": int(shards.get("successful") or 0),
+        "failed": int(shards.get("failed") or 0),
+    }
+
+
+def summarize_knn_stats(data: dict) -> dict:
+    """
+    Cluster-wide view of GET /_plugins/_knn/stats. Memory is in KB; its percentage
+    (of the k-NN cache / circuit-breaker limit) is the highest of any node.
+    """
+    nodes = list((data.get("nodes") or {}).values())
+
+    def total(key: str) -> int:
+        return sum(int(n.get(key) or 0) for n in nodes)
+
+    indices: dict[str, dict] = {}
+    for n in nodes:
+        for name, idx in (n.get("indices_in_cache") or {}).items():
+            agg = indices.setdefault(name, {"graph_memory_kb": 0, "graph_count": 0})
+            agg["graph_memory_kb"] += int(idx.get("graph_memory_usage") or 0)
+            agg["graph_count"] += int(idx.get("graph_count") or 0)
+
+    hits, misses = total("hit_count"), total("miss_count")
+    return {
+        "circuit_breaker_triggered": bool(data.get("circuit_breaker_triggered")),
+        "nodes": len(nodes),
+        "graph_memory_kb": total("graph_memory_usage"),
+        "graph_memory_pct": round(
+            max((float(n.get("graph_memory_usage_percentage") or 0.0) for n in nodes), default=0.0), 2
+        ),
+        "cache_capacity_reached": any(n.get("cache_capacity_reached") for n in nodes),
+        "cache_hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "evictions": total("eviction_count"),
+        "load_failures": total("load_exception_count"),
+        "indices": indices,
+    }
+
+
+async def knn_stats(opensearch_url: str, timeout_s: float = 5.0) -> dict:
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        r = await client.get(f"{opensearch_url}/_plugins/_knn/stats")
+        r.raise_for_status()
+        return summarize_knn_stats(loads(r.content))
+
+
+def knn_state(stats: dict | None, memory_warn_pct: float) -> str:
+    """
+    "ok", "near_limit" (graph memory past `memory_warn_pct` of the limit, or the
+    cache is full and evicting), "breaker_tripped" (new graphs can't be loaded:
+    kNN queries fail or crawl) or "unknown".
+    """
+    if stats is None:
+        return "unknown"
+    if stats["circuit_breaker_triggered"]:
+        return "breaker_tripped"
+    if stats["cache_capacity_reached"] or stats["graph_memory_pct"] >= memory_warn_pct:
+        return "near_limit"
+    return "ok"
+
+
+class KnnWarmer:
+    """
+    Keeps k-NN graphs in native memory, so cold-graph loads (after an OpenSearch
+    restart, new segments from ingest, merged segments) happen here rather than
+    in a user's query.
+
+    `schedule()` requests a warm-up of some indices; requests made while one runs
+    are coalesced into the next call. When started as `periodic`, the loop also
+    warms `default_target` at start and every `interval_s`, but only while the
+    k-NN memory state is "ok" (loading every graph near the limit would evict
+    hot ones or trip the circuit breaker). After each round it refreshes the
+    plugin's memory / cache / circuit-breaker stats, logging when they approach
+    the limit.
+    """
+
+    def __init__(
+        self,
+        opensearch_url: str,
+        default_target: str,
+        interval_s: float = 300.0,
+        memory_warn_pct: float = 80.0,
+    ):
+        self.opensearch_url = opensearch_url
+        self.default_target = default_target
+        self.interval_s = interval_s
+        self.memory_warn_pct = memory_warn_pct
+        self._pending: dict[str, bool] = {}  # index expression -> refresh first
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.periodic = True
+
+        self.warmups = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_warmup: dict | None = None
+        self.last_error = ""
+        self.last_stats: dict | None = None
+        self.stats_at = 0.0
+
+    def schedule(self, index_expr: str | None = None, refresh: bool = False) -> None:
+        target = index_expr or self.default_target
+        self._pending[target] = self._pending.get(target, False) or refresh
+        self._wake.set()
+
+    async def warm(self, index_expr: str, refresh: bool = False) -> dict | None:
+        t0 = time.monotonic()
+        try:
+            shards = await warmup_knn(self.opensearch_url, index_expr, refresh=refresh)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"warm-up {index_expr}: {type(e).__name__}: {e}"
+            logger.warning("k-NN warm-up of %s failed: %s", index_expr, e)
+            return None
+        self.warmups += 1
+        self.last_warmup = {
+            "target": index_expr,
+            "shards": shards,
+            "ms": round(1000 * (time.monotonic() - t0), 1),
+            "at": time.time(),
+        }
+        return shards
+
+    async def refresh_stats(self) -> dict | None:
+        try:
+            stats = await knn_stats(self.opensearch_url)
+        except Exception as e:
+            self.last_error = f"stats: {type(e).__name__}: {e}"
+            return None
+        self.last_stats, self.stats_at = stats, time.time()
+
+        state = knn_state(stats, self.memory_warn_pct)
+        if state == "breaker_tripped":
+            logger.error("k-NN circuit breaker tripped (graph memory %s KB)", stats["graph_memory_kb"])
+        elif state == "near_limit":
+            logger.warning(
+                "k-NN graph memory at %.1f%% of the limit (%s KB, %s evictions)",
+                stats["graph_memory_pct"], stats["graph_memory_kb"], stats["evictions"],
+            )
+        return stats
+
+    async def _loop(self) -> None:
+        if self.periodic:
+            self.schedule()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), (self.periodic and self.interval_s) or None)
+            except asyncio.TimeoutError:
+                self.schedule()
+            self._wake.clear()
+            pending, self._pending = self._pending, {}
+            if self.default_target in pending:
+                state = knn_state(await self.refresh_stats(), self.memory_warn_pct)
+                if state != "ok":
+                    del pending[self.default_target]
+                    self.skipped += 1
+                    logger.warning("Skipping k-NN warm-up of %s: memory state is %s", self.default_target, state)
+            for refresh in (True, False):
+                targets = sorted(t for t, r in pending.items() if r == refresh)
+                if targets:
+                    await self.warm(",".join(targets), refresh=refresh)
+            await self.refresh_stats()
+
+    def start(self, periodic: bool = True) -> None:
+        """
+        Run the loop; without `periodic`, only `schedule()`d warm-ups are done.
+        """
+        self.periodic = periodic
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "state": knn_state(self.last_stats, self.memory_warn_pct),
+            "warmups": self.warmups,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_warmup": self.last_warmup,
+            "last_error": self.last_error,
+            "stats_at": self.stats_at,
+            "knn": self.last_stats,
+        }
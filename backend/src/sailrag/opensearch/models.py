@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field, model_validator
+
+
+class SearchFilters(BaseModel):
+    """
+    Metadata filters pushed down into OpenSearch (BM25 bool filter + kNN efficient filter).
+    """
+
+    doc_ids: list[str] = Field(default_factory=list)
+    page_min: int | None = Field(None, ge=1)
+    page_max: int | None = Field(None, ge=1)
+    tags: list[str] = Field(default_factory=list)  # keep chunks having ANY of these tags
+    exclude_tags: list[str] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def _check_page_range(self) -> "SearchFilters":
+        if self.page_min is not None and self.page_max is not None and self.page_min > self.page_max:
+            raise ValueError("page_min must be <= page_max")
+        return self
+
+    def is_empty(self) -> bool:
+        return not (self.doc_ids or self.page_min or self.page_max or self.tags or self.exclude_tags)
+
+    def cache_key(self) -> tuple:
+        return (
+            tuple(sorted(self.doc_ids)),
+            self.page_min,
+            self.page_max,
+            tuple(sorted(self.tags)),
+            tuple(sorted(self.exclude_tags)),
+        )
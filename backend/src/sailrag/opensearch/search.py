@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 import httpx
 
+from sailrag.embeddings.vectors import l2_normalize
+from sailrag.opensearch.models import SearchFilters
+from sailrag.serialization import dumps, loads
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class SearchHit:
     chunk_id: str
     doc_id: str
@@ -15,41 +19,137 @@ class SearchHit:
     text: str
     score: float
     source: str  # "bm25" or "knn" or "hybrid"
+    citations: list[dict] = field(default_factory=list)  # every (doc_id, page) this text appears at
 
 
-async def bm25_search(
-    opensearch_url: str,
-    index_name: str,
-    query: str,
-    k: int = 10,
-    timeout_s: float = 20.0,
-) -> list[SearchHit]:
-    body = {
+def _own_or_cited(query: str, field: str, value: Any) -> dict:
+    """
+    Match a chunk on its own location or on any of its `citations`: a chunk that
+    dedup merged into another document's chunk survives only as a citation.
+    """
+    return {
+        "bool": {
+            "should": [{query: {field: value}}, {query: {f"citations.{field}": value}}],
+            "minimum_should_match": 1,
+        }
+    }
+
+
+def build_filter_query(filters: SearchFilters | None) -> dict | None:
+    """
+    Bool query (filter context only, no scoring) for metadata filters, or None if empty.
+    Document and page filters also match chunks through their citations.
+    """
+    if filters is None or filters.is_empty():
+        return None
+
+    clauses: list[dict] = []
+    if filters.doc_ids:
+        clauses.append(_own_or_cited("terms", "doc_id", filters.doc_ids))
+    if filters.page_min is not None or filters.page_max is not None:
+        rng = {}
+        if filters.page_min is not None:
+            rng["gte"] = filters.page_min
+        if filters.page_max is not None:
+            rng["lte"] = filters.page_max
+        clauses.append(_own_or_cited("range", "page_number", rng))
+    if filters.tags:
+        clauses.append({"terms": {"tags": filters.tags}})
+
+    bool_q: dict = {"filter": clauses}
+    if filters.exclude_tags:
+        bool_q["must_not"] = [{"terms": {"tags": filters.exclude_tags}}]
+    return {"bool": bool_q}
+
+
+_HIT_SOURCE = ["chunk_id", "doc_id", "page_number", "tags", "text", "citations"]
+
+
+def build_bm25_body(query: str, k: int, filters: SearchFilters | None = None) -> dict:
+    match = {"match": {"text": {"query": query}}}
+    filter_q = build_filter_query(filters)
+    return {
         "size": k,
-        "_source": ["chunk_id", "doc_id", "page_number", "tags", "text"],
-        "query": {"match": {"text": {"query": query}}},
+        "_source": _HIT_SOURCE,
+        "query": {"bool": {"must": [match], **filter_q["bool"]}} if filter_q else match,
     }
 
-    async with httpx.AsyncClient(timeout=timeout_s) as client:
-        r = await client.post(f"{opensearch_url}/{index_name}/_search", json=body)
-        r.raise_for_status()
-        data = r.json()
 
-    hits = []
-    for h in data.get("hits", {}).get("hits", []):
-        src = h.get("_source", {})
-        hits.append(
+def build_knn_body(
+    query_vector: list[float],
+    k: int,
+    filters: SearchFilters | None = None,
+    restrict: dict | None = None,
+) -> dict:
+    """
+    Approximate kNN over 'embedding'. Filters are applied inside the HNSW search
+    (faiss efficient filtering), not as a post-filter over k results.
+    `restrict` is an extra filter clause (e.g. the regions of a coarse search).
+    """
+    knn: dict = {
+        # inner product on unit vectors == cosine similarity
+        "vector": l2_normalize(query_vector),
+        "k": k,
+    }
+    filter_q = build_filter_query(filters)
+    if filter_q and restrict:
+        knn["filter"] = {"bool": {"filter": [filter_q, restrict]}}
+    elif filter_q or restrict:
+        knn["filter"] = filter_q or restrict
+
+    return {
+        "size": k,
+        "_source": _HIT_SOURCE,
+        "query": {"knn": {"embedding": knn}},
+    }
+
+
+def parse_hits(data: dict, source: str) -> list[SearchHit]:
+    """
+    SearchHits straight from the parsed response: the lists orjson built are
+    kept as-is (no copies), and fields are passed positionally.
+    """
+    out = []
+    append = out.append
+    for h in (data.get("hits") or {}).get("hits") or ():
+        src = h.get("_source") or {}
+        get = src.get
+        append(
             SearchHit(
-                chunk_id=src.get("chunk_id", h.get("_id")),
-                doc_id=src.get("doc_id", ""),
-                page_number=int(src.get("page_number", 0) or 0),
-                tags=list(src.get("tags") or []),
-                text=src.get("text", ""),
-                score=float(h.get("_score") or 0.0),
-                source="bm25",
+                get("chunk_id") or h.get("_id"),
+                get("doc_id") or "",
+                int(get("page_number") or 0),
+                get("tags") or [],
+                get("text") or "",
+                float(h.get("_score") or 0.0),
+                source,
+                get("citations") or [],
             )
         )
-    return hits
+    return out
+
+
+async def _post_search(opensearch_url: str, index_name: str, body: dict, timeout_s: float) -> dict:
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        r = await client.post(
+            f"{opensearch_url}/{index_name}/_search",
+            content=dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        r.raise_for_status()
+        return loads(r.content)
+
+
+async def bm25_search(
+    opensearch_url: str,
+    index_name: str,
+    query: str,
+    k: int = 10,
+    timeout_s: float = 20.0,
+    filters: SearchFilters | None = None,
+) -> list[SearchHit]:
+    data = await _post_search(opensearch_url, index_name, build_bm25_body(query, k, filters), timeout_s)
+    return parse_hits(data, "bm25")
 
 
 async def knn_search(
@@ -58,40 +158,97 @@ async def knn_search(
     query_vector: list[float],
     k: int = 10,
     timeout_s: float = 30.0,
+    filters: SearchFilters | None = None,
+    restrict: dict | None = None,
 ) -> list[SearchHit]:
-    body = {
-        "size": k,
-        "_source": ["chunk_id", "doc_id", "page_number", "tags", "text"],
-        "query": {
-            "knn": {
-                "embedding": {
-                    "vector": query_vector,
-                    "k": k,
-                }
-            }
-        },
-    }
+    body = build_knn_body(query_vector, k, filters, restrict)
+    data = await _post_search(opensearch_url, index_name, body, timeout_s)
+    return parse_hits(data, "knn")
+
+
+async def hybrid_msearch(
+    opensearch_url: str,
+    index_name: str,
+    queries: list[str],
+    query_vectors: list[list[float]],
+    k: int = 10,
+    timeout_s: float = 60.0,
+    filters: SearchFilters | None = None,
+) -> list[tuple[list[SearchHit], list[SearchHit]]]:
+    """
+    BM25 + kNN for many queries in ONE _msearch round-trip.
+    Returns (bm25_hits, knn_hits) per query, in input order.
+    """
+    if len(queries) != len(query_vectors):
+        raise ValueError("queries and query_vectors must have the same length")
+    if not queries:
+        return []
+
+    header = dumps({"index": index_name})
+    lines = []
+    for q, vec in zip(queries, query_vectors):
+        lines.append(header)
+        lines.append(dumps(build_bm25_body(q, k, filters)))
+        lines.append(header)
+        lines.append(dumps(build_knn_body(vec, k, filters)))
+    payload = b"\n".join(lines) + b"\n"
 
     async with httpx.AsyncClient(timeout=timeout_s) as client:
-        r = await client.post(f"{opensearch_url}/{index_name}/_search", json=body)
+        r = await client.post(
+            f"{opensearch_url}/_msearch",
+            content=payload,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
         r.raise_for_status()
-        data = r.json()
+        data = loads(r.content)
 
-    hits = []
-    for h in data.get("hits", {}).get("hits", []):
-        src = h.get("_source", {})
-        hits.append(
-            SearchHit(
-                chunk_id=src.get("chunk_id", h.get("_id")),
-                doc_id=src.get("doc_id", ""),
-                page_number=int(src.get("page_number", 0) or 0),
-                tags=list(src.get("tags") or []),
-                text=src.get("text", ""),
-                score=float(h.get("_score") or 0.0),
-                source="knn",
-            )
-        )
-    return hits
+    responses = data.get("responses", [])
+    if len(responses) != 2 * len(queries):
+        raise RuntimeError(f"_msearch returned {len(responses)} responses for {2 * len(queries)} searches")
+
+    out = []
+    for i in range(len(queries)):
+        bm25_res, knn_res = responses[2 * i], responses[2 * i + 1]
+        for res in (bm25_res, knn_res):
+            if "error" in res:
+                raise RuntimeError(f"_msearch item failed: {res['error']}")
+        out.append((parse_hits(bm25_res, "bm25"), parse_hits(knn_res, "knn")))
+    return out
+
+
+async def find_by_simhash_bands(
+    opensearch_url: str,
+    index_name: str,
+    bands: list[str],
+    page_size: int = 1000,
+    timeout_s: float = 20.0,
+) -> list[dict]:
+    """
+    Candidate lookup for near-duplicate detection: every indexed chunk sharing any
+    SimHash band, paged with search_after (a truncated lookup would miss duplicates).
+    Returns their _source (fingerprint fields only) with "_id" added.
+    """
+    if not bands:
+        return []
+
+    body: dict = {
+        "size": page_size,
+        "_source": ["chunk_id", "doc_id", "simhash", "citations"],
+        "query": {"bool": {"filter": [{"terms": {"simhash_bands": bands}}]}},
+        "sort": [{"chunk_id": "asc"}],
+    }
+
+    out = []
+    while True:
+        data = await _post_search(opensearch_url, index_name, body, timeout_s)
+        hits = data.get("hits", {}).get("hits", [])
+        for h in hits:
+            src = h.get("_source", {})
+            if src.get("simhash"):
+                out.append({**src, "_id": h.get("_id")})
+        if len(hits) < page_size:
+            return out
+        body["search_after"] = hits[-1]["sort"]
 
 
 def _minmax_normalize(scores: list[float]) -> list[float]:
@@ -142,6 +299,7 @@ def fuse_hits(
                 text=base.text,
                 score=score,
                 source="hybrid",
+                citations=base.citations,
             )
         )
 
@@ -158,4 +316,5 @@ def to_dict(hit: SearchHit) -> dict[str, Any]:
         "score": hit.score,
         "source": hit.source,
         "text": hit.text,
+        "citations": hit.citations,
     }
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import httpx
+
+from sailrag.embeddings.vectors import l2_normalize
+from sailrag.opensearch.client import bulk_index
+from sailrag.opensearch.search import SearchHit, knn_search
+from sailrag.opensearch.models import SearchFilters
+from sailrag.serialization import dumps, loads
+
+LEVELS = ("page", "doc")
+
+
+def summary_index(base_index: str) -> str:
+    """
+    Index of page/document centroid vectors for every collection of `base_index`.
+    Named so that it does NOT match the `<base>*` chunk-search pattern.
+    """
+    return f"summaries-{base_index}"
+
+
+def build_summary_index_body(embedding_dim: int) -> dict:
+    return {
+        "settings": {"index": {"knn": True}},
+        "mappings": {
+            "properties": {
+                "level": {"type": "keyword"},  # "page" or "doc"
+                "chunk_index": {"type": "keyword"},  # index holding the chunks of this region
+                "doc_id": {"type": "keyword"},
+                "page_number": {"type": "integer"},  # 0 for documents
+                "chunks": {"type": "integer"},  # chunk vectors behind the centroid
+                "embedding": {
+                    "type": "knn_vector",
+                    "dimension": embedding_dim,
+                    "method": {
+                        "name": "hnsw",
+                        "space_type": "innerproduct",
+                        "engine": "faiss",
+                        "parameters": {"ef_construction": 128, "m": 16, "ef_search": 100},
+                    },
+                },
+            }
+        },
+    }
+
+
+async def ensure_summary_index(opensearch_url: str, base_index: str, embedding_dim: int) -> str:
+    index_name = summary_index(base_index)
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        r = await client.head(f"{opensearch_url}/{index_name}")
+        if r.status_code != 200:
+            r = await client.put(f"{opensearch_url}/{index_name}", json=build_summary_index_body(embedding_dim))
+            # Concurrent ingests may race to create it
+            if r.status_code != 400 or "resource_already_exists" not in r.text:
+                r.raise_for_status()
+    return index_name
+
+
+def _weighted_centroid(parts: list[tuple[list[float], int]]) -> list[float]:
+    dim = len(parts[0][0])
+    acc = [0.0] * dim
+    for vec, weight in parts:
+        for i, x in enumerate(vec):
+            acc[i] += x * weight
+    return l2_normalize(acc)
+
+
+async def _page_summaries(opensearch_url: str, index_name: str, chunk_index: str, doc_id: str) -> dict[int, dict]:
+    body = {
+        "size": 10000,
+        "_source": ["page_number", "chunks", "embedding"],
+        "query": {
+            "bool": {
+                "filter": [
+                    {"term": {"level": "page"}},
+                    {"term": {"chunk_index": chunk_index}},
+                    {"term": {"doc_id": doc_id}},
+                ]
+            }
+        },
+    }
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        r = await client.post(
+            f"{opensearch_url}/{index_name}/_search",
+            content=dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        r.raise_for_status()
+        data = loads(r.content)
+    return {int(h["_source"]["page_number"]): h["_source"] for h in data["hits"]["hits"]}
+
+
+async def _page_chunk_vectors(
+    opensearch_url: str, chunk_index: str, doc_id: str, page_numbers: list[int]
+) -> dict[int, list[list[float]]]:
+    """
+    Vectors of the chunks on each of the document's pages, counting chunks that
+    live on the page only as a citation (dedup merged them into another
+    document's chunk, which then counts towards both pages).
+    """
+    if not page_numbers:
+        return {}
+    body = {
+        "size": 10000,
+        "_source": ["doc_id", "page_number", "citations", "embedding"],
+        "query": {
+            "bool": {
+                "should": [
+                    {"bool": {"filter": [{"term": {"doc_id": doc_id}}, {"terms": {"page_number": page_numbers}}]}},
+                    {
+                        "bool": {
+                            "filter": [
+                                {"term": {"citations.doc_id": doc_id}},
+                                {"terms": {"citations.page_number": page_numbers}},
+                            ]
+                        }
+                    },
+                ],
+                "minimum_should_match": 1,
+            }
+        },
+    }
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        r = await client.post(
+            f"{opensearch_url}/{chunk_index}/_search",
+            content=dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        r.raise_for_status()
+        data = loads(r.content)
+    wanted = set(page_numbers)
+    out: dict[int, list[list[float]]] = {}
+    for h in data["hits"]["hits"]:
+        src = h["_source"]
+        if not src.get("embedding"):
+            continue
+        locations = [(src.get("doc_id"), src.get("page_number"))]
+        locations += [(c.get("doc_id"), c.get("page_number")) for c in src.get("citations") or []]
+        pages = {int(p) for d, p in locations if d == doc_id and p is not None and int(p) in wanted}
+        for page_number in pages:
+            out.setdefault(page_number, []).append(src["embedding"])
+    return out
+
+
+async def index_summaries(
+    opensearch_url: str,
+    base_index: str,
+    chunk_index: str,
+    doc_id: str,
+    page_numbers: list[int],
+) -> dict:
+    """
+    Recompute the centroids of the given pages from all of the document's chunks
+    on them in `chunk_index`, cited ones included (so chunks kept from earlier
+    ingests count too; they must be searchable already), then the document
+    centroid over all of its pages, weighting each page by its chunk count.
+    Chunk vectors are unit vectors.
+    """
+    page_vectors = await _page_chunk_vectors(opensearch_url, chunk_index, doc_id, page_numbers)
+    if not page_vectors:
+        return {"pages": 0, "doc": False}
+    embedding_dim = len(next(iter(page_vectors.values()))[0])
+    index_name = await ensure_summary_index(opensearch_url, base_index, embedding_dim)
+
+    pages = await _page_summaries(opensearch_url, index_name, chunk_index, doc_id)
+    docs = []
+    for page_number, vecs in sorted(page_vectors.items()):
+        page = {
+            "id": f"{chunk_index}/{doc_id}/p{page_number}",
+            "level": "page",
+            "chunk_index": chunk_index,
+            "doc_id": doc_id,
+            "page_number": page_number,
+            "chunks": len(vecs),
+            "embedding": _weighted_centroid([(v, 1) for v in vecs]),
+        }
+        pages[page_number] = page
+        docs.append(page)
+
+    docs.append(
+        {
+            "id": f"{chunk_index}/{doc_id}",
+            "level": "doc",
+            "chunk_index": chunk_index,
+            "doc_id": doc_id,
+            "page_number": 0,
+            "chunks": sum(p["chunks"] for p in pages.values()),
+            "embedding": _weighted_centroid([(p["embedding"], p["chunks"]) for p in pages.values()]),
+        }
+    )
+    res = await bulk_index(opensearch_url, index_name, docs)
+    return {"pages": len(page_vectors), "doc": True, "errors": res["errors"]}
+
+
+@dataclass(frozen=True)
+class Region:
+    chunk_index: str
+    doc_id: str
+    page_number: int  # 0 for a whole document
+    score: float
+
+
+def _chunk_index_filter(target: str) -> dict:
+    """
+    Summary-index filter matching the chunk indices of a search target expression.
+    """
+    clauses = [
+        {"prefix": {"chunk_index": part[:-1]}} if part.endswith("*") else {"term": {"chunk_index": part}}
+        for part in target.split(",")
+    ]
+    return clauses[0] if len(clauses) == 1 else {"bool": {"should": clauses, "minimum_should_match": 1}}
+
+
+def _region_filter_query(level: str, target: str, filters: SearchFilters | None) -> dict:
+    """
+    Summary-index filter for the regions of `target` that can hold chunks matching
+    `filters`: doc_ids always apply, the page range only to page centroids (tags
+    aren't summarized; the fine stage applies them).
+    """
+    clauses = [{"term": {"level": level}}, _chunk_index_filter(target)]
+    if filters is not None and filters.doc_ids:
+        clauses.append({"terms": {"doc_id": filters.doc_ids}})
+    if level == "page" and filters is not None and (filters.page_min is not None or filters.page_max is not None):
+        rng = {}
+        if filters.page_min is not None:
+            rng["gte"] = filters.page_min
+        if filters.page_max is not None:
+            rng["lte"] = filters.page_max
+        clauses.append({"range": {"page_number": rng}})
+    return {"bool": {"filter": clauses}}
+
+
+async def coarse_search(
+    opensearch_url: str,
+    base_index: str,
+    target: str,
+    query_vector: list[float],
+    level: str,
+    fan_out: int,
+    filters: SearchFilters | None = None,
+    timeout_s: float = 30.0,
+) -> list[Region]:
+    """
+    Top `fan_out` pages or documents of `target` by centroid similarity, among those
+    allowed by the doc_id / page filters. Empty when nothing is summarized yet (or
+    the summary index doesn't exist).
+    """
+    body = {
+        "size": fan_out,
+        "_source": ["chunk_index", "doc_id", "page_number"],
+        "query": {
+            "knn": {
+                "embedding": {
+                    "vector": l2_normalize(query_vector),
+                    "k": fan_out,
+                    "filter": _region_filter_query(level, target, filters),
+                }
+            }
+        },
+    }
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        r = await client.post(
+            f"{opensearch_url}/{summary_index(base_index)}/_search",
+            content=dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        if r.status_code == 404:
+            return []
+        r.raise_for_status()
+        data = loads(r.content)
+
+    return [
+        Region(
+            chunk_index=h["_source"]["chunk_index"],
+            doc_id=h["_source"]["doc_id"],
+            page_number=int(h["_source"].get("page_number") or 0),
+            score=float(h.get("_score") or 0.0),
+        )
+        for h in data["hits"]["hits"]
+    ]
+
+
+def region_filter(regions: list[Region]) -> dict:
+    """
+    Chunk filter restricted to the given pages / documents, matching a chunk on
+    its own location or any of its citations (as the centroids count them).
+    """
+    docs = sorted({r.doc_id for r in regions if r.page_number == 0})
+    clauses: list[dict] = [{"terms": {"doc_id": docs}}, {"terms": {"citations.doc_id": docs}}] if docs else []
+    for r in regions:
+        if r.page_number and r.doc_id not in docs:
+            for prefix in ("", "citations."):
+                clauses.append(
+                    {
+                        "bool": {
+                            "filter": [
+                                {"term": {f"{prefix}doc_id": r.doc_id}},
+                                {"term": {f"{prefix}page_number": r.page_number}},
+                            ]
+                        }
+                    }
+                )
+    return {"bool": {"should": clauses, "minimum_should_match": 1}}
+
+
+async def coarse_to_fine_knn(
+    opensearch_url: str,
+    base_index: str,
+    target: str,
+    query_vector: list[float],
+    k: int,
+    level: str,
+    fan_out: int,
+    filters: SearchFilters | None = None,
+    timeout_s: float = 30.0,
+) -> tuple[list[SearchHit], int]:
+    """
+    kNN over the chunks of the top `fan_out` pages/documents only: a small kNN over
+    centroids, then a filtered kNN restricted to those regions (and to the indices
+    they live in). Falls back to flat kNN over `target` when no region is found or
+    the regions hold fewer than k matching chunks (e.g. a tag filter excludes them).
+    Returns (hits, regions searched; 0 = flat).
+    """
+    regions = await coarse_search(
+        opensearch_url, base_index, target, query_vector, level, fan_out, filters=filters, timeout_s=timeout_s
+    )
+    if regions:
+        fine_target = ",".join(sorted({r.chunk_index for r in regions}))
+        hits = await knn_search(
+            opensearch_url,
+            fine_target,
+            query_vector,
+            k=k,
+            timeout_s=timeout_s,
+            filters=filters,
+            restrict=region_filter(regions),
+        )
+        if len(hits) >= k:
+            return hits, len(regions)
+
+    hits = await knn_search(opensearch_url, target, query_vector, k=k, timeout_s=timeout_s, filters=filters)
+    return hits, 0
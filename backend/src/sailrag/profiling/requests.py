@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from sailrag.profiling.sampler import StackSampler, TracingCapture
+from sailrag.profiling.stacks import collapse
+
+# Request header naming an armed profile; requests without it are passed straight through
+PROFILE_HEADER = b"x-profile-tag"
+
+MODES = ("sample", "trace")
+
+
+@dataclass
+class ArmedProfile:
+    tag: str
+    mode: str
+    interval_s: float
+    armed_at: float = field(default_factory=time.time)
+
+
+class RequestProfiler:
+    """
+    Profiles single requests: an admin arms a tag, and the next request carrying
+    `X-Profile-Tag: <tag>` is captured (sampled or traced) from the first byte
+    received to the last byte sent, including streamed bodies. Each armed tag
+    fires once; finished captures are kept for download, oldest evicted first.
+    """
+
+    def __init__(self, max_results: int = 20):
+        self.max_results = max_results
+        self.armed: dict[str, ArmedProfile] = {}
+        self.results: OrderedDict[str, dict] = OrderedDict()
+        self.busy = threading.Lock()
+
+    def arm(self, tag: str, mode: str, interval_s: float) -> ArmedProfile:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r} (expected {MODES})")
+        armed = ArmedProfile(tag=tag, mode=mode, interval_s=interval_s)
+        self.armed[tag] = armed
+        return armed
+
+    def take(self, tag: str) -> ArmedProfile | None:
+        return self.armed.pop(tag, None)
+
+    def store(self, tag: str, result: dict) -> None:
+        self.results[tag] = result
+        self.results.move_to_end(tag)
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+
+
+class RequestProfilerMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware, so streaming is untouched).
+    Only installed when profiling is enabled.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.armed:
+            return await self.app(scope, receive, send)
+
+        tag = next((v.decode("latin-1") for k, v in scope["headers"] if k == PROFILE_HEADER), None)
+        armed = self.profiler.take(tag) if tag else None
+        if armed is None:
+            return await self.app(scope, receive, send)
+        if not self.profiler.busy.acquire(blocking=False):
+            # Another capture is running; re-arm so a later request gets profiled
+            self.profiler.armed[armed.tag] = armed
+            return await self.app(scope, receive, send)
+
+        status = {"code": 0}
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        capture = (
+            StackSampler(threading.get_ident(), armed.interval_s, skip_idle=False)
+            if armed.mode == "sample"
+            else TracingCapture()
+        ).start()
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed_s = time.monotonic() - started
+            if isinstance(capture, StackSampler):
+                counts = capture.stop()
+                info = capture.stats()
+            else:
+                capture.stop()
+                counts = capture.collapsed()
+                info = {}
+            self.profiler.busy.release()
+            self.profiler.store(
+                armed.tag,
+                {
+                    "tag": armed.tag,
+                    "mode": armed.mode,
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status["code"],
+                    "elapsed_ms": round(elapsed_s * 1000, 1),
+                    "finished_at": time.time(),
+                    **info,
+                    "collapsed": collapse(counts),
+                },
+            )
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import pstats
+import sys
+from collections import Counter, defaultdict
+from types import FrameType
+
+# Frames deeper than this are truncated (recursive code, pathological cProfile call graphs)
+MAX_DEPTH = 128
+
+# Leaf functions of an event loop waiting for I/O; dropped by `frame_stack(..., skip_idle=True)`
+_IDLE_LEAVES = {"select", "poll", "epoll", "_run_once"}
+
+
+def _short_path(path: str) -> str:
+    for marker in ("site-packages" + os.sep, os.sep + "src" + os.sep, os.sep + "lib" + os.sep):
+        i = path.rfind(marker)
+        if i >= 0:
+            return path[i + len(marker) :]
+    return os.path.basename(path)
+
+
+def frame_label(filename: str, lineno: int, name: str) -> str:
+    """
+    One frame of a collapsed stack: `name (path:line)`; ';' is the frame separator.
+    """
+    return f"{name} ({_short_path(filename)}:{lineno})".replace(";", ":")
+
+
+def frame_stack(frame: FrameType | None, skip_idle: bool = False) -> list[str] | None:
+    """
+    Root-first labels of a live frame's stack. With `skip_idle`, returns None
+    when the thread is just waiting in the event loop's selector.
+    """
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        code = frame.f_code
+        labels.append(frame_label(code.co_filename, code.co_firstlineno, code.co_qualname))
+        frame = frame.f_back
+    if skip_idle and labels and labels[0].split(" ", 1)[0].rsplit(".", 1)[-1] in _IDLE_LEAVES:
+        return None
+    labels.reverse()
+    return labels
+
+
+def thread_stack(thread_id: int, skip_idle: bool = False) -> list[str] | None:
+    return frame_stack(sys._current_frames().get(thread_id), skip_idle=skip_idle)
+
+
+def collapse(counts: Counter) -> str:
+    """
+    Brendan Gregg's collapsed-stack format (`a;b;c 42` per line), the input of
+    flamegraph.pl, speedscope and inferno.
+    """
+    lines = [f"{stack} {int(n)}" for stack, n in counts.most_common() if int(n) > 0]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def pstats_to_collapsed(stats: pstats.Stats) -> Counter:
+    """
+    Approximate collapsed stacks (weights in microseconds) from a cProfile run.
+
+    cProfile keeps only caller -> callee edges, so a function's time is split
+    across its callers in proportion to each edge's cumulative time, as
+    flameprof does. Recursive edges are cut.
+    """
+    table = stats.stats  # func -> (primitive calls, calls, own time, cumulative time, callers)
+    children: dict[tuple, dict[tuple, float]] = defaultdict(dict)
+    for func, (_, _, _, _, callers) in table.items():
+        for caller, edge in callers.items():
+            if caller in table:
+                children[caller][func] = edge[3]
+
+    out: Counter = Counter()
+
+    def walk(func: tuple, path: list[str], seen: set, budget_s: float) -> None:
+        _, _, own_s, total_s, _ = table[func]
+        if total_s <= 0 or budget_s * 1e6 < 1 or len(path) >= MAX_DEPTH:
+            return
+        scale = min(1.0, budget_s / total_s)
+        path = path + [frame_label(*func)]
+        out[";".join(path)] += own_s * scale * 1e6
+        seen = seen | {func}
+        for callee, edge_s in children[func].items():
+            if callee not in seen:
+                walk(callee, path, seen, edge_s * scale)
+
+    for func, (_, _, _, total_s, callers) in table.items():
+        if not any(c in table for c in callers):
+            walk(func, [], set(), total_s)
+    return out
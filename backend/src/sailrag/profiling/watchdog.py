@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from sailrag.profiling.stacks import thread_stack
+
+log = logging.getLogger(__name__)
+
+
+def _percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class LoopWatchdog:
+    """
+    Detects a blocked event loop and records what blocked it.
+
+    A task on the loop bumps a heartbeat every `interval_s` (its lateness is the
+    loop lag); a separate thread checks the heartbeat and, once the next beat is
+    more than `threshold_s` late, snapshots the loop thread's stack, which is
+    then the blocking code itself. One event is logged per stall. Thresholds
+    must exceed `interval_s` (0 = off).
+    """
+
+    def __init__(self, threshold_s: float, interval_s: float = 0.05, max_events: int = 50):
+        self.interval_s = interval_s
+        self.check_threshold(threshold_s)
+        self.threshold_s = threshold_s
+        self.events: deque[dict] = deque(maxlen=max_events)
+        self.lags_ms: deque[float] = deque(maxlen=2000)
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def check_threshold(self, threshold_s: float) -> None:
+        """
+        ValueError unless `threshold_s` is 0 (off) or above the heartbeat interval:
+        a finer threshold can't be told apart from the heartbeat's own sleep.
+        """
+        if 0 < threshold_s <= self.interval_s:
+            raise ValueError(
+                f"loop watchdog threshold must be 0 (off) or above {self.interval_s * 1000:.0f} ms, "
+                f"got {threshold_s * 1000:g} ms"
+            )
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            self.lags_ms.append(max(0.0, now - expected) * 1000)
+            self._beat = now
+
+    def _watch(self) -> None:
+        stalled_beat = None
+        while not self._stop.wait(self.interval_s / 2):
+            beat = self._beat
+            # Lateness of the next beat, due `interval_s` after the last one
+            blocked_s = time.monotonic() - beat - self.interval_s
+            if blocked_s < self.threshold_s or beat == stalled_beat:
+                continue
+            stalled_beat = beat
+            stack = thread_stack(self._loop_thread_id) or []
+            self.stalls += 1
+            self.events.append({"at": time.time(), "blocked_ms": round(blocked_s * 1000, 1), "stack": stack})
+            log.warning(
+                "event loop blocked for %.0f ms (threshold %.0f ms) in:\n  %s",
+                blocked_s * 1000,
+                self.threshold_s * 1000,
+                "\n  ".join(stack[-25:]) or "<unknown>",
+            )
+
+    def start(self) -> None:
+        """
+        Must be called from the event loop thread.
+        """
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="sailrag-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def stats(self) -> dict:
+        lags = list(self.lags_ms)
+        return {
+            "running": self.running,
+            "threshold_ms": round(self.threshold_s * 1000, 1),
+            "stalls": self.stalls,
+            "lag_p50_ms": round(_percentile(lags, 50), 2),
+            "lag_p99_ms": round(_percentile(lags, 99), 2),
+            "lag_max_ms": round(max(lags, default=0.0), 2),
+        }
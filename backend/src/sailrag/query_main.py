@@ -0,0 +1,4 @@
+from sailrag.app import create_app
+
+# Query-serving replica: search/answer routes only, no PDF/OCR imports
+app = create_app(["query"])
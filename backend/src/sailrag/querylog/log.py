@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+
+class QueryLog:
+    """
+    Append-only, sampled JSONL log of /search and /answer requests.
+
+    Each record is written with a single O_APPEND write, so lines from several
+    worker processes never interleave. When the file exceeds `max_bytes` it is
+    rotated to `<name>.1` (one previous generation is kept).
+    Write failures disable the log instead of failing requests.
+    """
+
+    def __init__(self, path: Path, sample_rate: float = 1.0, max_bytes: int = 64 << 20):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._fd: int | None = None
+        self._size = 0
+        self.enabled = sample_rate > 0
+        self.written = 0
+        self.dropped = 0
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._size = os.fstat(self._fd).st_size
+        return self._fd
+
+    def _rotate(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        # Another worker may have rotated already; only rotate a file that is still too big
+        try:
+            if self.path.stat().st_size >= self.max_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        except FileNotFoundError:
+            pass
+
+    def record(self, endpoint: str, query: str, params: dict, timings_ms: dict, **extra) -> None:
+        if not self.enabled or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return
+        line = json.dumps(
+            {
+                "ts": round(time.time(), 3),
+                "endpoint": endpoint,
+                "query": query,
+                "params": params,
+                "timings_ms": {k: round(v, 2) for k, v in timings_ms.items()},
+                **extra,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8") + b"\n"
+        try:
+            fd = self._open()
+            os.write(fd, line)
+            self._size += len(line)
+            if self._size >= self.max_bytes:
+                self._rotate()
+            self.written += 1
+        except OSError:
+            self.enabled = False
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+@dataclass(frozen=True)
+class FrequentQuery:
+    query: str
+    k: int
+    filters: dict | None
+    count: int
+    collections: list[str] | None = None
+    # coarse-to-fine kNN as logged ("off", "page" or "doc"); None: not logged, use the settings
+    coarse: str | None = None
+    fan_out: int | None = None
+
+
+def _tail_lines(path: Path, max_bytes: int) -> tuple[list[bytes], int]:
+    """
+    Complete lines in the last `max_bytes` of a file, and the number of bytes read.
+    """
+    if max_bytes <= 0:
+        return [], 0
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - max_bytes))
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    lines = data.split(b"\n")
+    if size > max_bytes:
+        lines = lines[1:]  # first line is probably cut
+    return lines, len(data)
+
+
+# Endpoints whose queries are standalone retrievals (session follow-ups depend on the
+# conversation, so replaying them alone would warm the wrong results)
+RETRIEVAL_ENDPOINTS = ("search", "answer")
+
+
+def top_queries(
+    path: Path,
+    n: int,
+    max_bytes: int = 16 << 20,
+    endpoints: tuple[str, ...] = RETRIEVAL_ENDPOINTS,
+) -> list[FrequentQuery]:
+    """
+    The `n` most frequent (query, k, filters, collections, coarse, fan_out) of
+    `endpoints` in the most recent `max_bytes` of the log (current file, then the
+    rotated one), most frequent first.
+    """
+    lines, read = _tail_lines(path, max_bytes)
+    older, _ = _tail_lines(path.with_name(path.name + ".1"), max_bytes - read)
+    lines = older + lines
+
+    counts: Counter[tuple[str, int, str, str, str | None, int | None]] = Counter()
+    for ln in lines:
+        if not ln.strip():
+            continue
+        try:
+            rec = json.loads(ln)
+            if rec.get("endpoint") not in endpoints:
+                continue
+            params = rec.get("params") or {}
+            collections = params.get("collections")
+            fan_out = params.get("fan_out")
+            key = (
+                rec["query"],
+                int(params.get("k", 8)),
+                json.dumps(params.get("filters"), sort_keys=True),
+                json.dumps(sorted(collections) if collections else None),
+                params.get("coarse"),
+                int(fan_out) if fan_out is not None else None,
+            )
+        except (ValueError, KeyError, TypeError):
+            continue
+        counts[key] += 1
+
+    return [
+        FrequentQuery(
+            query=q,
+            k=k,
+            filters=json.loads(f),
+            count=c,
+            collections=json.loads(cs),
+            coarse=coarse,
+            fan_out=fan_out,
+        )
+        for (q, k, f, cs, coarse, fan_out), c in counts.most_common(n)
+    ]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from sailrag.querylog.log import FrequentQuery
+
+
+class ActivityTracker:
+    """
+    Counts in-flight live requests, so background work can wait for quiet periods.
+    """
+
+    def __init__(self):
+        self.inflight = 0
+        self.last_active = 0.0
+
+    def enter(self) -> None:
+        self.inflight += 1
+        self.last_active = time.monotonic()
+
+    def exit(self) -> None:
+        self.inflight -= 1
+        self.last_active = time.monotonic()
+
+    async def wait_idle(self, quiet_s: float, poll_s: float = 0.05) -> None:
+        while self.inflight > 0 or time.monotonic() - self.last_active < quiet_s:
+            await asyncio.sleep(poll_s)
+
+
+class Warmup:
+    """
+    Background cache warm-up after startup.
+
+    Loads the Ollama models, then replays frequent logged queries through the normal
+    retrieval path (filling the query-embedding and retrieval caches). At most
+    `rate_per_s` queries per second, and each one only after live traffic has been
+    quiet for `idle_s`, so warm-up never queues in front of real requests.
+    """
+
+    def __init__(self, activity: ActivityTracker, rate_per_s: float = 2.0, idle_s: float = 0.5):
+        self.activity = activity
+        self.rate_per_s = rate_per_s
+        self.idle_s = idle_s
+        self.state = "pending"
+        self.planned = 0
+        self.warmed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.models_loaded = False
+        self.duration_s = 0.0
+
+    async def run(
+        self,
+        queries: list[FrequentQuery],
+        retrieve: Callable[[FrequentQuery], Awaitable[bool]],
+        load_models: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        """
+        `retrieve` returns True when the query was already cached.
+        """
+        t0 = time.monotonic()
+        self.state = "running"
+        self.planned = len(queries)
+        interval_s = 1.0 / self.rate_per_s if self.rate_per_s > 0 else 0.0
+        try:
+            if load_models is not None:
+                await self.activity.wait_idle(self.idle_s)
+                try:
+                    await load_models()
+                    self.models_loaded = True
+                except Exception:
+                    self.errors += 1
+
+            for q in queries:
+                await asyncio.sleep(interval_s)
+                await self.activity.wait_idle(self.idle_s)
+                try:
+                    if await retrieve(q):
+                        self.skipped += 1
+                    else:
+                        self.warmed += 1
+                except Exception:
+                    self.errors += 1
+            self.state = "done"
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        finally:
+            self.duration_s = time.monotonic() - t0
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "planned": self.planned,
+            "warmed": self.warmed,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "models_loaded": self.models_loaded,
+            "duration_s": round(self.duration_s, 3),
+        }
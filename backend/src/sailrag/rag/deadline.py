@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import time
+
+# Rough English average for the LLM tokenizer; only used to budget prompt evaluation
+CHARS_PER_TOKEN = 4.0
+
+
+class Deadline:
+    """
+    Absolute time budget of one request, shared by all of its stages.
+    """
+
+    def __init__(self, budget_s: float):
+        self.budget_s = budget_s
+        self.expires_at = time.monotonic() + budget_s
+
+    def remaining_s(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining_s() <= 0.0
+
+    def timeout(self, cap_s: float) -> float:
+        """
+        Timeout for one stage: its own cap, but never past the deadline.
+        """
+        return min(cap_s, self.remaining_s())
+
+    def portion(self, ratio: float) -> Deadline:
+        """
+        Sub-deadline using at most `ratio` of the total budget (and never past this one).
+        """
+        sub = Deadline(0.0)
+        sub.budget_s = self.budget_s * ratio
+        sub.expires_at = min(self.expires_at, time.monotonic() + sub.budget_s)
+        return sub
+
+
+class GenerationRates:
+    """
+    EWMA of observed prompt-evaluation and generation speed (tokens/s), used to
+    predict how long a prompt and an answer of a given length will take.
+    """
+
+    def __init__(self, prompt_tokens_per_s: float, tokens_per_s: float, alpha: float = 0.2):
+        self.prompt_tokens_per_s = prompt_tokens_per_s
+        self.tokens_per_s = tokens_per_s
+        self.alpha = alpha
+
+    def observe(self, prompt_tokens: int, prompt_s: float, eval_tokens: int, eval_s: float) -> None:
+        if prompt_tokens > 0 and prompt_s > 0:
+            self.prompt_tokens_per_s += self.alpha * (prompt_tokens / prompt_s - self.prompt_tokens_per_s)
+        if eval_tokens > 0 and eval_s > 0:
+            self.tokens_per_s += self.alpha * (eval_tokens / eval_s - self.tokens_per_s)
+
+    def stats(self) -> dict:
+        return {
+            "prompt_tokens_per_s": round(self.prompt_tokens_per_s, 2),
+            "tokens_per_s": round(self.tokens_per_s, 2),
+        }
+
+
+def plan_generation(
+    base_chars: int,
+    context_chars: list[int],
+    budget_s: float,
+    rates: GenerationRates,
+    max_tokens: int | None,
+    min_tokens: int,
+) -> tuple[int, int, bool]:
+    """
+    Fit the prompt and the answer into `budget_s`.
+
+    Contexts are dropped from the end (lowest ranked first, keeping at least one)
+    while their prompt evaluation plus a `min_tokens` answer wouldn't fit; the
+    answer length is then capped to the time left, at least `min_tokens` and at
+    most `max_tokens` (None: no fixed cap).
+    Returns (contexts to keep, num_predict, whether the deadline capped the answer:
+    below `max_tokens`, or down to `min_tokens` when there is no fixed cap).
+    """
+
+    def prompt_s(n: int) -> float:
+        return (base_chars + sum(context_chars[:n])) / CHARS_PER_TOKEN / rates.prompt_tokens_per_s
+
+    n = len(context_chars)
+    min_answer_s = min_tokens / rates.tokens_per_s
+    while n > 1 and prompt_s(n) + min_answer_s > budget_s:
+        n -= 1
+
+    affordable = int((budget_s - prompt_s(n)) * rates.tokens_per_s)
+    if max_tokens is not None:
+        return n, max(min_tokens, min(max_tokens, affordable)), affordable < max_tokens
+    return n, max(min_tokens, affordable), affordable <= min_tokens
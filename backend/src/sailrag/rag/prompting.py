@@ -1,22 +1,32 @@
 from __future__ import annotations
 
 
-def build_rag_prompt(question: str, contexts: list[dict]) -> str:
-    """
-    contexts: list of dicts with keys: doc_id, page_number, chunk_id, text
-    """
+def _context_blocks(contexts: list[dict], start: int = 1) -> str:
     ctx_blocks = []
-    for i, c in enumerate(contexts, start=1):
+    for i, c in enumerate(contexts, start=start):
         header = f"[{i}] doc={c['doc_id']} page={c['page_number']} chunk={c['chunk_id']}"
         ctx_blocks.append(f"{header}\n{c['text']}".strip())
 
-    joined = "\n\n---\n\n".join(ctx_blocks)
+    return "\n\n---\n\n".join(ctx_blocks)
+
+
+def _history_block(history: list[tuple[str, str]]) -> str:
+    return "\n\n".join(f"User: {q}\nAssistant: {a}".strip() for q, a in history)
+
+
+def build_rag_prompt(question: str, contexts: list[dict], history: list[tuple[str, str]] | None = None) -> str:
+    """
+    contexts: list of dicts with keys: doc_id, page_number, chunk_id, text
+    history: earlier (question, answer) turns of the conversation, oldest first
+    """
+    joined = _context_blocks(contexts)
+    conversation = f"Conversation so far:\n{_history_block(history)}\n\n" if history else ""
 
     return f"""You are a helpful assistant for recreational sailing and navigation.
 Answer the question using ONLY the provided context.
 If the context is insufficient, say what is missing and ask a precise follow-up question.
 
-Question:
+{conversation}Question:
 {question}
 
 Context:
@@ -24,3 +34,28 @@ Context:
 
 Write a clear, practical answer in English. Include short bullet points when helpful.
 """
+
+
+def build_followup_prompt(question: str, contexts: list[dict], start: int) -> str:
+    """
+    Next turn of a conversation whose earlier prompts and answers the model
+    already has (Ollama `context`): only the new question and the contexts not
+    shown before, numbered on from `start` so earlier citations stay valid.
+    """
+    if not contexts:
+        return f"""Follow-up question:
+{question}
+
+No additional context was found; answer using ONLY the context given earlier in this conversation.
+"""
+
+    joined = _context_blocks(contexts, start=start)
+
+    return f"""Follow-up question:
+{question}
+
+Additional context:
+{joined}
+
+Answer using ONLY the context given in this conversation, in the same style as before.
+"""
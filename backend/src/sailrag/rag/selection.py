@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from sailrag.opensearch.search import SearchHit
+
+
+def select_adaptive_k(
+    fused: list[SearchHit],
+    k_min: int = 1,
+    k_max: int = 6,
+    min_score: float = 0.0,
+    score_mass: float = 0.9,
+    gap_ratio: float = 0.5,
+) -> tuple[int, str]:
+    """
+    Pick how many fused hits to send to the LLM, within [k_min, k_max]:
+    - min_score: stop before the first hit scoring below it
+    - score_mass: stop once the kept hits hold this share of the top-k_max score mass
+    - gap_ratio: stop before a hit scoring below gap_ratio x the previous one (score cliff)
+    The tightest rule wins. Returns (k, reason).
+    """
+    scores = [max(0.0, h.score) for h in fused[:k_max]]
+    if not scores:
+        return 0, "no_hits"
+
+    k_min = max(1, min(k_min, len(scores)))
+    cuts: list[tuple[int, str]] = [(len(scores), "k_max")]
+
+    for i in range(k_min, len(scores)):
+        if scores[i] < min_score:
+            cuts.append((i, "min_score"))
+            break
+
+    total = sum(scores)
+    if total > 0:
+        acc = 0.0
+        for i, sc in enumerate(scores, start=1):
+            acc += sc
+            if acc >= score_mass * total:
+                cuts.append((max(i, k_min), "score_mass"))
+                break
+
+    for i in range(k_min, len(scores)):
+        if scores[i] < gap_ratio * scores[i - 1]:
+            cuts.append((i, "score_gap"))
+            break
+
+    return min(cuts, key=lambda c: c[0])
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+
+from sailrag.embeddings.vectors import l2_normalize
+from sailrag.opensearch.models import SearchFilters
+from sailrag.opensearch.search import SearchHit
+
+# Approximate CPython footprint of one float / int held in a list (object + pointer)
+_NUMBER_BYTES = 32
+_SESSION_OVERHEAD_BYTES = 1024
+
+
+@dataclass
+class Turn:
+    question: str
+    answer: str
+    new_contexts: int  # contexts first shown to the model in this turn
+    mode: str  # "initial", "followup" or "rebuilt"
+
+
+@dataclass
+class Session:
+    """
+    One conversation: the retrieval settings it was opened with, every hit the
+    model has seen (citation [i] is hits[i-1]), the query vector carried into
+    follow-ups, and Ollama's `context` tokens of the exchange so far.
+    """
+
+    id: str
+    index: str
+    filters: SearchFilters | None
+    w_bm25: float
+    w_knn: float
+    k: int
+    k_followup: int
+    hits: list[SearchHit] = field(default_factory=list)
+    query_vector: list[float] = field(default_factory=list)
+    context: list[int] = field(default_factory=list)
+    endpoint: str | None = None  # LLM replica holding the conversation's KV cache
+    turns: list[Turn] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    used_at: float = field(default_factory=time.monotonic)
+    nbytes: int = 0
+    # Turns of one session run one at a time (each continues the previous context)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def size_bytes(self) -> int:
+        """
+        Approximate memory held by the session (texts, vectors, tokens).
+        """
+        hits = sum(len(h.text) + 200 + 100 * len(h.citations) for h in self.hits)
+        turns = sum(len(t.question) + len(t.answer) + 100 for t in self.turns)
+        numbers = _NUMBER_BYTES * (len(self.query_vector) + len(self.context))
+        return _SESSION_OVERHEAD_BYTES + hits + turns + numbers
+
+    def history(self, max_chars: int) -> list[tuple[str, str]]:
+        """
+        The latest (question, answer) turns within `max_chars`, oldest first. The
+        latest turn is always included, its answer cut short if needed.
+        """
+        out: list[tuple[str, str]] = []
+        used = 0
+        for t in reversed(self.turns):
+            size = len(t.question) + len(t.answer)
+            if used + size > max_chars:
+                if not out:
+                    out.append((t.question, t.answer[: max(0, max_chars - len(t.question))]))
+                break
+            out.append((t.question, t.answer))
+            used += size
+        return out[::-1]
+
+    def info(self) -> dict:
+        return {
+            "session_id": self.id,
+            "turns": len(self.turns),
+            "contexts": len(self.hits),
+            "context_tokens": len(self.context),
+            "bytes": self.nbytes,
+            "created_at": self.created_at,
+            "idle_s": round(time.monotonic() - self.used_at, 1),
+        }
+
+
+def blend_query_vectors(previous: list[float], current: list[float], carry: float) -> list[float]:
+    """
+    Unit query vector for a follow-up: `carry` of the conversation's vector plus the
+    rest of the new question's, so terse follow-ups keep the earlier topic.
+    """
+    if not previous or len(previous) != len(current):
+        return l2_normalize(current)
+    prev, cur = l2_normalize(previous), l2_normalize(current)
+    return l2_normalize([carry * p + (1.0 - carry) * c for p, c in zip(prev, cur)])
+
+
+class SessionStore:
+    """
+    In-process LRU of conversations, bounded by count and by approximate size.
+    Idle sessions expire after `ttl_s`; an evicted or expired session is gone
+    (the client starts a new one), so the bounds only cost a cold first turn.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_bytes: int = 128 << 20, ttl_s: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self.nbytes = 0
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self.turns: Counter[str] = Counter()  # by mode
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def create(self, **params) -> Session:
+        session = Session(id=secrets.token_urlsafe(16), **params)
+        self.created += 1
+        self.update(session)
+        return session
+
+    def get(self, session_id: str) -> Session | None:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if time.monotonic() - session.used_at > self.ttl_s:
+            self._remove(session_id)
+            self.expired += 1
+            return None
+        session.used_at = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def update(self, session: Session) -> None:
+        """
+        (Re-)insert a session after it changed, drop expired ones, then evict least
+        recently used sessions until both bounds hold again (never the session
+        just updated).
+        """
+        self._remove(session.id)
+        session.nbytes = session.size_bytes()
+        now = session.used_at = time.monotonic()
+        self._sessions[session.id] = session
+        self.nbytes += session.nbytes
+        while len(self._sessions) > 1:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.used_at > self.ttl_s:
+                self.expired += 1
+            elif len(self._sessions) > self.max_sessions or self.nbytes > self.max_bytes:
+                self.evicted += 1
+            else:
+                break
+            self._remove(oldest.id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._remove(session_id) is not None
+
+    def _remove(self, session_id: str) -> Session | None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.nbytes -= session.nbytes
+        return session
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "turns": dict(self.turns),
+        }
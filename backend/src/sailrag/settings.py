@@ -6,13 +6,122 @@ class Settings(BaseSettings):
 
     app_env: str = "dev"
     log_level: str = "INFO"
+    # Route groups served by sailrag.main:app ("query", "ingest")
+    app_roles: str = "query,ingest"
+
+    # Enables /admin/profile/* (sent as X-Admin-Token); empty -> no admin routes, no profiling middleware
+    admin_token: str = ""
+    # Log the event loop's stack whenever it is blocked longer than this (0 = watchdog off;
+    # otherwise must exceed the watchdog's 50 ms heartbeat interval)
+    loop_watchdog_ms: float = 0.0
 
     opensearch_url: str = "http://localhost:9200"
     ollama_url: str = "http://localhost:11434"
+    # Base index; each collection lives in its own index "<opensearch_index>-<collection>"
     opensearch_index: str = "sailrag-chunks"
     data_dir: str = "/data"
     ollama_embed_model: str = "nomic-embed-text"
     ollama_llm_model: str = "llama3.2:3b"
 
+    # Local HuggingFace tokenizer.json matching the embedding model (empty -> approximate tokenizer)
+    tokenizer_path: str = ""
+
+    # Primary shards of a new collection index: one per `collection_chunks_per_shard`
+    # expected chunks, capped at `collection_max_shards`. 250k chunks of 768-d vectors
+    # keep a shard's HNSW graph (~1 GB native memory) and segments quick to load and
+    # recover, well within OpenSearch's shard-size guidance
+    collection_chunks_per_shard: int = 250_000
+    collection_max_shards: int = 8
+
+    # Hierarchical retrieval: ingest keeps page/document centroid vectors in "summaries-<opensearch_index>".
+    # coarse_level "page" or "doc" makes kNN search only the chunks of the top fan-out regions
+    # ("off" = flat kNN over every chunk); both overridable per request
+    summaries_enabled: bool = True
+    coarse_level: str = "off"
+    coarse_page_fan_out: int = 50
+    coarse_doc_fan_out: int = 5
+
+    # Default PDF text-layer backend: "pypdf", "pdfium" (pypdfium2) or "pymupdf"
+    pdf_extractor: str = "pypdf"
+
+    # Persistent extracted-page cache under data_dir/cache/pages (text layer + OCR results)
+    page_cache_enabled: bool = True
+    page_cache_max_mb: int = 1024
+
+    # Classify pages on a low-DPI grayscale render before OCR (skip blanks, pick DPI/psm per page)
+    ocr_adaptive: bool = True
+    ocr_classify_dpi: int = 50
+
+    # Query-embedding micro-batching (/search, /answer)
+    embed_batch_window_ms: float = 5.0
+    embed_batch_max_size: int = 32
+
+    # Query-embedding LRU (entries); not invalidated by index writes
+    query_embedding_cache_size: int = 4096
+
+    # Raw BM25/kNN results per (query, k), invalidated by index writes
+    retrieval_cache_max_entries: int = 1024
+    retrieval_cache_ttl_s: float = 300.0
+
+    # Ollama replicas (comma-separated URLs) for embeddings and for generation; empty -> ollama_url.
+    # Calls go to the least-busy healthy replica, preferring ones that have the model loaded
+    ollama_embed_urls: str = ""
+    ollama_llm_urls: str = ""
+    ollama_health_interval_s: float = 10.0
+    # Hedged query embeddings: a duplicate call goes to a second replica once the first
+    # runs past the pool's recent p95 latency (never earlier than embed_hedge_min_ms)
+    embed_hedge: bool = False
+    embed_hedge_min_ms: float = 20.0
+
+    # Parallel generation slots of each Ollama replica (OLLAMA_NUM_PARALLEL)
+    ollama_num_parallel: int = 1
+
+    # LLM admission control: bounded priority queue in front of the generation slots
+    llm_max_queue: int = 16
+    llm_queue_timeout_s: float = 60.0
+
+    # End-to-end request deadlines (overridable per request with deadline_ms).
+    # /answer spends at most `retrieval_budget_ratio` of its budget on retrieval, then fits
+    # contexts and num_predict into the rest, using observed Ollama token rates.
+    # answer_max_tokens additionally caps every answer (None: only the deadline bounds it)
+    search_deadline_s: float = 15.0
+    answer_deadline_s: float = 90.0
+    retrieval_budget_ratio: float = 0.3
+    answer_max_tokens: int | None = None
+    answer_min_tokens: int = 48
+    llm_initial_tokens_per_s: float = 10.0
+    llm_initial_prompt_tokens_per_s: float = 100.0
+
+    # k-NN graph warm-up (/_plugins/_knn/warmup) at startup, after index creation and ingest, and
+    # every `knn_warmup_interval_s` (segments produced by merges start cold); 0 = no periodic run
+    knn_warmup_enabled: bool = True
+    knn_warmup_interval_s: float = 300.0
+    # Warn (logs, /healthz, /metrics) past this % of the k-NN graph memory limit
+    knn_memory_warn_pct: float = 80.0
+
+    # Conversational sessions (/sessions): each keeps the hits, query vector and Ollama context
+    # tokens of its turns in memory; LRU-evicted past either bound, expired after idle TTL
+    session_max_count: int = 1000
+    session_max_mb: int = 128
+    session_ttl_s: float = 1800.0
+    # Weight of the conversation's query vector in a follow-up's kNN query (rest: the new question)
+    session_query_carry: float = 0.5
+    # A turn that would grow the context past this starts over with a full prompt (keep < num_ctx)
+    session_max_context_tokens: int = 3072
+
+    # Sampled append-only query log (data_dir/querylog/queries.jsonl) from /search and /answer
+    query_log_enabled: bool = True
+    query_log_sample_rate: float = 1.0
+    query_log_max_mb: int = 64
+
+    # Startup warm-up: load the Ollama models, then replay the top-N logged queries
+    # into the embedding/retrieval caches, rate-limited and only while live traffic is idle
+    warmup_enabled: bool = True
+    warmup_top_n: int = 100
+    warmup_delay_s: float = 5.0
+    warmup_rate_per_s: float = 2.0
+    warmup_idle_s: float = 0.5
+    warmup_load_models: bool = True
+
 
 settings = Settings()
@@ -0,0 +1,61 @@
+from sailrag.ingest.boilerplate import RepeatedLineDetector
+
+
+def _strip(pages: list[str]) -> list[list[str]]:
+    detector = RepeatedLineDetector()
+    for text in pages:
+        detector.observe(text)
+    return [detector.strip(text, i).splitlines() for i, text in enumerate(pages)]
+
+
+def _body(i: int) -> list[str]:
+    return [
+        f"Vessel {i} shall keep a proper look-out at all times.",
+        f"Sound signals for case {i} are given in Annex III.",
+    ]
+
+
+def test_running_header_footer_and_page_number_are_removed():
+    pages = [
+        "\n".join(["INTERNATIONAL REGULATIONS", *_body(i), f"COLREG 1972 | {i + 11}"])
+        for i in range(8)
+    ]
+    for i, lines in enumerate(_strip(pages)):
+        assert lines == _body(i)
+
+
+def test_whole_line_and_roman_page_numbers_are_removed():
+    romans = ["i", "ii", "iii", "iv", "v", "vi", "vii", "viii"]
+    arabic = ["\n".join([*_body(i), f"- {i + 3} -"]) for i in range(8)]
+    front = ["\n".join([*_body(i), romans[i]]) for i in range(8)]
+    for pages in (arabic, front):
+        for i, lines in enumerate(_strip(pages)):
+            assert lines == _body(i)
+
+
+def test_page_word_number_is_removed():
+    pages = ["\n".join([*_body(i), f"Page {i + 1} of 40"]) for i in range(6)]
+    for i, lines in enumerate(_strip(pages)):
+        assert lines == _body(i)
+
+
+def test_numbered_headings_advancing_one_per_page_are_kept():
+    # One rule per page: "Rule 5", "Rule 6", ... runs with the pages but is content
+    for label in ("Rule", "Section", "Chapter", "Article"):
+        pages = ["\n".join([f"{label} {i + 5}", *_body(i)]) for i in range(8)]
+        for i, lines in enumerate(_strip(pages)):
+            assert lines == [f"{label} {i + 5}", *_body(i)]
+
+
+def test_content_lines_that_vary_or_rarely_repeat_are_kept():
+    pages = ["\n".join(["Overtaking", *_body(i), "See also Rule 13"]) for i in range(2)]
+    pages += ["\n".join([f"Narrow channels, part {i}", *_body(i), f"Note {i * 7}"]) for i in range(2, 8)]
+    for text, lines in zip(pages, _strip(pages)):
+        assert lines == text.splitlines()
+
+
+def test_roman_words_are_not_page_numbers():
+    words = ["civil", "ill", "mix", "dim", "mild", "vivid", "lid", "dill"]
+    pages = ["\n".join([*_body(i), words[i]]) for i in range(8)]
+    for text, lines in zip(pages, _strip(pages)):
+        assert lines == text.splitlines()
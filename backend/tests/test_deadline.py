@@ -0,0 +1,38 @@
+from sailrag.rag.deadline import CHARS_PER_TOKEN, GenerationRates, plan_generation
+
+# 100 prompt tokens/s, 10 answer tokens/s
+RATES = GenerationRates(prompt_tokens_per_s=100.0, tokens_per_s=10.0)
+# 400 chars = 1 s of prompt evaluation each
+BASE_CHARS = int(CHARS_PER_TOKEN * 100)
+CONTEXTS = [BASE_CHARS] * 4
+
+
+def _plan(budget_s: float, max_tokens: int | None, min_tokens: int = 48) -> tuple[int, int, bool]:
+    return plan_generation(BASE_CHARS, CONTEXTS, budget_s, RATES, max_tokens, min_tokens)
+
+
+def test_no_deadline_pressure_keeps_everything():
+    # 5 s of prompt, 10 s of answer time left
+    assert _plan(15.0, max_tokens=64) == (4, 64, False)
+
+
+def test_no_deadline_pressure_without_max_tokens_uses_the_time_left():
+    assert _plan(15.0, max_tokens=None) == (4, 100, False)
+
+
+def test_tight_deadline_caps_the_answer_below_max_tokens():
+    n, num_predict, capped = _plan(10.0, max_tokens=64)
+    assert (n, num_predict, capped) == (4, 50, True)
+
+
+def test_tight_deadline_drops_contexts_then_floors_the_answer():
+    # No room for more than one context plus a minimum answer
+    n, num_predict, capped = _plan(3.0, max_tokens=None)
+    assert n == 1
+    assert num_predict == 48
+    assert capped
+
+
+def test_deadline_down_to_the_minimum_is_reported_without_max_tokens():
+    # Prompt fits, but only the minimum answer is left
+    assert _plan(9.85, max_tokens=None) == (4, 48, True)
@@ -0,0 +1,118 @@
+import pytest
+
+from sailrag.chunking import dedup
+from sailrag.chunking.dedup import (
+    IndexedFingerprint,
+    band_keys,
+    dedup_chunks,
+    format_simhash,
+    hamming,
+    match_indexed,
+)
+from sailrag.chunking.models import Chunk, Citation
+
+RULE = (
+    "Every vessel shall at all times maintain a proper look-out by sight and hearing "
+    "as well as by all available means appropriate in the prevailing circumstances."
+)
+OTHER = "A sailing vessel running free shall keep out of the way of a vessel close-hauled."
+
+
+def _chunk(doc_id: str, page: int, text: str, n: int = 0, simhash: int | None = None) -> Chunk:
+    chunk_id = f"{doc_id}:{page}:{n}"
+    c = Chunk(doc_id=doc_id, page_number=page, chunk_id=chunk_id, text=text, char_count=len(text))
+    if simhash is not None:
+        own = Citation(doc_id=doc_id, page_number=page, chunk_id=chunk_id)
+        c = c.model_copy(update={"simhash": format_simhash(simhash), "citations": [own]})
+    return c
+
+
+def _indexed(chunk_id: str, simhash: int, citations: list[Citation] | None = None) -> IndexedFingerprint:
+    doc_id, page, _ = chunk_id.split(":")
+    own = Citation(doc_id=doc_id, page_number=int(page), chunk_id=chunk_id)
+    return IndexedFingerprint(
+        id=chunk_id, chunk_id=chunk_id, doc_id=doc_id, simhash=simhash, citations=citations or [own]
+    )
+
+
+def test_near_duplicates_collapse_into_first_occurrence_with_citations():
+    chunks = [
+        _chunk("COLREG", 4, RULE),
+        _chunk("COLREG", 5, OTHER),
+        # Same words, different case / punctuation / spacing
+        _chunk("NavRules", 2, RULE.upper().replace("-", " ").replace(".", "")),
+        _chunk("NavRules", 9, "  " + RULE),
+    ]
+    out = dedup_chunks(chunks)
+
+    assert [c.chunk_id for c in out] == ["COLREG:4:0", "COLREG:5:0"]
+    assert [(x.doc_id, x.page_number) for x in out[0].citations] == [("COLREG", 4), ("NavRules", 2), ("NavRules", 9)]
+    assert [(x.doc_id, x.page_number) for x in out[1].citations] == [("COLREG", 5)]
+    assert all(c.simhash for c in out)
+
+
+def test_citations_merge_without_repeating_a_location():
+    chunks = [_chunk("COLREG", 4, RULE), _chunk("NavRules", 2, RULE), _chunk("NavRules", 2, RULE)]
+    out = dedup_chunks(chunks)
+
+    assert len(out) == 1
+    assert [x.chunk_id for x in out[0].citations] == ["COLREG:4:0", "NavRules:2:0"]
+
+
+def test_max_distance_beyond_band_guarantee_is_rejected():
+    with pytest.raises(ValueError):
+        dedup_chunks([_chunk("COLREG", 4, RULE)], max_distance=4)
+
+
+# Fingerprints sharing band 0 but 16 bits apart elsewhere: an LSH candidate, not a duplicate
+FP = 0x0123_4567_89AB_CDEF
+FAR = FP ^ 0xFFFF_0000_0000_0000
+
+
+def test_band_collision_beyond_the_hamming_threshold_is_not_a_duplicate(monkeypatch):
+    assert band_keys(FP)[0] == band_keys(FAR)[0] and hamming(FP, FAR) == 16
+    fingerprints = {"first": FP, "second": FAR}
+    monkeypatch.setattr(dedup, "simhash64", lambda text: fingerprints[text])
+
+    out = dedup_chunks([_chunk("COLREG", 4, "first"), _chunk("NavRules", 2, "second")])
+    assert [c.chunk_id for c in out] == ["COLREG:4:0", "NavRules:2:0"]
+
+    to_index, updates = match_indexed([_chunk("NavRules", 2, "second", simhash=FAR)], [_indexed("COLREG:4:0", FP)])
+    assert [c.chunk_id for c in to_index] == ["NavRules:2:0"]
+    assert updates == {}
+
+
+def test_match_against_another_documents_chunk_becomes_a_citation_update():
+    near = FP ^ 0b101  # distance 2
+    chunk = _chunk("NavRules", 2, RULE, simhash=near)
+
+    to_index, updates = match_indexed([chunk], [_indexed("COLREG:4:0", FP)])
+    assert to_index == []
+    assert updates == {"COLREG:4:0": chunk.citations}
+
+
+def test_reingested_chunk_is_kept_with_citations_merged_into_it():
+    previous = _indexed(
+        "COLREG:4:0",
+        FP,
+        [
+            Citation(doc_id="COLREG", page_number=4, chunk_id="COLREG:4:0"),
+            Citation(doc_id="NavRules", page_number=2, chunk_id="NavRules:2:0"),
+        ],
+    )
+    chunk = _chunk("COLREG", 4, RULE, simhash=FP ^ 1)
+
+    to_index, updates = match_indexed([chunk], [previous])
+    assert [c.chunk_id for c in to_index] == ["COLREG:4:0"]
+    assert [x.chunk_id for x in to_index[0].citations] == ["COLREG:4:0", "NavRules:2:0"]
+    assert updates == {}
+
+
+def test_same_document_chunk_overwritten_by_the_batch_is_not_a_duplicate():
+    # Re-chunking moved the text from chunk 1 to chunk 0 of the page; chunk 1 is
+    # rewritten by this batch too, so the old copy must not swallow the new one
+    batch = [_chunk("COLREG", 4, RULE, n=0, simhash=FP), _chunk("COLREG", 4, OTHER, n=1, simhash=~FP & (2**64 - 1))]
+    to_index, updates = match_indexed(batch, [_indexed("COLREG:4:1", FP)])
+
+    assert [c.chunk_id for c in to_index] == ["COLREG:4:0", "COLREG:4:1"]
+    assert updates == {}
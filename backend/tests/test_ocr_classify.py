@@ -0,0 +1,103 @@
+import random
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from sailrag.ingest.ocr import classify_page_image
+
+# Pages as rendered for classification (settings.ocr_classify_dpi), US letter
+DPI = 50
+WIDTH, HEIGHT = int(8.5 * DPI), 11 * DPI
+WORDS = "the of and to in is for on that with as by this are from at be or an it valve pump torque".split()
+
+
+def _blank_page() -> Image.Image:
+    return Image.new("L", (WIDTH, HEIGHT), 255)
+
+
+def _draw_text(img: Image.Image, top: int, lines: int, points: float, left: int = 40, width: int | None = None):
+    draw = ImageDraw.Draw(img)
+    size = points * DPI / 72
+    font = ImageFont.load_default(size=size)
+    rng = random.Random(lines * 1000 + int(points * 10))
+    word_px = {w: font.getlength(f" {w}") for w in WORDS}
+    width = width or WIDTH - 2 * left
+    y = top
+    for _ in range(lines):
+        words, used = [], 0.0
+        while used + word_px[word := rng.choice(WORDS)] <= width:
+            words.append(word)
+            used += word_px[word]
+        draw.text((left, y), " ".join(words), fill=0, font=font)
+        y += size * 1.25
+    return img
+
+
+def _scanned_blank() -> Image.Image:
+    img = _blank_page()
+    rng = random.Random(1)
+    for _ in range(20):  # scanner specks
+        img.putpixel((rng.randrange(WIDTH), rng.randrange(HEIGHT)), 0)
+    return img
+
+
+def _photo_with_caption() -> Image.Image:
+    img = _blank_page()
+    draw = ImageDraw.Draw(img)
+    for y in range(40, 420):
+        draw.line([(30, y), (WIDTH - 30, y)], fill=40 + 60 * (y % 37) // 37)
+    return _draw_text(img, 440, 2, 10)
+
+
+def _diagram() -> Image.Image:
+    img = _blank_page()
+    draw = ImageDraw.Draw(img)
+    for x, y in [(60, 80), (250, 80), (150, 250)]:
+        draw.rectangle([x, y, x + 110, y + 60], outline=0, width=2)
+    return _draw_text(img, 100, 1, 10, left=70, width=90)
+
+
+@pytest.fixture(scope="module")
+def pages() -> dict[str, Image.Image]:
+    return {
+        "blank": _scanned_blank(),
+        "body_10pt": _draw_text(_blank_page(), 40, 40, 10),
+        "fine_print_8pt": _draw_text(_blank_page(), 30, 50, 8),
+        "body_12pt": _draw_text(_blank_page(), 40, 35, 12),
+        "large_print_18pt": _draw_text(_blank_page(), 40, 20, 18),
+        "short_note": _draw_text(_blank_page(), 60, 5, 11),
+        "photo": _photo_with_caption(),
+        "diagram": _diagram(),
+    }
+
+
+def test_blank_page_skips_ocr(pages):
+    assert classify_page_image(pages["blank"], classify_dpi=DPI).kind == "blank"
+
+
+@pytest.mark.parametrize("name", ["photo", "diagram"])
+def test_image_pages_use_sparse_text_mode(pages, name):
+    pc = classify_page_image(pages[name], classify_dpi=DPI)
+    assert (pc.kind, pc.psm) == ("image", 11)
+
+
+def test_body_text_keeps_the_fixed_ocr_resolution(pages):
+    pc = classify_page_image(pages["body_10pt"], classify_dpi=DPI)
+    assert pc.kind == "text"
+    assert pc.text_lines == 40
+    assert (pc.dpi, pc.psm) == (200, 3)
+
+
+@pytest.mark.parametrize(
+    "name, dpi",
+    [("fine_print_8pt", 300), ("body_10pt", 200), ("body_12pt", 200), ("large_print_18pt", 150)],
+)
+def test_dpi_follows_text_size(pages, name, dpi):
+    pc = classify_page_image(pages[name], classify_dpi=DPI)
+    assert pc.kind == "text"
+    assert pc.dpi == dpi
+
+
+def test_short_text_is_one_block(pages):
+    pc = classify_page_image(pages["short_note"], classify_dpi=DPI)
+    assert (pc.kind, pc.text_lines, pc.psm) == ("text", 5, 6)
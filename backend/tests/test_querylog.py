@@ -0,0 +1,20 @@
+from sailrag.querylog.log import FrequentQuery, QueryLog, top_queries
+
+
+def test_top_queries_skip_session_turns_and_keep_the_coarse_path(tmp_path):
+    log = QueryLog(tmp_path / "queries.jsonl")
+    search = {"k": 8, "filters": None, "collections": None}
+    for _ in range(3):
+        log.record("search", "lights at anchor", {**search, "coarse": "page", "fan_out": 25}, {})
+    for _ in range(2):
+        log.record("answer", "lights at anchor", {**search, "coarse": "off", "fan_out": None}, {})
+    for _ in range(5):
+        log.record("session", "and at night?", {"turn": 2, "mode": "followup", "k": 8}, {})
+    # Logged before coarse params were recorded
+    log.record("search", "narrow channels", search, {})
+
+    assert top_queries(log.path, 10) == [
+        FrequentQuery("lights at anchor", 8, None, 3, None, coarse="page", fan_out=25),
+        FrequentQuery("lights at anchor", 8, None, 2, None, coarse="off", fan_out=None),
+        FrequentQuery("narrow channels", 8, None, 1, None),
+    ]
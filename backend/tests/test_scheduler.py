@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from sailrag.llm.scheduler import GenerationScheduler, SchedulerOverloaded
+
+
+async def _hold(scheduler: GenerationScheduler, priority: str, release: asyncio.Event) -> None:
+    async with scheduler.slot(priority):
+        await release.wait()
+
+
+async def _fill_with_low(scheduler: GenerationScheduler, release: asyncio.Event) -> list[asyncio.Task]:
+    holders = [asyncio.create_task(_hold(scheduler, "low", release)) for _ in range(scheduler.max_queue + 1)]
+    await asyncio.sleep(0)
+    assert scheduler.queued == scheduler.max_queue
+    return holders
+
+
+def test_low_priority_backlog_does_not_shed_interactive_requests():
+    async def run() -> None:
+        scheduler = GenerationScheduler(slots=1, max_queue=16)
+        release = asyncio.Event()
+        holders = await _fill_with_low(scheduler, release)
+
+        with pytest.raises(SchedulerOverloaded) as e:
+            scheduler.check_admission("low")
+        assert e.value.reason == "queue_full"
+        scheduler.check_admission("high")
+        scheduler.check_admission("normal")
+
+        high = asyncio.create_task(_hold(scheduler, "high", release))
+        await asyncio.sleep(0)
+        assert scheduler.queued == scheduler.max_queue
+        assert scheduler.metrics()["queued_by_priority"] == {"high": 1, "normal": 0, "low": 15}
+
+        # The newest low waiter made room
+        preempted = holders[-1]
+        await asyncio.wait([preempted], timeout=1.0)
+        assert preempted.exception().reason == "preempted"
+        assert scheduler.preempted == 1
+
+        release.set()
+        await asyncio.gather(high, *holders[:-1])
+        assert scheduler.completed == scheduler.max_queue + 1
+        assert scheduler.queued == 0
+
+    asyncio.run(run())
+
+
+def test_high_priority_is_served_before_earlier_low_waiters():
+    async def run() -> None:
+        scheduler = GenerationScheduler(slots=1, max_queue=16)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async def job(name: str, priority: str) -> None:
+            async with scheduler.slot(priority):
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(job("first", "low"))
+        await asyncio.sleep(0)
+        rest = [asyncio.create_task(job(f"low{i}", "low")) for i in range(3)]
+        rest.append(asyncio.create_task(job("high", "high")))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(first, *rest)
+        assert order == ["first", "high", "low0", "low1", "low2"]
+
+    asyncio.run(run())
+
+
+def test_full_queue_of_equal_priority_still_rejects():
+    async def run() -> None:
+        scheduler = GenerationScheduler(slots=1, max_queue=2)
+        release = asyncio.Event()
+        holders = [asyncio.create_task(_hold(scheduler, "high", release)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(SchedulerOverloaded) as e:
+            async with scheduler.slot("high"):
+                pass
+        assert e.value.reason == "queue_full"
+        assert scheduler.preempted == 0
+
+        release.set()
+        await asyncio.gather(*holders)
+
+    asyncio.run(run())
+
+
+def test_queue_wait_cut_by_caller_deadline_is_not_overload():
+    async def run() -> None:
+        scheduler = GenerationScheduler(slots=1, queue_timeout_s=5.0)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "normal", release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(SchedulerOverloaded) as e:
+            async with scheduler.slot("normal", timeout_s=0.01):
+                pass
+        assert e.value.reason == "deadline"
+
+        scheduler.queue_timeout_s = 0.01
+        with pytest.raises(SchedulerOverloaded) as e:
+            async with scheduler.slot("normal", timeout_s=5.0):
+                pass
+        assert e.value.reason == "queue_timeout"
+
+        release.set()
+        await holder
+
+    asyncio.run(run())
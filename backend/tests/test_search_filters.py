@@ -0,0 +1,37 @@
+from sailrag.opensearch.models import SearchFilters
+from sailrag.opensearch.search import build_filter_query
+
+
+def test_empty_filters_build_no_query():
+    assert build_filter_query(None) is None
+    assert build_filter_query(SearchFilters()) is None
+
+
+def test_doc_and_page_filters_also_match_citations():
+    q = build_filter_query(SearchFilters(doc_ids=["NavRules"], page_min=3, page_max=5, tags=["rules"]))
+    assert q == {
+        "bool": {
+            "filter": [
+                {
+                    "bool": {
+                        "should": [
+                            {"terms": {"doc_id": ["NavRules"]}},
+                            {"terms": {"citations.doc_id": ["NavRules"]}},
+                        ],
+                        "minimum_should_match": 1,
+                    }
+                },
+                {
+                    "bool": {
+                        "should": [
+                            {"range": {"page_number": {"gte": 3, "lte": 5}}},
+                            {"range": {"citations.page_number": {"gte": 3, "lte": 5}}},
+                        ],
+                        "minimum_should_match": 1,
+                    }
+                },
+                {"terms": {"tags": ["rules"]}},
+            ]
+        }
+    }
+
@@ -0,0 +1,40 @@
+from sailrag.rag.prompting import build_rag_prompt
+from sailrag.rag.sessions import Session, Turn
+
+CONTEXT = {"doc_id": "COLREG", "page_number": 12, "chunk_id": "COLREG-p12-c1", "text": "Rule 30: anchor lights."}
+
+
+def _session(*turns: tuple[str, str]) -> Session:
+    session = Session(id="s", index="sailrag-chunks*", filters=None, w_bm25=0.5, w_knn=0.5, k=8, k_followup=4)
+    session.turns = [Turn(q, a, 1, "initial" if i == 0 else "followup") for i, (q, a) in enumerate(turns)]
+    return session
+
+
+def test_history_keeps_the_latest_turns_that_fit_oldest_first():
+    session = _session(("q1", "a" * 50), ("q2", "b" * 20), ("q3", "c" * 20))
+    assert session.history(90) == [("q2", "b" * 20), ("q3", "c" * 20)]
+    assert session.history(1000) == [("q1", "a" * 50), ("q2", "b" * 20), ("q3", "c" * 20)]
+
+
+def test_history_always_carries_the_latest_question():
+    session = _session(("what lights does a vessel at anchor show?", "x" * 500))
+    (question, answer), = session.history(60)
+    assert question == "what lights does a vessel at anchor show?"
+    assert len(question) + len(answer) == 60
+
+
+def test_rebuilt_prompt_carries_the_earlier_turns():
+    session = _session(
+        ("What lights does a vessel at anchor show?", "An all-round white light forward [1]."),
+    )
+    prompt = build_rag_prompt("And by day?", [CONTEXT], history=session.history(4096))
+
+    conversation = prompt.index("Conversation so far:")
+    assert conversation < prompt.index("Question:\nAnd by day?") < prompt.index("Context:")
+    assert "User: What lights does a vessel at anchor show?" in prompt
+    assert "Assistant: An all-round white light forward [1]." in prompt
+
+
+def test_prompt_without_history_is_unchanged():
+    assert build_rag_prompt("q", [CONTEXT]) == build_rag_prompt("q", [CONTEXT], history=[])
+    assert "Conversation so far" not in build_rag_prompt("q", [CONTEXT])